@@ -0,0 +1,33 @@
+// Runs inside a zero-height component iframe, so work on the page's document
+(function() {
+    const win = window.parent;
+    const doc = win.document;
+    const selector = 'input[type="text"], input[type="number"], select';
+    // Data editor grids (and their cell editor overlay) keep their own Enter handling
+    const gridSelector = '[data-testid="stDataFrame"], [data-testid="stDataFrameResizable"], #portal, .gdg-clip-region';
+
+    // Enter moves focus to the next field of the same form; on the last
+    // field it is left alone so the form submits as usual
+    function handleEnterKey(e) {
+        if (e.key !== 'Enter' || !e.target.matches || !e.target.matches(selector)) {
+            return;
+        }
+        const form = e.target.closest('[data-testid="stForm"]');
+        if (!form || e.target.closest(gridSelector)) {
+            return;
+        }
+        const inputs = Array.from(form.querySelectorAll(selector)).filter(el => !el.closest(gridSelector));
+        const nextIndex = inputs.indexOf(e.target) + 1;
+        if (nextIndex > 0 && nextIndex < inputs.length) {
+            e.preventDefault();
+            inputs[nextIndex].focus();
+        }
+    }
+
+    // The iframe can be recreated, so swap out any listener a previous copy installed
+    if (win.dataEntryEnterKeyHandler) {
+        doc.removeEventListener('keydown', win.dataEntryEnterKeyHandler);
+    }
+    win.dataEntryEnterKeyHandler = handleEnterKey;
+    doc.addEventListener('keydown', handleEnterKey);
+})();
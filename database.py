@@ -1,7 +1,63 @@
 import sqlite3
 import pandas as pd
+from contextlib import contextmanager
 from datetime import datetime
 
+def open_connection():
+    """
+    Open a connection meant to be kept and reused, e.g. for a whole Streamlit session
+    
+    SQLite drops a connection's page cache when it closes, so a reused
+    connection keeps recently read pages in memory between reruns.
+    """
+    conn = sqlite3.connect('gold_assay.db', check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute('PRAGMA cache_size=-64000')
+    return conn
+
+@contextmanager
+def _connection(conn=None):
+    """Yield the caller's connection, or open a new one and close it afterwards"""
+    if conn is not None:
+        yield conn
+        return
+    
+    conn = sqlite3.connect('gold_assay.db')
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+# Write statements shared by the helpers below. The text never varies between
+# calls (optional fields go through COALESCE instead of a rebuilt SET list), so
+# sqlite3's per-connection statement cache can reuse the prepared statement.
+INSERT_ASSAY_RESULT_SQL = (
+    "INSERT OR REPLACE INTO assay_results "
+    "(assayer_id, sample_id, gold_content, test_date, notes, gold_type, bar_weight_grams) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?)"
+)
+
+UPDATE_ASSAY_RESULT_SQL = """
+    UPDATE assay_results
+    SET gold_content = ?,
+        notes = ?,
+        gold_type = COALESCE(?, gold_type),
+        bar_weight_grams = COALESCE(?, bar_weight_grams)
+    WHERE result_id = ?
+"""
+
+UPDATE_ASSAYER_SQL = """
+    UPDATE assayers
+    SET name = ?,
+        employee_id = ?,
+        joining_date = COALESCE(?, joining_date),
+        profile_picture = COALESCE(?, profile_picture),
+        work_experience = COALESCE(?, work_experience)
+    WHERE assayer_id = ?
+"""
+
 def _check_column_exists(cursor, table, column):
     """Check if a column exists in a SQLite table"""
     cursor.execute(f"PRAGMA table_info({table})")
@@ -63,233 +119,208 @@ def init_db():
     )
     ''')
     
+    # Indexes for the result search: per-assayer date ranges, newest-first
+    # listings and sample ID lookups
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_results_assayer_date ON assay_results (assayer_id, test_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_results_test_date ON assay_results (test_date)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_results_sample ON assay_results (sample_id)")
+    
+    # Gather planner statistics once so SQLite knows how selective the indexes are
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+    if cursor.fetchone() is None:
+        cursor.execute("ANALYZE")
+    
     conn.commit()
     conn.close()
 
-def add_assayer(name, employee_id, joining_date=None, profile_picture="", work_experience=""):
+def add_assayer(name, employee_id, joining_date=None, profile_picture="", work_experience="", conn=None):
     """Add a new assayer to the database with optional profile information"""
-    conn = sqlite3.connect('gold_assay.db')
-    cursor = conn.cursor()
-    
     if joining_date is None:
         joining_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     
-    try:
-        cursor.execute(
-            """INSERT INTO assayers 
-               (name, employee_id, joining_date, profile_picture, work_experience) 
-               VALUES (?, ?, ?, ?, ?)""",
-            (name, employee_id, joining_date, profile_picture, work_experience)
-        )
-        conn.commit()
-        success = True
-    except sqlite3.IntegrityError:
-        success = False
+    with _connection(conn) as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                """INSERT INTO assayers 
+                   (name, employee_id, joining_date, profile_picture, work_experience) 
+                   VALUES (?, ?, ?, ?, ?)""",
+                (name, employee_id, joining_date, profile_picture, work_experience)
+            )
+            conn.commit()
+            success = True
+        except sqlite3.IntegrityError:
+            conn.rollback()
+            success = False
     
-    conn.close()
     return success
 
-def get_assayers():
+def get_assayers(conn=None):
     """Get list of all active assayers"""
-    conn = sqlite3.connect('gold_assay.db')
-    assayers_df = pd.read_sql("SELECT * FROM assayers WHERE is_active = 1", conn)
-    conn.close()
+    with _connection(conn) as conn:
+        assayers_df = pd.read_sql("SELECT * FROM assayers WHERE is_active = 1", conn)
     return assayers_df
 
-def update_assayer(assayer_id, name, employee_id, joining_date=None, profile_picture=None, work_experience=None):
+def update_assayer(assayer_id, name, employee_id, joining_date=None, profile_picture=None, work_experience=None, conn=None):
     """Update an existing assayer's information including profile data"""
-    conn = sqlite3.connect('gold_assay.db')
-    cursor = conn.cursor()
-    
-    try:
-        # First, build the update query based on which parameters were provided
-        update_parts = ["name = ?", "employee_id = ?"]
-        params = [name, employee_id]
-        
-        if joining_date is not None:
-            update_parts.append("joining_date = ?")
-            params.append(joining_date)
+    with _connection(conn) as conn:
+        cursor = conn.cursor()
         
-        if profile_picture is not None:
-            update_parts.append("profile_picture = ?")
-            params.append(profile_picture)
-            
-        if work_experience is not None:
-            update_parts.append("work_experience = ?")
-            params.append(work_experience)
-            
-        # Add the assayer_id to the params
-        params.append(assayer_id)
-        
-        # Construct and execute the query
-        query = f"""
-        UPDATE assayers
-        SET {", ".join(update_parts)}
-        WHERE assayer_id = ?
-        """
-        
-        cursor.execute(query, params)
-        conn.commit()
-        success = True
-    except sqlite3.IntegrityError:
-        # This happens if the employee_id already exists for another assayer
-        conn.rollback()
-        success = False
-    finally:
-        conn.close()
+        try:
+            # Fields passed as None keep their current value
+            cursor.execute(
+                UPDATE_ASSAYER_SQL,
+                (name, employee_id, joining_date, profile_picture, work_experience, assayer_id)
+            )
+            conn.commit()
+            success = True
+        except sqlite3.IntegrityError:
+            # This happens if the employee_id already exists for another assayer
+            conn.rollback()
+            success = False
         
     return success
 
-def delete_assayer(assayer_id):
+def delete_assayer(assayer_id, conn=None):
     """Delete (deactivate) an assayer by setting is_active to 0"""
-    conn = sqlite3.connect('gold_assay.db')
-    cursor = conn.cursor()
-    
-    # Check if this is a benchmark assayer
-    cursor.execute('SELECT id FROM benchmark_assayers WHERE assayer_id = ? AND is_active = 1', (assayer_id,))
-    is_benchmark = cursor.fetchone() is not None
-    
-    if is_benchmark:
-        conn.close()
-        return False, "Cannot delete the current benchmark assayer"
-    
-    try:
-        # Set the assayer as inactive instead of actually deleting
-        cursor.execute('UPDATE assayers SET is_active = 0 WHERE assayer_id = ?', (assayer_id,))
-        conn.commit()
-        success = True
-        message = "Assayer deactivated successfully"
-    except Exception as e:
-        conn.rollback()
-        success = False
-        message = str(e)
-    finally:
-        conn.close()
+    with _connection(conn) as conn:
+        cursor = conn.cursor()
+        
+        # Check if this is a benchmark assayer
+        cursor.execute('SELECT id FROM benchmark_assayers WHERE assayer_id = ? AND is_active = 1', (assayer_id,))
+        is_benchmark = cursor.fetchone() is not None
+        
+        if is_benchmark:
+            return False, "Cannot delete the current benchmark assayer"
+        
+        try:
+            # Set the assayer as inactive instead of actually deleting
+            cursor.execute('UPDATE assayers SET is_active = 0 WHERE assayer_id = ?', (assayer_id,))
+            conn.commit()
+            success = True
+            message = "Assayer deactivated successfully"
+        except Exception as e:
+            conn.rollback()
+            success = False
+            message = str(e)
         
     return success, message
 
-def add_assay_result(assayer_id, sample_id, gold_content, test_date=None, notes="", gold_type="Unknown", bar_weight_grams=0):
+def add_assay_result(assayer_id, sample_id, gold_content, test_date=None, notes="", gold_type="Unknown", bar_weight_grams=0, conn=None):
     """Add a new assay result to the database"""
     if test_date is None:
         test_date = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     
-    conn = sqlite3.connect('gold_assay.db')
-    cursor = conn.cursor()
-    
-    try:
-        # Check if gold_type column exists, add it if it doesn't
-        if not _check_column_exists(cursor, "assay_results", "gold_type"):
-            cursor.execute("ALTER TABLE assay_results ADD COLUMN gold_type TEXT DEFAULT 'Unknown'")
-            conn.commit()
-            print("Added gold_type column to assay_results table")
-            
-        # Check if bar_weight_grams column exists, add it if it doesn't
-        if not _check_column_exists(cursor, "assay_results", "bar_weight_grams"):
-            cursor.execute("ALTER TABLE assay_results ADD COLUMN bar_weight_grams REAL DEFAULT 0")
-            conn.commit()
-            print("Added bar_weight_grams column to assay_results table")
+    with _connection(conn) as conn:
+        cursor = conn.cursor()
         
-        cursor.execute(
-            "INSERT OR REPLACE INTO assay_results (assayer_id, sample_id, gold_content, test_date, notes, gold_type, bar_weight_grams) VALUES (?, ?, ?, ?, ?, ?, ?)",
-            (assayer_id, sample_id, gold_content, test_date, notes, gold_type, bar_weight_grams)
-        )
-        conn.commit()
-        success = True
-    except Exception as e:
-        print(f"Error adding assay result: {e}")
-        success = False
+        try:
+            # The gold_type and bar_weight_grams columns are added by init_db
+            cursor.execute(
+                INSERT_ASSAY_RESULT_SQL,
+                (assayer_id, sample_id, gold_content, test_date, notes, gold_type, bar_weight_grams)
+            )
+            conn.commit()
+            success = True
+        except Exception as e:
+            print(f"Error adding assay result: {e}")
+            conn.rollback()
+            success = False
     
-    conn.close()
     return success
 
-def update_assay_result(result_id, gold_content, notes="", gold_type=None, bar_weight_grams=None):
-    """Update an existing assay result"""
-    conn = sqlite3.connect('gold_assay.db')
-    cursor = conn.cursor()
+def add_assay_results_bulk(rows, conn=None):
+    """
+    Add many assay results in a single transaction
     
-    try:
-        # Check if gold_type column exists, add it if it doesn't
-        if not _check_column_exists(cursor, "assay_results", "gold_type"):
-            cursor.execute("ALTER TABLE assay_results ADD COLUMN gold_type TEXT DEFAULT 'Unknown'")
+    Args:
+        rows: List of (assayer_id, sample_id, gold_content, test_date, notes,
+            gold_type, bar_weight_grams) tuples
+        conn: Optional open connection to reuse
+    
+    Returns:
+        List of (success, message) tuples, one per row in the same order
+    """
+    rows = list(rows)
+    with _connection(conn) as conn:
+        try:
+            conn.executemany(INSERT_ASSAY_RESULT_SQL, rows)
             conn.commit()
-            print("Added gold_type column to assay_results table")
-            
-        # Check if bar_weight_grams column exists, add it if it doesn't
-        if not _check_column_exists(cursor, "assay_results", "bar_weight_grams"):
-            cursor.execute("ALTER TABLE assay_results ADD COLUMN bar_weight_grams REAL DEFAULT 0")
+            return [(True, "Saved")] * len(rows)
+        except sqlite3.Error as e:
+            print(f"Error adding assay results: {str(e)}")
+            conn.rollback()
+        
+        # Some row was rejected: insert row by row, still in one transaction,
+        # so the good rows are kept and each failure is reported against its row
+        statuses = []
+        try:
+            for row in rows:
+                try:
+                    conn.execute(INSERT_ASSAY_RESULT_SQL, row)
+                    statuses.append((True, "Saved"))
+                except sqlite3.Error as e:
+                    statuses.append((False, str(e)))
             conn.commit()
-            print("Added bar_weight_grams column to assay_results table")
-        
-        # Build dynamic SQL based on provided parameters
-        update_parts = ["gold_content = ?", "notes = ?"]
-        params = [gold_content, notes]
-        
-        if gold_type is not None:
-            update_parts.append("gold_type = ?")
-            params.append(gold_type)
-            
-        if bar_weight_grams is not None:
-            update_parts.append("bar_weight_grams = ?")
-            params.append(bar_weight_grams)
-            
-        # Add the result_id to the params
-        params.append(result_id)
-        
-        # Construct and execute the query
-        query = f"""
-        UPDATE assay_results
-        SET {", ".join(update_parts)}
-        WHERE result_id = ?
-        """
+        except Exception as e:
+            print(f"Error adding assay results: {str(e)}")
+            conn.rollback()
+            statuses = [(False, str(e))] * len(rows)
+    
+    return statuses
+
+def update_assay_result(result_id, gold_content, notes="", gold_type=None, bar_weight_grams=None, conn=None):
+    """Update an existing assay result"""
+    with _connection(conn) as conn:
+        cursor = conn.cursor()
         
-        cursor.execute(query, params)
-        conn.commit()
-        success = True
-        message = "Assay result updated successfully"
-    except Exception as e:
-        conn.rollback()
-        success = False
-        message = str(e)
-    finally:
-        conn.close()
+        try:
+            # Fields passed as None keep their current value
+            cursor.execute(
+                UPDATE_ASSAY_RESULT_SQL,
+                (gold_content, notes, gold_type, bar_weight_grams, result_id)
+            )
+            conn.commit()
+            success = True
+            message = "Assay result updated successfully"
+        except Exception as e:
+            conn.rollback()
+            success = False
+            message = str(e)
         
     return success, message
 
-def delete_assay_result(result_id):
+def delete_assay_result(result_id, conn=None):
     """Delete an assay result"""
-    conn = sqlite3.connect('gold_assay.db')
-    cursor = conn.cursor()
-    
-    # Check if this result is from a benchmark assayer
-    cursor.execute('''
-    SELECT a.assayer_id FROM assay_results r
-    JOIN benchmark_assayers a ON r.assayer_id = a.assayer_id 
-    WHERE r.result_id = ? AND a.is_active = 1
-    ''', (result_id,))
-    
-    is_benchmark = cursor.fetchone() is not None
-    
-    if is_benchmark:
-        conn.close()
-        return False, "Cannot delete results from the benchmark assayer"
-    
-    try:
-        cursor.execute('DELETE FROM assay_results WHERE result_id = ?', (result_id,))
-        conn.commit()
-        success = True
-        message = "Assay result deleted successfully"
-    except Exception as e:
-        conn.rollback()
-        success = False
-        message = str(e)
-    finally:
-        conn.close()
+    with _connection(conn) as conn:
+        cursor = conn.cursor()
+        
+        # Check if this result is from a benchmark assayer
+        cursor.execute('''
+        SELECT a.assayer_id FROM assay_results r
+        JOIN benchmark_assayers a ON r.assayer_id = a.assayer_id 
+        WHERE r.result_id = ? AND a.is_active = 1
+        ''', (result_id,))
+        
+        is_benchmark = cursor.fetchone() is not None
+        
+        if is_benchmark:
+            return False, "Cannot delete results from the benchmark assayer"
+        
+        try:
+            cursor.execute('DELETE FROM assay_results WHERE result_id = ?', (result_id,))
+            conn.commit()
+            success = True
+            message = "Assay result deleted successfully"
+        except Exception as e:
+            conn.rollback()
+            success = False
+            message = str(e)
         
     return success, message
 
-def get_assay_result(result_id):
+def get_assay_result(result_id, conn=None):
     """Get details of a specific assay result"""
-    conn = sqlite3.connect('gold_assay.db')
     # Use parameterized query to prevent SQL injection
     query = """
         SELECT r.*, a.name as assayer_name
@@ -298,8 +329,8 @@ def get_assay_result(result_id):
         WHERE r.result_id = ?
     """
     # Pass parameters as a tuple
-    result_df = pd.read_sql(query, conn, params=(result_id,))
-    conn.close()
+    with _connection(conn) as conn:
+        result_df = pd.read_sql(query, conn, params=(result_id,))
     
     if result_df.empty:
         return None
@@ -356,55 +387,62 @@ def get_assay_results(days=30):
     conn.close()
     return results_df
 
-def search_assay_results(search_term=None, sample_id=None, assayer_id=None, date_from=None, date_to=None, limit=100):
+def search_assay_results(search_term=None, sample_id=None, assayer_id=None, date_from=None, date_to=None, limit=100, conn=None):
     """Search for assay results with various filters"""
-    conn = sqlite3.connect('gold_assay.db')
-    
     conditions = []
     params = []
-    
+
     # Build the WHERE clause based on provided parameters
     if search_term:
         conditions.append("(r.sample_id LIKE ? OR a.name LIKE ? OR r.notes LIKE ?)")
         search_pattern = f"%{search_term}%"
         params.extend([search_pattern, search_pattern, search_pattern])
-    
+
     if sample_id:
         conditions.append("r.sample_id = ?")
         params.append(sample_id)
-    
+
     if assayer_id:
         conditions.append("r.assayer_id = ?")
         params.append(assayer_id)
-    
+
     if date_from:
-        conditions.append("date(r.test_date) >= date(?)")
+        # Compare the raw column so the test_date indexes can serve the range
+        conditions.append("r.test_date >= date(?)")
         # If it's a datetime object, convert to string
         if hasattr(date_from, 'strftime'):
             date_from = date_from.strftime('%Y-%m-%d')
         params.append(date_from)
-    
+
     if date_to:
-        conditions.append("date(r.test_date) <= date(?)")
+        conditions.append("r.test_date < date(?, '+1 day')")
         # If it's a datetime object, convert to string
         if hasattr(date_to, 'strftime'):
             date_to = date_to.strftime('%Y-%m-%d')
         params.append(date_to)
-    
+
     # Combine conditions with AND
     where_clause = " AND ".join(conditions) if conditions else "1=1"
-    
+
+    # Dates come back already formatted for display; ORDER BY uses the raw column
     query = f"""
-        SELECT r.*, a.name as assayer_name
+        SELECT r.result_id, r.assayer_id, r.sample_id, r.gold_content,
+               strftime('%Y-%m-%d', r.test_date) as test_date,
+               r.notes, COALESCE(r.gold_type, 'Unknown') as gold_type, r.bar_weight_grams,
+               a.name as assayer_name
         FROM assay_results r
         JOIN assayers a ON r.assayer_id = a.assayer_id
         WHERE {where_clause}
         ORDER BY r.test_date DESC
-        LIMIT {limit}
+        LIMIT ?
     """
+    params.append(limit)
     
-    results_df = pd.read_sql(query, conn, params=params)
-    conn.close()
+    with _connection(conn) as conn:
+        results_df = pd.read_sql(query, conn, params=params)
+    
+    # Few distinct gold types, so store them as a categorical
+    results_df['gold_type'] = results_df['gold_type'].astype('category')
     return results_df
 
 def get_deviations_from_benchmark(days=365):
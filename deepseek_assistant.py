@@ -1,16 +1,81 @@
 import os
 import json
+import heapq
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+import numpy as np
 import pandas as pd
-import sys
-from deepseek_ai import DeepSeekAI
-from datetime import datetime, timedelta
+from numpy.lib.stride_tricks import sliding_window_view
 
-# Initialize DeepSeek client
 try:
-    deepseek_client = DeepSeekAI(api_key=os.environ.get("DEEPSEEK_API_KEY"))
-except Exception as e:
-    print(f"Error initializing DeepSeek client: {str(e)}")
-    deepseek_client = None
+    import orjson
+except ImportError:
+    orjson = None
+
+# Maximum number of week/assayer hot spots included in a heatmap summary
+MAX_HOT_SPOTS = 50
+
+# Static sections of the fallback analyses, shared by every render
+_KEY_OBSERVATIONS = "### Key Observations\n"
+_STAT_AXES = (
+    "**X-axis:** Represents percentage deviation from benchmark values (0% = perfect match with benchmark).\n"
+    "**Y-axis:** Shows individual assayer names ordered by their average deviation.\n\n"
+)
+_HEATMAP_AXES = (
+    "**Y-axis:** Shows individual assayer names.\n"
+    "**Color intensity:** Indicates magnitude of deviation from benchmark (darker = larger deviation).\n\n"
+)
+_TREND_AXES = "**Y-axis:** Shows percentage deviation from benchmark values (0% = perfect match).\n"
+_TREND_DIRECTIONS = (
+    "**Downward trends:** Indicate improving precision (moving closer to benchmark).\n"
+    "**Upward trends:** Indicate decreasing precision (moving away from benchmark).\n"
+    "**Flat/stable lines:** Indicate consistent precision levels.\n\n"
+)
+_DIST_LEGEND = (
+    "**X-axis:** Represents assayer names ordered alphabetically.\n"
+    "**Box plots:** Each box shows distribution of percentage deviations from benchmark.\n"
+    "**Box components:** Middle line = median, box edges = 25th and 75th percentiles, whiskers = min/max (excluding outliers), dots = outliers.\n\n"
+)
+
+# Fallback analyses returned when a summary has no assayers to describe
+_EMPTY_STATS_ANALYSIS = (
+    "## Data Interpretation for {time_period}\n\n"
+    "No assayer results are available for this period.\n\n"
+)
+_EMPTY_HEATMAP_ANALYSIS = (
+    "## Heatmap Interpretation for {time_period}\n\n"
+    "No weekly assayer results are available for this period.\n\n"
+)
+_EMPTY_TREND_ANALYSIS = (
+    "## Trend Chart Interpretation for {time_period}\n\n"
+    "No assayer has enough results in this period for a {ma_window}-day moving average.\n\n"
+)
+_EMPTY_DIST_ANALYSIS = (
+    "## Distribution Chart Interpretation for {time_period}\n\n"
+    "No assayer results are available for this period.\n\n"
+)
+_EMPTY_RECOMMENDATION_ANALYSIS = (
+    "## Performance Analysis for {time_period}\n\n"
+    "No assayer results are available for this period.\n\n"
+)
+
+# DeepSeek client, created on first use so importing this module stays cheap
+_client = None
+_client_initialized = False
+
+def _get_client():
+    """Return the shared DeepSeek client, or None if it could not be initialized"""
+    global _client, _client_initialized
+    if not _client_initialized:
+        try:
+            from deepseek_ai import DeepSeekAI
+            _client = DeepSeekAI(api_key=os.environ.get("DEEPSEEK_API_KEY"))
+        except Exception as e:
+            print(f"Error initializing DeepSeek client: {str(e)}")
+            _client = None
+        _client_initialized = True
+    return _client
 
 def analyze_with_deepseek(prompt, system_prompt="", max_tokens=800):
     """
@@ -29,13 +94,103 @@ def analyze_with_deepseek(prompt, system_prompt="", max_tokens=800):
     # like generate_statistical_analysis, generate_heatmap_analysis, etc.
     return None
 
-def analyze_deviation_data(deviations_df, time_period="Last 30 days"):
+def summary_to_json(summary):
+    """
+    Serialize an analysis summary for inclusion in a DeepSeek prompt
+    
+    Uses orjson when it is installed and falls back to the standard library otherwise.
+    
+    Args:
+        summary: Dictionary summary built by one of the analyzers
+        
+    Returns:
+        str: Indented JSON representation of the summary
+    """
+    if orjson is not None:
+        return orjson.dumps(summary, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(summary, indent=2)
+
+def grouped_rolling_mean(values, group_starts, window):
+    """
+    Compute a trailing moving average independently within contiguous groups
+    
+    Args:
+        values: 1-D float array, sorted so that each group's values are contiguous
+        group_starts: Start offset of each group followed by len(values)
+        window: Size of the moving average window
+        
+    Returns:
+        np.ndarray: Moving average aligned with values; NaN until a group has a full window
+    """
+    out = np.full(len(values), np.nan)
+    if window < 1 or len(values) < window:
+        return out
+    
+    # Mean of every window over the whole array; windows that span two groups are masked below
+    out[window - 1:] = sliding_window_view(values, window).mean(axis=1)
+    
+    # Position of each value within its own group
+    group_sizes = np.diff(group_starts)
+    offsets = np.arange(len(values)) - np.repeat(group_starts[:-1], group_sizes)
+    out[offsets < window - 1] = np.nan
+    return out
+
+def compute_assayer_context(deviations_df):
+    """
+    Pre-compute the statistics shared by the analyzers in a single pass
+    
+    The returned frames are shared between analyzers (possibly running in
+    different threads) and must be treated as read-only.
+    
+    Args:
+        deviations_df: DataFrame containing deviation data
+        
+    Returns:
+        dict: Shared statistics, passed to the analyzers as ctx
+    """
+    test_dates = pd.to_datetime(deviations_df['test_date'])
+    sorted_by_date = deviations_df.assign(test_date=test_dates).sort_values('test_date')
+    
+    # All per-assayer statistics from one groupby
+    grouped = deviations_df.groupby('assayer_name')['percentage_deviation']
+    stats_frame = pd.concat([
+        grouped.agg(['mean', 'median', 'std', 'min', 'max']),
+        grouped.quantile(0.25).rename('q25'),
+        grouped.quantile(0.75).rename('q75'),
+        grouped.count().rename('count')
+    ], axis=1).add_prefix('percentage_deviation_').reset_index()
+    
+    # Weekly average deviations by assayer (for the heatmap)
+    weekly_avg = deviations_df.groupby(
+        [test_dates.dt.strftime('%Y-%U').rename('week'), 'assayer_name']
+    )['percentage_deviation'].mean().reset_index()
+    
+    # Daily average deviations, ordered by assayer then day (for the trend chart)
+    daily_avg = sorted_by_date.groupby(
+        ['assayer_name', sorted_by_date['test_date'].dt.normalize()]
+    )['percentage_deviation'].mean()
+    daily_names = daily_avg.index.get_level_values(0).to_numpy()
+    daily_group_starts = np.flatnonzero(np.r_[True, daily_names[1:] != daily_names[:-1], True])
+    
+    return {
+        "stats_frame": stats_frame,
+        "abs_pct": np.abs(deviations_df['percentage_deviation'].to_numpy(dtype=np.float64)),
+        "sorted_by_date": sorted_by_date,
+        "weekly_avg": weekly_avg,
+        "daily_avg": daily_avg,
+        "daily_group_starts": daily_group_starts,
+        "count_median": np.median(stats_frame['percentage_deviation_count'].to_numpy()),
+        "std_median": np.nanmedian(stats_frame['percentage_deviation_std'].to_numpy())
+    }
+
+def analyze_deviation_data(deviations_df, time_period="Last 30 days", ctx=None):
     """
     Analyze deviations data and provide AI-generated insights
     
     Args:
         deviations_df: DataFrame containing deviation data
         time_period: Time period for context in the analysis
+        ctx: Optional result of compute_assayer_context for the same data
         
     Returns:
         str: AI-generated analysis of the data
@@ -44,37 +199,31 @@ def analyze_deviation_data(deviations_df, time_period="Last 30 days"):
         return "No data available for analysis during this period."
     
     try:
-        # Prepare a summary of the data for the AI
-        assayer_stats = deviations_df.groupby('assayer_name').agg({
-            'absolute_deviation': ['mean', 'std', 'count', 'min', 'max'],
-            'percentage_deviation': ['mean', 'std', 'min', 'max']
-        }).reset_index()
+        if ctx is None:
+            ctx = compute_assayer_context(deviations_df)
         
-        # Flatten the multi-level columns
-        assayer_stats.columns = ['_'.join(col).strip('_') for col in assayer_stats.columns.values]
+        # Prepare a summary of the data for the AI
+        assayer_stats = ctx["stats_frame"]
         
         # Calculate overall statistics
         total_samples = len(deviations_df)
-        num_assayers = deviations_df['assayer_name'].nunique()
+        num_assayers = len(assayer_stats)
         avg_deviation = deviations_df['percentage_deviation'].mean()
-        max_deviation = deviations_df['percentage_deviation'].abs().max()
+        max_deviation = np.nanmax(ctx["abs_pct"])
         
         # Get top performing and underperforming assayers
         top_assayer = assayer_stats.loc[assayer_stats['percentage_deviation_mean'].abs().idxmin()]
         bottom_assayer = assayer_stats.loc[assayer_stats['percentage_deviation_mean'].abs().idxmax()]
         
         # Identify any assayers with high standard deviation (inconsistent)
-        consistency_threshold = assayer_stats['percentage_deviation_std'].median() * 1.5
+        consistency_threshold = ctx["std_median"] * 1.5
         inconsistent_assayers = assayer_stats[assayer_stats['percentage_deviation_std'] > consistency_threshold]
         
-        # Check for any trends over time
-        deviations_df['test_date'] = pd.to_datetime(deviations_df['test_date'])
-        deviations_df = deviations_df.sort_values('test_date')
-        
         # Detect if there's any trend in the recent days
+        sorted_by_date = ctx["sorted_by_date"]
         recent_trend = "neutral"
-        if len(deviations_df) > 10:
-            recent_data = deviations_df.tail(10)
+        if len(sorted_by_date) > 10:
+            recent_data = sorted_by_date.tail(10)
             early_avg = recent_data.iloc[:5]['percentage_deviation'].mean()
             late_avg = recent_data.iloc[5:]['percentage_deviation'].mean()
             if late_avg > early_avg * 1.1:
@@ -92,39 +241,50 @@ def analyze_deviation_data(deviations_df, time_period="Last 30 days"):
             "top_performer": {
                 "name": top_assayer['assayer_name'],
                 "avg_deviation": float(round(top_assayer['percentage_deviation_mean'], 2)),
-                "samples_tested": int(top_assayer['absolute_deviation_count']),
+                "samples_tested": int(top_assayer['percentage_deviation_count']),
                 "consistency": float(round(top_assayer['percentage_deviation_std'], 2))
             },
             "bottom_performer": {
                 "name": bottom_assayer['assayer_name'],
                 "avg_deviation": float(round(bottom_assayer['percentage_deviation_mean'], 2)),
-                "samples_tested": int(bottom_assayer['absolute_deviation_count']),
+                "samples_tested": int(bottom_assayer['percentage_deviation_count']),
                 "consistency": float(round(bottom_assayer['percentage_deviation_std'], 2))
             },
             "inconsistent_assayers": [
                 {
-                    "name": row['assayer_name'],
-                    "std_deviation": float(round(row['percentage_deviation_std'], 2)),
-                    "samples_tested": int(row['absolute_deviation_count'])
-                } 
-                for _, row in inconsistent_assayers.iterrows()
+                    "name": name,
+                    "std_deviation": float(std),
+                    "samples_tested": int(count)
+                }
+                for name, std, count in zip(
+                    inconsistent_assayers['assayer_name'].to_numpy(),
+                    np.round(inconsistent_assayers['percentage_deviation_std'].to_numpy(), 2),
+                    inconsistent_assayers['percentage_deviation_count'].to_numpy()
+                )
             ],
             "recent_trend": recent_trend,
             "assayer_details": [
                 {
-                    "name": row['assayer_name'],
-                    "avg_deviation": float(round(row['percentage_deviation_mean'], 2)),
-                    "std_deviation": float(round(row['percentage_deviation_std'], 2)),
-                    "samples_tested": int(row['absolute_deviation_count']),
-                    "min_deviation": float(round(row['percentage_deviation_min'], 2)),
-                    "max_deviation": float(round(row['percentage_deviation_max'], 2))
+                    "name": name,
+                    "avg_deviation": float(mean),
+                    "std_deviation": float(std),
+                    "samples_tested": int(count),
+                    "min_deviation": float(min_dev),
+                    "max_deviation": float(max_dev)
                 }
-                for _, row in assayer_stats.iterrows()
+                for name, mean, std, count, min_dev, max_dev in zip(
+                    assayer_stats['assayer_name'].to_numpy(),
+                    np.round(assayer_stats['percentage_deviation_mean'].to_numpy(), 2),
+                    np.round(assayer_stats['percentage_deviation_std'].to_numpy(), 2),
+                    assayer_stats['percentage_deviation_count'].to_numpy(),
+                    np.round(assayer_stats['percentage_deviation_min'].to_numpy(), 2),
+                    np.round(assayer_stats['percentage_deviation_max'].to_numpy(), 2)
+                )
             ]
         }
         
         # Check if DeepSeek client is available
-        if deepseek_client is None:
+        if _get_client() is None:
             # Provide a fallback statistical analysis without using the API
             return generate_statistical_analysis(data_summary)
         
@@ -146,7 +306,7 @@ def analyze_deviation_data(deviations_df, time_period="Last 30 days"):
         
         # Prepare the user prompt for DeepSeek
         user_prompt = f"""Here is the gold assay deviation data for {time_period}:
-        {json.dumps(data_summary, indent=2)}
+        {summary_to_json(data_summary)}
         
         Provide a comprehensive analysis of this data.
         """
@@ -167,13 +327,14 @@ def analyze_deviation_data(deviations_df, time_period="Last 30 days"):
         else:
             return f"An error occurred while analyzing the data: {str(e)}"
             
-def analyze_heatmap(deviations_df, time_period="Last 30 days"):
+def analyze_heatmap(deviations_df, time_period="Last 30 days", ctx=None):
     """
     Analyze the deviation heatmap and provide insights
     
     Args:
         deviations_df: DataFrame containing deviation data
         time_period: Time period for context in the analysis
+        ctx: Optional result of compute_assayer_context for the same data
         
     Returns:
         str: AI-generated analysis of the heatmap
@@ -182,23 +343,27 @@ def analyze_heatmap(deviations_df, time_period="Last 30 days"):
         return "No data available for heatmap analysis during this period."
     
     try:
-        # Extract information from the dataframe for heatmap analysis
-        # For heatmap we need to look at deviation patterns by assayer and over time
-        
-        # Convert test_date to datetime if it's not already
-        deviations_df['test_date'] = pd.to_datetime(deviations_df['test_date'])
-        
-        # Create date groups (by week)
-        deviations_df['week'] = deviations_df['test_date'].dt.strftime('%Y-%U')
+        if ctx is None:
+            ctx = compute_assayer_context(deviations_df)
         
+        # For heatmap we need to look at deviation patterns by assayer and over time
         # Get weekly average deviations by assayer
-        weekly_avg = deviations_df.groupby(['week', 'assayer_name'])['percentage_deviation'].mean().reset_index()
+        weekly_avg = ctx["weekly_avg"]
         
         # Identify hot spots (high deviation areas)
-        hot_spots = weekly_avg[weekly_avg['percentage_deviation'].abs() > 5]
+        weekly_abs_deviation = np.abs(weekly_avg['percentage_deviation'].to_numpy())
+        hot_spot_mask = weekly_abs_deviation > 5
+        hot_spots = weekly_avg.loc[hot_spot_mask]
+        
+        # Keep only the largest hot spots so the summary stays bounded, in their original week order
+        if len(hot_spots) > MAX_HOT_SPOTS:
+            largest = pd.Series(weekly_abs_deviation[hot_spot_mask], index=hot_spots.index).nlargest(MAX_HOT_SPOTS)
+            hot_spots = hot_spots.loc[largest.index.sort_values()]
         
         # Find consistent patterns
-        assayer_consistency = deviations_df.groupby('assayer_name')['percentage_deviation'].std().reset_index()
+        assayer_consistency = ctx["stats_frame"][['assayer_name', 'percentage_deviation_std']].rename(
+            columns={'percentage_deviation_std': 'percentage_deviation'}
+        )
         consistent_assayers = assayer_consistency.sort_values('percentage_deviation').head(3)
         inconsistent_assayers = assayer_consistency.sort_values('percentage_deviation', ascending=False).head(3)
         
@@ -209,34 +374,51 @@ def analyze_heatmap(deviations_df, time_period="Last 30 days"):
             "total_assayers": weekly_avg['assayer_name'].nunique(),
             "hot_spots": [
                 {
-                    "week": row['week'],
-                    "assayer": row['assayer_name'],
-                    "deviation": float(round(row['percentage_deviation'], 2))
+                    "week": week,
+                    "assayer": name,
+                    "deviation": float(deviation)
                 }
-                for _, row in hot_spots.iterrows()
+                for week, name, deviation in zip(
+                    hot_spots['week'].to_numpy(),
+                    hot_spots['assayer_name'].to_numpy(),
+                    np.round(hot_spots['percentage_deviation'].to_numpy(), 2)
+                )
             ],
             "most_consistent_assayers": [
                 {
-                    "name": row['assayer_name'],
-                    "std_deviation": float(round(row['percentage_deviation'], 2))
+                    "name": name,
+                    "std_deviation": float(std)
                 }
-                for _, row in consistent_assayers.iterrows()
+                for name, std in zip(
+                    consistent_assayers['assayer_name'].to_numpy(),
+                    np.round(consistent_assayers['percentage_deviation'].to_numpy(), 2)
+                )
             ],
             "most_inconsistent_assayers": [
                 {
-                    "name": row['assayer_name'],
-                    "std_deviation": float(round(row['percentage_deviation'], 2))
+                    "name": name,
+                    "std_deviation": float(std)
                 }
-                for _, row in inconsistent_assayers.iterrows()
-            ],
-            "weekly_patterns": weekly_avg.to_dict(orient='records')
+                for name, std in zip(
+                    inconsistent_assayers['assayer_name'].to_numpy(),
+                    np.round(inconsistent_assayers['percentage_deviation'].to_numpy(), 2)
+                )
+            ]
         }
         
         # Check if DeepSeek client is available
-        if deepseek_client is None:
+        if _get_client() is None:
             # Provide a fallback heatmap analysis without using the API
             return generate_heatmap_analysis(heatmap_summary)
         
+        # Compact week x assayer matrix of the weekly averages, only needed for the prompt
+        weekly_matrix = weekly_avg.pivot(index='week', columns='assayer_name', values='percentage_deviation').round(2)
+        heatmap_summary["weekly_patterns"] = {
+            "weeks": weekly_matrix.index.tolist(),
+            "assayers": weekly_matrix.columns.tolist(),
+            "deviations": weekly_matrix.to_numpy().tolist()
+        }
+        
         # Prepare the system prompt for DeepSeek
         system_prompt = """You are an expert gold assay analyst interpreting a heatmap of assayer deviations.
         The heatmap shows deviations over time (by week) for different assayers.
@@ -254,7 +436,7 @@ def analyze_heatmap(deviations_df, time_period="Last 30 days"):
         
         # Prepare the user prompt for DeepSeek
         user_prompt = f"""Here is data extracted from a heatmap visualization of gold assay deviations for {time_period}:
-        {json.dumps(heatmap_summary, indent=2)}
+        {summary_to_json(heatmap_summary)}
         
         Provide an interpretation of what patterns would be visible in this heatmap visualization.
         """
@@ -275,7 +457,7 @@ def analyze_heatmap(deviations_df, time_period="Last 30 days"):
         else:
             return f"An error occurred while analyzing the heatmap: {str(e)}"
 
-def analyze_trend_chart(deviations_df, ma_window=7, time_period="Last 90 days"):
+def analyze_trend_chart(deviations_df, ma_window=7, time_period="Last 90 days", ctx=None):
     """
     Analyze the moving average trend chart and provide insights
     
@@ -283,6 +465,7 @@ def analyze_trend_chart(deviations_df, ma_window=7, time_period="Last 90 days"):
         deviations_df: DataFrame containing deviation data
         ma_window: Size of the moving average window
         time_period: Time period for context in the analysis
+        ctx: Optional result of compute_assayer_context for the same data
         
     Returns:
         str: AI-generated analysis of the trend chart
@@ -291,34 +474,48 @@ def analyze_trend_chart(deviations_df, ma_window=7, time_period="Last 90 days"):
         return "No data available for trend analysis during this period."
     
     try:
-        # Convert test_date to datetime if it's not already
-        deviations_df['test_date'] = pd.to_datetime(deviations_df['test_date'])
-        deviations_df = deviations_df.sort_values('test_date')
-        
-        # Calculate moving averages by assayer
+        if ctx is None:
+            ctx = compute_assayer_context(deviations_df)
+        
+        # Daily average deviation per assayer, ordered by assayer then day
+        daily_avg = ctx["daily_avg"]
+        daily_names = daily_avg.index.get_level_values(0).to_numpy()
+        daily_dates = daily_avg.index.get_level_values(1)
+        group_starts = ctx["daily_group_starts"]
+        
+        # Moving averages for all assayers in one pass
+        ma_values = grouped_rolling_mean(daily_avg.to_numpy(dtype=np.float64), group_starts, ma_window)
+        
+        # Collect the last 10 moving-average points of each assayer with enough data
+        group_bounds = {
+            daily_names[start]: (start, end)
+            for start, end in zip(group_starts[:-1], group_starts[1:])
+        }
         trend_data = []
-        
-        for assayer in deviations_df['assayer_name'].unique():
-            assayer_df = deviations_df[deviations_df['assayer_name'] == assayer]
-            if len(assayer_df) >= ma_window:
-                # Get daily average first
-                daily_avg = assayer_df.groupby(assayer_df['test_date'].dt.date)['percentage_deviation'].mean()
-                # Calculate moving average if enough data points
-                if len(daily_avg) >= ma_window:
-                    ma_series = daily_avg.rolling(window=ma_window).mean()
-                    # Convert to records
-                    for date, value in zip(daily_avg.index[-10:], ma_series.iloc[-10:]):
-                        if pd.notna(value):
-                            trend_data.append({
-                                "assayer": assayer,
-                                "date": date.strftime('%Y-%m-%d'),
-                                "ma_value": float(round(value, 2))
-                            })
+        points_by_assayer = {}
+        
+        for assayer in ctx["sorted_by_date"]['assayer_name'].unique():
+            bounds = group_bounds.get(assayer)
+            if bounds is None:
+                continue
+            start, end = bounds
+            if end - start < ma_window:
+                continue
+            assayer_points = []
+            for i in range(max(start, end - 10), end):
+                value = ma_values[i]
+                if not np.isnan(value):
+                    assayer_points.append({
+                        "assayer": assayer,
+                        "date": daily_dates[i].strftime('%Y-%m-%d'),
+                        "ma_value": float(round(value, 2))
+                    })
+            trend_data.extend(assayer_points)
+            points_by_assayer[assayer] = assayer_points
         
         # Calculate overall trend direction for each assayer
         assayer_trends = {}
-        for assayer in deviations_df['assayer_name'].unique():
-            assayer_points = [p for p in trend_data if p['assayer'] == assayer]
+        for assayer, assayer_points in points_by_assayer.items():
             if len(assayer_points) >= 3:
                 first_values = [p['ma_value'] for p in assayer_points[:min(3, len(assayer_points))]]
                 last_values = [p['ma_value'] for p in assayer_points[-min(3, len(assayer_points)):]]
@@ -357,15 +554,17 @@ def analyze_trend_chart(deviations_df, ma_window=7, time_period="Last 90 days"):
                     "change_percentage": data["change_percentage"]
                 }
                 for assayer, data in assayer_trends.items()
-            ],
-            "recent_data_points": trend_data[-30:] if len(trend_data) > 30 else trend_data
+            ]
         }
         
         # Check if DeepSeek client is available
-        if deepseek_client is None:
+        if _get_client() is None:
             # Provide a fallback trend analysis without using the API
             return generate_trend_analysis(trend_summary)
         
+        # Raw moving-average points are only needed for the prompt
+        trend_summary["recent_data_points"] = trend_data[-30:]
+        
         # Prepare the system prompt for DeepSeek
         system_prompt = f"""You are an expert gold assay analyst interpreting a {ma_window}-day moving average trend chart.
         The chart shows how assayer deviations have changed over time.
@@ -383,7 +582,7 @@ def analyze_trend_chart(deviations_df, ma_window=7, time_period="Last 90 days"):
         
         # Prepare the user prompt for DeepSeek
         user_prompt = f"""Here is data extracted from a {ma_window}-day moving average trend chart of gold assay deviations for {time_period}:
-        {json.dumps(trend_summary, indent=2)}
+        {summary_to_json(trend_summary)}
         
         Provide an interpretation of what patterns would be visible in this trend chart visualization.
         """
@@ -404,13 +603,14 @@ def analyze_trend_chart(deviations_df, ma_window=7, time_period="Last 90 days"):
         else:
             return f"An error occurred while analyzing the trend chart: {str(e)}"
 
-def analyze_distribution_chart(deviations_df, time_period="Last 90 days"):
+def analyze_distribution_chart(deviations_df, time_period="Last 90 days", ctx=None):
     """
     Analyze the deviation distribution chart and provide insights
     
     Args:
         deviations_df: DataFrame containing deviation data
         time_period: Time period for context in the analysis
+        ctx: Optional result of compute_assayer_context for the same data
         
     Returns:
         str: AI-generated analysis of the distribution chart
@@ -419,32 +619,41 @@ def analyze_distribution_chart(deviations_df, time_period="Last 90 days"):
         return "No data available for distribution analysis during this period."
     
     try:
-        # Calculate distribution statistics by assayer
-        distribution_stats = deviations_df.groupby('assayer_name')['percentage_deviation'].agg([
-            'mean', 'median', 'std', 'min', 'max', 
-            lambda x: x.quantile(0.25), 
-            lambda x: x.quantile(0.75),
-            'count'
-        ]).reset_index()
-        
-        # Rename the columns
-        distribution_stats.columns = ['assayer_name', 'mean', 'median', 'std', 'min', 'max', 'q25', 'q75', 'count']
+        if ctx is None:
+            ctx = compute_assayer_context(deviations_df)
         
-        # Calculate interquartile range (IQR)
-        distribution_stats['iqr'] = distribution_stats['q75'] - distribution_stats['q25']
+        # Distribution statistics by assayer
+        distribution_stats = ctx["stats_frame"].rename(
+            columns=lambda col: col.replace('percentage_deviation_', '')
+        )
         
-        # Calculate skewness indicator (mean - median)
-        distribution_stats['skew_indicator'] = distribution_stats['mean'] - distribution_stats['median']
+        # Calculate interquartile range (IQR) and skewness indicator (mean - median)
+        distribution_stats = distribution_stats.assign(
+            iqr=distribution_stats['q75'] - distribution_stats['q25'],
+            skew_indicator=distribution_stats['mean'] - distribution_stats['median']
+        )
         
         # Determine distribution shape for each assayer
         distribution_shapes = []
         
-        for _, row in distribution_stats.iterrows():
+        for name, mean, median, std, min_dev, max_dev, q25, q75, iqr, skew_indicator, count in zip(
+            distribution_stats['assayer_name'].to_numpy(),
+            distribution_stats['mean'].to_numpy(),
+            distribution_stats['median'].to_numpy(),
+            distribution_stats['std'].to_numpy(),
+            distribution_stats['min'].to_numpy(),
+            distribution_stats['max'].to_numpy(),
+            distribution_stats['q25'].to_numpy(),
+            distribution_stats['q75'].to_numpy(),
+            distribution_stats['iqr'].to_numpy(),
+            distribution_stats['skew_indicator'].to_numpy(),
+            distribution_stats['count'].to_numpy()
+        ):
             # Calculate coefficient of variation to gauge spread
-            cv = abs(row['std'] / row['mean']) if row['mean'] != 0 else float('inf')
+            cv = abs(std / mean) if mean != 0 else float('inf')
             
             # Skewness check
-            skew_ratio = row['skew_indicator'] / row['std'] if row['std'] != 0 else 0
+            skew_ratio = skew_indicator / std if std != 0 else 0
             
             if abs(skew_ratio) < 0.2:
                 skew_type = "approximately symmetric"
@@ -462,28 +671,34 @@ def analyze_distribution_chart(deviations_df, time_period="Last 90 days"):
                 spread = "wide"
             
             distribution_shapes.append({
-                "assayer": row['assayer_name'],
+                "assayer": name,
                 "shape": skew_type,
                 "spread": spread,
-                "mean": float(round(row['mean'], 2)),
-                "median": float(round(row['median'], 2)),
-                "std": float(round(row['std'], 2)),
-                "iqr": float(round(row['iqr'], 2)),
-                "sample_count": int(row['count'])
+                "mean": float(round(mean, 2)),
+                "median": float(round(median, 2)),
+                "std": float(round(std, 2)),
+                "min": float(round(min_dev, 2)),
+                "max": float(round(max_dev, 2)),
+                "q25": float(round(q25, 2)),
+                "q75": float(round(q75, 2)),
+                "iqr": float(round(iqr, 2)),
+                "sample_count": int(count)
             })
         
         # Prepare data summary for DeepSeek
         distribution_summary = {
             "time_period": time_period,
-            "assayer_distributions": distribution_shapes,
-            "detailed_stats": distribution_stats.drop(['q25', 'q75'], axis=1).to_dict(orient='records')
+            "assayer_distributions": distribution_shapes
         }
         
         # Check if DeepSeek client is available
-        if deepseek_client is None:
+        if _get_client() is None:
             # Provide a fallback distribution analysis without using the API
             return generate_distribution_analysis(distribution_summary)
         
+        # Per-assayer statistics table is only needed for the prompt
+        distribution_summary["detailed_stats"] = distribution_stats.drop(['q25', 'q75'], axis=1).to_dict(orient='records')
+        
         # Prepare the system prompt for DeepSeek
         system_prompt = """You are an expert gold assay analyst interpreting a distribution chart of assayer deviations.
         The chart shows the statistical distribution of deviations for each assayer.
@@ -501,7 +716,7 @@ def analyze_distribution_chart(deviations_df, time_period="Last 90 days"):
         
         # Prepare the user prompt for DeepSeek
         user_prompt = f"""Here is data extracted from a distribution chart of gold assay deviations for {time_period}:
-        {json.dumps(distribution_summary, indent=2)}
+        {summary_to_json(distribution_summary)}
         
         Provide an interpretation of what patterns would be visible in this distribution chart visualization.
         """
@@ -522,13 +737,14 @@ def analyze_distribution_chart(deviations_df, time_period="Last 90 days"):
         else:
             return f"An error occurred while analyzing the distribution chart: {str(e)}"
 
-def generate_performance_recommendations(deviations_df, time_period="Last 90 days"):
+def generate_performance_recommendations(deviations_df, time_period="Last 90 days", ctx=None):
     """
     Generate specific recommendations for improving assayer performance
     
     Args:
         deviations_df: DataFrame containing deviation data
         time_period: Time period for context in the analysis
+        ctx: Optional result of compute_assayer_context for the same data
         
     Returns:
         str: AI-generated recommendations
@@ -537,14 +753,11 @@ def generate_performance_recommendations(deviations_df, time_period="Last 90 day
         return "No data available to generate recommendations."
     
     try:
-        # Calculate key performance metrics by assayer
-        assayer_metrics = deviations_df.groupby('assayer_name').agg({
-            'percentage_deviation': ['mean', 'std', 'count', 'min', 'max'],
-            'gold_content': ['mean', 'count']
-        }).reset_index()
+        if ctx is None:
+            ctx = compute_assayer_context(deviations_df)
         
-        # Flatten the multi-level columns
-        assayer_metrics.columns = ['_'.join(col).strip('_') for col in assayer_metrics.columns.values]
+        # Key performance metrics by assayer
+        assayer_metrics = ctx["stats_frame"]
         
         # Identify performance categories
         high_bias_threshold = 2.0  # Assayers with avg deviation > 2%
@@ -555,30 +768,39 @@ def generate_performance_recommendations(deviations_df, time_period="Last 90 day
         low_experience_assayers = []
         well_performing_assayers = []
         
-        for _, row in assayer_metrics.iterrows():
+        # Sample-count thresholds are the same for every assayer
+        count_median = ctx["count_median"]
+        low_experience_threshold = count_median / 2
+        
+        for name, mean, std, count in zip(
+            assayer_metrics['assayer_name'].to_numpy(),
+            assayer_metrics['percentage_deviation_mean'].to_numpy(),
+            assayer_metrics['percentage_deviation_std'].to_numpy(),
+            assayer_metrics['percentage_deviation_count'].to_numpy()
+        ):
             assayer_info = {
-                "name": row['assayer_name'],
-                "avg_deviation": float(round(row['percentage_deviation_mean'], 2)),
-                "std_deviation": float(round(row['percentage_deviation_std'], 2)),
-                "sample_count": int(row['percentage_deviation_count'])
+                "name": name,
+                "avg_deviation": float(round(mean, 2)),
+                "std_deviation": float(round(std, 2)),
+                "sample_count": int(count)
             }
             
             # Check for high bias (consistently off from benchmark)
-            if abs(row['percentage_deviation_mean']) > high_bias_threshold:
+            if abs(mean) > high_bias_threshold:
                 high_bias_assayers.append(assayer_info)
             
             # Check for high variance (inconsistent results)
-            if row['percentage_deviation_std'] > high_variance_threshold:
+            if std > high_variance_threshold:
                 high_variance_assayers.append(assayer_info)
             
             # Check for low experience (few samples tested)
-            if row['percentage_deviation_count'] < assayer_metrics['percentage_deviation_count'].median() / 2:
+            if count < low_experience_threshold:
                 low_experience_assayers.append(assayer_info)
             
             # Identify well-performing assayers (low bias, low variance)
-            if (abs(row['percentage_deviation_mean']) < high_bias_threshold / 2 and 
-                row['percentage_deviation_std'] < high_variance_threshold / 2 and
-                row['percentage_deviation_count'] >= assayer_metrics['percentage_deviation_count'].median()):
+            if (abs(mean) < high_bias_threshold / 2 and 
+                std < high_variance_threshold / 2 and
+                count >= count_median):
                 well_performing_assayers.append(assayer_info)
         
         # Prepare data summary for DeepSeek
@@ -596,7 +818,7 @@ def generate_performance_recommendations(deviations_df, time_period="Last 90 day
         }
         
         # Check if DeepSeek client is available
-        if deepseek_client is None:
+        if _get_client() is None:
             # Provide a fallback recommendations without using the API
             return generate_recommendation_fallback(performance_summary)
         
@@ -617,7 +839,7 @@ def generate_performance_recommendations(deviations_df, time_period="Last 90 day
         
         # Prepare the user prompt for DeepSeek
         user_prompt = f"""Here is performance data for gold assayers over {time_period}:
-        {json.dumps(performance_summary, indent=2)}
+        {summary_to_json(performance_summary)}
         
         Provide specific, actionable recommendations for improving laboratory performance.
         """
@@ -638,12 +860,53 @@ def generate_performance_recommendations(deviations_df, time_period="Last 90 day
         else:
             return f"An error occurred while generating recommendations: {str(e)}"
 
+def run_all(deviations_df, time_period="Last 90 days", ma_window=7):
+    """
+    Run every analysis on the same data concurrently
+    
+    The analyzers only read from the DataFrame and spend most of their time in
+    pandas/NumPy routines that release the GIL, so a thread pool overlaps them.
+    
+    Args:
+        deviations_df: DataFrame containing deviation data
+        time_period: Time period for context in the analysis
+        ma_window: Size of the moving average window for the trend analysis
+        
+    Returns:
+        dict: Analysis text keyed by "deviation", "heatmap", "trend", "distribution" and "recommendations"
+    """
+    # Shared statistics are computed once and handed to every analyzer
+    ctx = None
+    if deviations_df is not None and not deviations_df.empty:
+        try:
+            ctx = compute_assayer_context(deviations_df)
+        except Exception as e:
+            # Each analyzer reports its own error when it recomputes the context
+            print(f"Error computing shared analysis context: {str(e)}")
+    
+    analyses = {
+        "deviation": (analyze_deviation_data, {}),
+        "heatmap": (analyze_heatmap, {}),
+        "trend": (analyze_trend_chart, {"ma_window": ma_window}),
+        "distribution": (analyze_distribution_chart, {}),
+        "recommendations": (generate_performance_recommendations, {}),
+    }
+    
+    with ThreadPoolExecutor(max_workers=len(analyses)) as pool:
+        futures = {
+            name: pool.submit(func, deviations_df, time_period=time_period, ctx=ctx, **kwargs)
+            for name, (func, kwargs) in analyses.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
+
 # Fallback functions for when AI is unavailable
 def generate_statistical_analysis(data):
     """Generate a basic statistical analysis focused on data interpretation, no recommendations"""
     try:
         # Extract key data points
         time_period = data["time_period"]
+        if not data.get("assayer_details"):
+            return _EMPTY_STATS_ANALYSIS.format(time_period=time_period)
         total_samples = data["total_samples"]
         num_assayers = data["num_assayers"]
         avg_deviation = data["avg_deviation_percentage"]
@@ -654,54 +917,51 @@ def generate_statistical_analysis(data):
         recent_trend = data["recent_trend"]
         assayer_details = data["assayer_details"]
         
-        # Sort assayers by deviation magnitude (absolute value)
-        sorted_assayers = sorted(assayer_details, key=lambda x: abs(x["avg_deviation"]))
+        # Sort assayers once by deviation magnitude, computing each absolute value a single time
+        decorated = [(abs(a["avg_deviation"]), a) for a in assayer_details]
+        decorated.sort(key=itemgetter(0))
         
         # Build a readable analysis
-        analysis = f"## Data Interpretation for {time_period}\n\n"
+        parts = []
+        parts.append(f"## Data Interpretation for {time_period}\n\n")
         
         # Chart explanation
-        analysis += f"This chart displays percentage deviations from benchmark for {num_assayers} assayers across {total_samples} samples.\n\n"
+        parts.append(f"This chart displays percentage deviations from benchmark for {num_assayers} assayers across {total_samples} samples.\n\n")
         
         # Axis explanation
-        analysis += f"**X-axis:** Represents percentage deviation from benchmark values (0% = perfect match with benchmark).\n"
-        analysis += f"**Y-axis:** Shows individual assayer names ordered by their average deviation.\n\n"
+        parts.append(_STAT_AXES)
         
         # Data interpretation
-        analysis += f"### Key Observations\n"
+        parts.append(_KEY_OBSERVATIONS)
         
         # Highlight precise assayers (closest to zero)
-        low_deviation_assayers = [a for a in sorted_assayers[:3]]
+        low_deviation_assayers = [a for _, a in decorated[:3]]
         if low_deviation_assayers:
-            low_dev_names = ", ".join([a["name"] for a in low_deviation_assayers])
-            avg_devs = ", ".join([f"{a['avg_deviation']}%" for a in low_deviation_assayers])
-            analysis += f"**Closest to benchmark:** {low_dev_names} with deviations of {avg_devs} respectively.\n\n"
+            low_dev_names = ", ".join(a["name"] for a in low_deviation_assayers)
+            avg_devs = ", ".join(f"{a['avg_deviation']}%" for a in low_deviation_assayers)
+            parts.append(f"**Closest to benchmark:** {low_dev_names} with deviations of {avg_devs} respectively.\n\n")
         
         # Highlight assayers with most significant deviations
-        high_deviation_assayers = sorted(assayer_details, key=lambda x: abs(x["avg_deviation"]), reverse=True)[:3]
+        # nlargest keeps the first of tied assayers, as a reverse stable sort would
+        high_deviation_assayers = [a for _, a in heapq.nlargest(3, decorated, key=itemgetter(0))]
         if high_deviation_assayers:
-            high_names = []
-            high_devs = []
-            for a in high_deviation_assayers:
-                high_names.append(a["name"])
-                if a["avg_deviation"] > 0:
-                    high_devs.append(f"+{a['avg_deviation']}% (higher than benchmark)")
-                else:
-                    high_devs.append(f"{a['avg_deviation']}% (lower than benchmark)")
-                    
-            high_dev_names = ", ".join(high_names)
-            high_dev_values = ", ".join(high_devs)
-            analysis += f"**Largest deviations:** {high_dev_names} with deviations of {high_dev_values} respectively.\n\n"
+            high_dev_names = ", ".join(a["name"] for a in high_deviation_assayers)
+            high_dev_values = ", ".join(
+                f"+{a['avg_deviation']}% (higher than benchmark)" if a["avg_deviation"] > 0
+                else f"{a['avg_deviation']}% (lower than benchmark)"
+                for a in high_deviation_assayers
+            )
+            parts.append(f"**Largest deviations:** {high_dev_names} with deviations of {high_dev_values} respectively.\n\n")
         
         # Trend information
         if recent_trend == "improving":
-            analysis += f"**Trend analysis:** Recent data shows narrowing deviations across most assayers.\n\n"
+            parts.append(f"**Trend analysis:** Recent data shows narrowing deviations across most assayers.\n\n")
         elif recent_trend == "worsening":
-            analysis += f"**Trend analysis:** Recent data shows widening deviations across most assayers.\n\n"
+            parts.append(f"**Trend analysis:** Recent data shows widening deviations across most assayers.\n\n")
         else:
-            analysis += f"**Trend analysis:** Deviation patterns remain consistent with no significant direction change.\n\n"
+            parts.append(f"**Trend analysis:** Deviation patterns remain consistent with no significant direction change.\n\n")
         
-        return analysis
+        return "".join(parts)
         
     except Exception as e:
         return f"Data interpretation failed: {str(e)}\n\nPlease check your data and try again."
@@ -711,6 +971,8 @@ def generate_heatmap_analysis(data):
     try:
         # Extract key data points
         time_period = data["time_period"]
+        if not data.get("total_assayers"):
+            return _EMPTY_HEATMAP_ANALYSIS.format(time_period=time_period)
         total_weeks = data["total_weeks"]
         total_assayers = data["total_assayers"]
         hot_spots = data["hot_spots"]
@@ -718,59 +980,53 @@ def generate_heatmap_analysis(data):
         inconsistent_assayers = data["most_inconsistent_assayers"]
         
         # Build a readable analysis
-        analysis = f"## Heatmap Interpretation for {time_period}\n\n"
+        parts = []
+        parts.append(f"## Heatmap Interpretation for {time_period}\n\n")
         
         # Axis explanation
-        analysis += f"**X-axis:** Represents time periods (weeks) from earliest ({time_period}).\n"
-        analysis += f"**Y-axis:** Shows individual assayer names.\n"
-        analysis += f"**Color intensity:** Indicates magnitude of deviation from benchmark (darker = larger deviation).\n\n"
+        parts.append(f"**X-axis:** Represents time periods (weeks) from earliest ({time_period}).\n")
+        parts.append(_HEATMAP_AXES)
         
         # Overall summary
-        analysis += f"### Key Observations\n"
-        analysis += f"This heatmap visualizes deviation patterns across {total_weeks} weeks for {total_assayers} assayers. "
+        parts.append(_KEY_OBSERVATIONS)
+        parts.append(f"This heatmap visualizes deviation patterns across {total_weeks} weeks for {total_assayers} assayers. ")
         
         # Pattern explanation
         if hot_spots:
             # Group hotspots by week to identify problematic time periods
-            weeks_with_issues = {}
+            weeks_with_issues = defaultdict(list)
             for spot in hot_spots:
-                if spot['week'] not in weeks_with_issues:
-                    weeks_with_issues[spot['week']] = []
                 weeks_with_issues[spot['week']].append((spot['assayer'], spot['deviation']))
             
             multi_assayer_weeks = {week: assayers for week, assayers in weeks_with_issues.items() if len(assayers) > 1}
             
             if multi_assayer_weeks:
-                analysis += f"\n\n**Time-based patterns:** "
+                parts.append(f"\n\n**Time-based patterns:** ")
                 problematic_weeks = list(multi_assayer_weeks.keys())[:2]  # Limit to top 2
-                analysis += f"Weeks {', '.join(problematic_weeks)} show deviations across multiple assayers, "
-                analysis += f"suggesting possible laboratory-wide factors during these periods.\n\n"
+                parts.append(f"Weeks {', '.join(problematic_weeks)} show deviations across multiple assayers, ")
+                parts.append(f"suggesting possible laboratory-wide factors during these periods.\n\n")
             
             # Identify assayers with multiple hotspots
-            assayer_hotspot_count = {}
-            for spot in hot_spots:
-                if spot['assayer'] not in assayer_hotspot_count:
-                    assayer_hotspot_count[spot['assayer']] = 0
-                assayer_hotspot_count[spot['assayer']] += 1
+            assayer_hotspot_count = Counter(spot['assayer'] for spot in hot_spots)
             
             repeat_offenders = [(a, c) for a, c in assayer_hotspot_count.items() if c > 1]
             if repeat_offenders:
-                analysis += f"**Assayer-specific patterns:** "
-                repeat_names = [f"{a} ({c} occurrences)" for a, c in sorted(repeat_offenders, key=lambda x: x[1], reverse=True)[:3]]
-                analysis += f"{', '.join(repeat_names)} show recurring deviation patterns.\n\n"
+                parts.append(f"**Assayer-specific patterns:** ")
+                repeat_names = ", ".join(f"{a} ({c} occurrences)" for a, c in sorted(repeat_offenders, key=lambda x: x[1], reverse=True)[:3])
+                parts.append(f"{repeat_names} show recurring deviation patterns.\n\n")
         else:
-            analysis += f"The data shows relatively consistent performance with no significant hotspots across the time period.\n\n"
+            parts.append(f"The data shows relatively consistent performance with no significant hotspots across the time period.\n\n")
         
         # Consistency information
         if consistent_assayers and inconsistent_assayers:
-            analysis += f"**Consistency comparison:** "
-            consist_names = [f"{a['name']} (±{a['std_deviation']}%)" for a in consistent_assayers[:2]]
-            inconsist_names = [f"{a['name']} (±{a['std_deviation']}%)" for a in inconsistent_assayers[:2]]
+            parts.append(f"**Consistency comparison:** ")
+            consist_names = ", ".join(f"{a['name']} (±{a['std_deviation']}%)" for a in consistent_assayers[:2])
+            inconsist_names = ", ".join(f"{a['name']} (±{a['std_deviation']}%)" for a in inconsistent_assayers[:2])
             
-            analysis += f"{', '.join(consist_names)} maintain the most stable results, while "
-            analysis += f"{', '.join(inconsist_names)} show the greatest variability in their measurements.\n\n"
+            parts.append(f"{consist_names} maintain the most stable results, while ")
+            parts.append(f"{inconsist_names} show the greatest variability in their measurements.\n\n")
         
-        return analysis
+        return "".join(parts)
         
     except Exception as e:
         return f"Heatmap interpretation failed: {str(e)}\n\nPlease check your data and try again."
@@ -782,67 +1038,70 @@ def generate_trend_analysis(data):
         time_period = data["time_period"]
         ma_window = data["moving_average_window"]
         assayer_trends = data["assayer_trends"]
-        recent_data_points = data["recent_data_points"]
+        if not assayer_trends:
+            return _EMPTY_TREND_ANALYSIS.format(time_period=time_period, ma_window=ma_window)
         
-        # Count trends by category
-        improving = [a for a in assayer_trends if a["trend_direction"] in ["improving", "strongly improving"]]
-        worsening = [a for a in assayer_trends if a["trend_direction"] in ["worsening", "strongly worsening"]]
-        stable = [a for a in assayer_trends if a["trend_direction"] == "stable"]
-        
-        # Find most significant changes
+        # Count trends by category and find the most significant changes in one pass
+        improving_count = 0
+        worsening_count = 0
+        stable_count = 0
         biggest_improvement = None
         biggest_worsening = None
         
         for assayer in assayer_trends:
-            if assayer["trend_direction"] in ["improving", "strongly improving"]:
+            direction = assayer["trend_direction"]
+            if direction == "improving" or direction == "strongly improving":
+                improving_count += 1
                 if biggest_improvement is None or assayer["change_percentage"] < biggest_improvement["change_percentage"]:
                     biggest_improvement = assayer
-            elif assayer["trend_direction"] in ["worsening", "strongly worsening"]:
+            elif direction == "worsening" or direction == "strongly worsening":
+                worsening_count += 1
                 if biggest_worsening is None or assayer["change_percentage"] > biggest_worsening["change_percentage"]:
                     biggest_worsening = assayer
+            elif direction == "stable":
+                stable_count += 1
         
         # Build a readable analysis
-        analysis = f"## Trend Chart Interpretation for {time_period}\n\n"
+        parts = []
+        parts.append(f"## Trend Chart Interpretation for {time_period}\n\n")
         
         # Axis explanation
-        analysis += f"**X-axis:** Represents dates over the {time_period} period.\n"
-        analysis += f"**Y-axis:** Shows percentage deviation from benchmark values (0% = perfect match).\n"
-        analysis += f"**Lines:** Each line represents a {ma_window}-day moving average for a different assayer.\n\n"
+        parts.append(f"**X-axis:** Represents dates over the {time_period} period.\n")
+        parts.append(_TREND_AXES)
+        parts.append(f"**Lines:** Each line represents a {ma_window}-day moving average for a different assayer.\n\n")
         
         # Direction explanation
-        analysis += f"**Downward trends:** Indicate improving precision (moving closer to benchmark).\n"
-        analysis += f"**Upward trends:** Indicate decreasing precision (moving away from benchmark).\n"
-        analysis += f"**Flat/stable lines:** Indicate consistent precision levels.\n\n"
+        parts.append(_TREND_DIRECTIONS)
         
         # Overall trend summary
-        analysis += f"### Key Observations\n"
+        parts.append(_KEY_OBSERVATIONS)
         
         # Category counts
-        analysis += f"From {len(assayer_trends)} assayers with sufficient data for trend analysis: "
-        analysis += f"{len(improving)} show improving trends, "
-        analysis += f"{len(stable)} show stable performance, and "
-        analysis += f"{len(worsening)} show worsening trends.\n\n"
+        parts.append(f"From {len(assayer_trends)} assayers with sufficient data for trend analysis: ")
+        parts.append(f"{improving_count} show improving trends, ")
+        parts.append(f"{stable_count} show stable performance, and ")
+        parts.append(f"{worsening_count} show worsening trends.\n\n")
         
         # Notable trends
         if biggest_improvement:
-            analysis += f"**Most significant improvement:** {biggest_improvement['assayer']} shows a {abs(biggest_improvement['change_percentage'])}% "
-            analysis += f"reduction in deviation from {biggest_improvement['first_value']}% to {biggest_improvement['last_value']}%.\n\n"
+            parts.append(f"**Most significant improvement:** {biggest_improvement['assayer']} shows a {abs(biggest_improvement['change_percentage'])}% ")
+            parts.append(f"reduction in deviation from {biggest_improvement['first_value']}% to {biggest_improvement['last_value']}%.\n\n")
         
         if biggest_worsening:
-            analysis += f"**Most significant degradation:** {biggest_worsening['assayer']} shows a {biggest_worsening['change_percentage']}% "
-            analysis += f"increase in deviation from {biggest_worsening['first_value']}% to {biggest_worsening['last_value']}%.\n\n"
+            parts.append(f"**Most significant degradation:** {biggest_worsening['assayer']} shows a {biggest_worsening['change_percentage']}% ")
+            parts.append(f"increase in deviation from {biggest_worsening['first_value']}% to {biggest_worsening['last_value']}%.\n\n")
             
         # General laboratory trend
         lab_trend = "improving"
-        if len(worsening) > len(improving) and len(worsening) > len(stable):
+        if worsening_count > improving_count and worsening_count > stable_count:
             lab_trend = "worsening"
-        elif len(stable) > len(improving) and len(stable) > len(worsening):
+        elif stable_count > improving_count and stable_count > worsening_count:
             lab_trend = "stable"
             
-        analysis += f"**Overall laboratory trend:** The general performance trend is {lab_trend} "
-        analysis += f"based on the {ma_window}-day moving average analysis.\n\n"
+        parts.append(f"**Overall laboratory trend:** The general performance trend is {lab_trend} ")
+        parts.append(f"based on the {ma_window}-day moving average analysis.\n\n")
         
-        return analysis
+        return "".join(parts)
         
     except Exception as e:
         return f"Trend interpretation failed: {str(e)}\n\nPlease check your data and try again."
@@ -853,6 +1112,8 @@ def generate_distribution_analysis(data):
         # Extract key data points
         time_period = data["time_period"]
         distributions = data["assayer_distributions"]
+        if not distributions:
+            return _EMPTY_DIST_ANALYSIS.format(time_period=time_period)
         
         # Categorize distributions
         symmetric = [d for d in distributions if "symmetric" in d["shape"]]
@@ -863,74 +1124,81 @@ def generate_distribution_analysis(data):
         wide_spread = [d for d in distributions if d["spread"] == "wide"]
         
         # Build a readable analysis
-        analysis = f"## Distribution Chart Interpretation for {time_period}\n\n"
+        parts = []
+        parts.append(f"## Distribution Chart Interpretation for {time_period}\n\n")
         
         # Axis and chart explanation
-        analysis += f"**X-axis:** Represents assayer names ordered alphabetically.\n"
-        analysis += f"**Box plots:** Each box shows distribution of percentage deviations from benchmark.\n"
-        analysis += f"**Box components:** Middle line = median, box edges = 25th and 75th percentiles, whiskers = min/max (excluding outliers), dots = outliers.\n\n"
+        parts.append(_DIST_LEGEND)
         
         # Key interpretation points
-        analysis += f"### Key Observations\n"
+        parts.append(_KEY_OBSERVATIONS)
         
         # Spread comparison
-        analysis += f"**Spread comparison:** "
+        parts.append(f"**Spread comparison:** ")
         if narrow_spread and wide_spread:
-            narrow_names = [d['assayer'] for d in narrow_spread[:2]]
-            wide_names = [d['assayer'] for d in wide_spread[:2]]
-            analysis += f"{', '.join(narrow_names)} show narrow boxes (high consistency), while "
-            analysis += f"{', '.join(wide_names)} show wide boxes (high variability).\n\n"
+            narrow_names = ", ".join(d['assayer'] for d in narrow_spread[:2])
+            wide_names = ", ".join(d['assayer'] for d in wide_spread[:2])
+            parts.append(f"{narrow_names} show narrow boxes (high consistency), while ")
+            parts.append(f"{wide_names} show wide boxes (high variability).\n\n")
         elif narrow_spread:
-            narrow_names = [d['assayer'] for d in narrow_spread[:3]]
-            analysis += f"{', '.join(narrow_names)} show the narrowest boxes, indicating consistent results.\n\n"
+            narrow_names = ", ".join(d['assayer'] for d in narrow_spread[:3])
+            parts.append(f"{narrow_names} show the narrowest boxes, indicating consistent results.\n\n")
         elif wide_spread:
-            wide_names = [d['assayer'] for d in wide_spread[:3]]
-            analysis += f"{', '.join(wide_names)} show the widest boxes, indicating variable results.\n\n"
+            wide_names = ", ".join(d['assayer'] for d in wide_spread[:3])
+            parts.append(f"{wide_names} show the widest boxes, indicating variable results.\n\n")
             
         # Box position interpretation
-        if distributions:
-            # Sort by median values
-            sorted_by_median = sorted(distributions, key=lambda x: x['median'])
-            lowest_median = sorted_by_median[0]
-            highest_median = sorted_by_median[-1]
-            centered_median = min(distributions, key=lambda x: abs(x['median']))
-            
-            analysis += f"**Box position:** "
-            analysis += f"{highest_median['assayer']}'s box is positioned highest (median: {highest_median['median']}%), "
-            analysis += f"indicating tendency toward higher readings than benchmark. "
-            analysis += f"{lowest_median['assayer']}'s box is positioned lowest (median: {lowest_median['median']}%), "
-            analysis += f"indicating tendency toward lower readings. "
-            analysis += f"{centered_median['assayer']} is most centered (median: {centered_median['median']}%).\n\n"
+        # Find the lowest, highest and most centered medians in a single pass
+        lowest_median = highest_median = centered_median = distributions[0]
+        centered_abs = abs(centered_median['median'])
+        for d in distributions[1:]:
+            median = d['median']
+            if median < lowest_median['median']:
+                lowest_median = d
+            if median > highest_median['median']:
+                highest_median = d
+            median_abs = abs(median)
+            if median_abs < centered_abs:
+                centered_median, centered_abs = d, median_abs
+        
+        parts.append(f"**Box position:** ")
+        parts.append(f"{highest_median['assayer']}'s box is positioned highest (median: {highest_median['median']}%), ")
+        parts.append(f"indicating tendency toward higher readings than benchmark. ")
+        parts.append(f"{lowest_median['assayer']}'s box is positioned lowest (median: {lowest_median['median']}%), ")
+        parts.append(f"indicating tendency toward lower readings. ")
+        parts.append(f"{centered_median['assayer']} is most centered (median: {centered_median['median']}%).\n\n")
         
         # Distribution shape explanation
-        analysis += f"**Shape interpretation:** "
+        parts.append(f"**Shape interpretation:** ")
         if right_skewed:
-            r_skewed_names = [d['assayer'] for d in right_skewed[:2]]
-            analysis += f"{', '.join(r_skewed_names)} show right-skewed distributions (longer upper whiskers), "
-            analysis += f"indicating occasional large positive deviations. "
+            r_skewed_names = ", ".join(d['assayer'] for d in right_skewed[:2])
+            parts.append(f"{r_skewed_names} show right-skewed distributions (longer upper whiskers), ")
+            parts.append(f"indicating occasional large positive deviations. ")
         if left_skewed:
-            l_skewed_names = [d['assayer'] for d in left_skewed[:2]]
-            analysis += f"{', '.join(l_skewed_names)} show left-skewed distributions (longer lower whiskers), "
-            analysis += f"indicating occasional large negative deviations. "
+            l_skewed_names = ", ".join(d['assayer'] for d in left_skewed[:2])
+            parts.append(f"{l_skewed_names} show left-skewed distributions (longer lower whiskers), ")
+            parts.append(f"indicating occasional large negative deviations. ")
         if symmetric:
-            sym_names = [d['assayer'] for d in symmetric[:2]]
-            analysis += f"{', '.join(sym_names)} show symmetric distributions (balanced whiskers), "
-            analysis += f"indicating random rather than systematic variation."
-        analysis += "\n\n"
+            sym_names = ", ".join(d['assayer'] for d in symmetric[:2])
+            parts.append(f"{sym_names} show symmetric distributions (balanced whiskers), ")
+            parts.append(f"indicating random rather than systematic variation.")
+        parts.append("\n\n")
         
         # Outlier identification if present
-        outlier_info = []
-        for d in distributions:
-            # Consider a simple outlier detection method - determine if max/min is far from Q3/Q1
-            iqr = d['iqr']
-            if (d['max'] - d['q75']) > 1.5 * iqr or (d['q25'] - d['min']) > 1.5 * iqr:
-                outlier_info.append(d['assayer'])
-                
+        # Consider a simple outlier detection method - determine if max/min is far from Q3/Q1
+        bounds = np.array(
+            [(d['max'], d['min'], d['q75'], d['q25'], d['iqr']) for d in distributions],
+            dtype=np.float64
+        )
+        outlier_mask = ((bounds[:, 0] - bounds[:, 2] > 1.5 * bounds[:, 4]) |
+                        (bounds[:, 3] - bounds[:, 1] > 1.5 * bounds[:, 4]))
+        outlier_info = [distributions[i]['assayer'] for i in np.flatnonzero(outlier_mask)[:3]]
+        
         if outlier_info:
-            analysis += f"**Outlier detection:** {', '.join(outlier_info[:3])} show outlier points, "
-            analysis += f"indicating occasional unusual measurement results.\n\n"
+            parts.append(f"**Outlier detection:** {', '.join(outlier_info[:3])} show outlier points, ")
+            parts.append(f"indicating occasional unusual measurement results.\n\n")
         
-        return analysis
+        return "".join(parts)
         
     except Exception as e:
         return f"Distribution interpretation failed: {str(e)}\n\nPlease check your data and try again."
@@ -940,6 +1208,8 @@ def generate_recommendation_fallback(data):
     try:
         # Extract key data points
         time_period = data["time_period"]
+        if not data["overall_metrics"]["total_assayers"]:
+            return _EMPTY_RECOMMENDATION_ANALYSIS.format(time_period=time_period)
         high_bias = data["high_bias_assayers"]
         high_variance = data["high_variance_assayers"]
         low_experience = data["low_experience_assayers"]
@@ -947,49 +1217,49 @@ def generate_recommendation_fallback(data):
         overall = data["overall_metrics"]
         
         # Build a readable analysis
-        analysis = f"## Performance Analysis for {time_period}\n\n"
+        parts = []
+        parts.append(f"## Performance Analysis for {time_period}\n\n")
         
         # Explain what the chart is showing
-        analysis += f"This chart aggregates performance metrics for {overall['total_assayers']} assayers "
-        analysis += f"with an overall average deviation of {overall['avg_deviation_across_all']}% "
-        analysis += f"and average standard deviation of {overall['avg_std_across_all']}%.\n\n"
+        parts.append(f"This chart aggregates performance metrics for {overall['total_assayers']} assayers ")
+        parts.append(f"with an overall average deviation of {overall['avg_deviation_across_all']}% ")
+        parts.append(f"and average standard deviation of {overall['avg_std_across_all']}%.\n\n")
         
         # Performance categories explanation
-        analysis += f"### Performance Categories\n"
+        parts.append(f"### Performance Categories\n")
         
         # High bias assayers
         if high_bias:
-            analysis += f"**Significant bias detected:** "
-            bias_names = []
-            bias_values = []
-            for assayer in high_bias[:3]:
-                direction = "higher" if assayer['avg_deviation'] > 0 else "lower"
-                bias_names.append(assayer['name'])
-                bias_values.append(f"{abs(assayer['avg_deviation'])}% {direction} than benchmark")
+            parts.append(f"**Significant bias detected:** ")
+            bias_names = ", ".join(a['name'] for a in high_bias[:3])
+            bias_values = " and ".join(
+                f"{abs(a['avg_deviation'])}% {'higher' if a['avg_deviation'] > 0 else 'lower'} than benchmark"
+                for a in high_bias[:3]
+            )
             
-            analysis += f"{', '.join(bias_names)} consistently report {' and '.join(bias_values)} respectively "
-            analysis += f"across their test samples, suggesting possible systematic measurement bias.\n\n"
+            parts.append(f"{bias_names} consistently report {bias_values} respectively ")
+            parts.append(f"across their test samples, suggesting possible systematic measurement bias.\n\n")
         
         # High variance assayers
         if high_variance:
-            analysis += f"**Significant variability detected:** "
-            var_names = [f"{a['name']} (±{a['std_deviation']}%)" for a in high_variance[:3]]
-            analysis += f"{', '.join(var_names)} show the highest variability in their measurements, "
-            analysis += f"indicating inconsistent testing results compared to peers.\n\n"
+            parts.append(f"**Significant variability detected:** ")
+            var_names = ", ".join(f"{a['name']} (±{a['std_deviation']}%)" for a in high_variance[:3])
+            parts.append(f"{var_names} show the highest variability in their measurements, ")
+            parts.append(f"indicating inconsistent testing results compared to peers.\n\n")
         
         # Low experience assayers
         if low_experience:
-            analysis += f"**Limited sample assayers:** "
-            exp_names = [f"{a['name']} ({a['sample_count']} samples)" for a in low_experience[:3]]
-            analysis += f"{', '.join(exp_names)} have tested fewer samples than the median, "
-            analysis += f"which may affect the statistical significance of their performance metrics.\n\n"
+            parts.append(f"**Limited sample assayers:** ")
+            exp_names = ", ".join(f"{a['name']} ({a['sample_count']} samples)" for a in low_experience[:3])
+            parts.append(f"{exp_names} have tested fewer samples than the median, ")
+            parts.append(f"which may affect the statistical significance of their performance metrics.\n\n")
         
         # Well performing assayers
         if well_performing:
-            analysis += f"**High precision performers:** "
-            well_names = [f"{a['name']} (±{a['std_deviation']}%, avg: {a['avg_deviation']}%)" for a in well_performing[:3]]
-            analysis += f"{', '.join(well_names)} demonstrate both high accuracy (low deviation from benchmark) "
-            analysis += f"and high precision (low standard deviation), representing optimal testing performance.\n\n"
+            parts.append(f"**High precision performers:** ")
+            well_names = ", ".join(f"{a['name']} (±{a['std_deviation']}%, avg: {a['avg_deviation']}%)" for a in well_performing[:3])
+            parts.append(f"{well_names} demonstrate both high accuracy (low deviation from benchmark) ")
+            parts.append(f"and high precision (low standard deviation), representing optimal testing performance.\n\n")
         
         # Benchmark comparison summary
         if overall['total_assayers'] > 0:
@@ -998,12 +1268,12 @@ def generate_recommendation_fallback(data):
             below_benchmark = len([a for a in high_bias if a['avg_deviation'] < 0])
             at_benchmark = overall['total_assayers'] - above_benchmark - below_benchmark
             
-            analysis += f"### Benchmark Comparison\n"
-            analysis += f"Among all assayers: {above_benchmark} tend to report higher values than the benchmark, "
-            analysis += f"{below_benchmark} tend to report lower values, and approximately {at_benchmark} "
-            analysis += f"report values closely aligned with the benchmark.\n\n"
+            parts.append(f"### Benchmark Comparison\n")
+            parts.append(f"Among all assayers: {above_benchmark} tend to report higher values than the benchmark, ")
+            parts.append(f"{below_benchmark} tend to report lower values, and approximately {at_benchmark} ")
+            parts.append(f"report values closely aligned with the benchmark.\n\n")
         
-        return analysis
+        return "".join(parts)
         
     except Exception as e:
         return f"Performance analysis failed: {str(e)}\n\nPlease check your data and try again."
\ No newline at end of file
@@ -8,54 +8,63 @@ import os
 import sys
 import threading
 import time
-from http.server import HTTPServer, BaseHTTPRequestHandler
-import subprocess
-import signal
-import socket
+import http.client
+from health_check import start_health_check_server
 
-class HealthCheckHandler(BaseHTTPRequestHandler):
-    def do_GET(self):
-        # Health check endpoint
-        if self.path in ['/', '/health', '/healthz']:
-            self.send_response(200)
-            self.send_header('Content-Type', 'text/plain')
-            self.send_header('Cache-Control', 'no-cache')
-            self.end_headers()
-            self.wfile.write(b'OK')
-        else:
-            self.send_response(404)
-            self.end_headers()
-    
-    def log_message(self, format, *args):
-        # Suppress health check logs
-        pass
+# Set once Streamlit answers its own health endpoint
+streamlit_ready = threading.Event()
 
-def check_streamlit_ready(port=5000, timeout=60):
-    """Check if Streamlit is ready to serve requests"""
-    start_time = time.time()
-    while time.time() - start_time < timeout:
-        try:
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            result = sock.connect_ex(('localhost', port))
-            sock.close()
-            if result == 0:
-                return True
-        except:
-            pass
-        time.sleep(1)
+def probe_streamlit(port=5000):
+    """Make a single request to Streamlit's own health endpoint"""
+    conn = http.client.HTTPConnection('localhost', port, timeout=0.5)
+    try:
+        conn.request('GET', '/_stcore/health')
+        return conn.getresponse().status == 200
+    except (OSError, http.client.HTTPException):
+        return False
+    finally:
+        conn.close()
+
+def is_streamlit_ready():
+    """Health check ready_callback; probes Streamlit until it first answers"""
+    if streamlit_ready.is_set():
+        return True
+    if probe_streamlit():
+        streamlit_ready.set()
+        print("Streamlit application is ready")
+        return True
     return False
 
-def start_health_server(port=8080):
-    """Start health check server"""
-    try:
-        server = HTTPServer(('0.0.0.0', port), HealthCheckHandler)
-        print(f"Health check server started on port {port}")
-        server.serve_forever()
-    except Exception as e:
-        print(f"Health check server error: {e}")
+def run_health_sidecar(streamlit_pid, port=8080):
+    """Serve health checks for as long as the Streamlit process is running
+    
+    Runs in a child forked before Streamlit is exec'd, and exits once that
+    process is gone (the child is then re-parented).
+    """
+    # The sidecar prints rarely and exits via os._exit, so write each line out
+    sys.stdout.reconfigure(line_buffering=True)
+    
+    # Health probe threads need little stack, and nothing else runs here
+    threading.stack_size(256 * 1024)
+    
+    health_thread = threading.Thread(
+        target=start_health_check_server, 
+        args=(port, is_streamlit_ready), 
+        daemon=True
+    )
+    health_thread.start()
+    
+    while os.getppid() == streamlit_pid:
+        time.sleep(1)
 
-def start_streamlit():
-    """Start the Streamlit application"""
+def main():
+    """Main deployment entry point
+    
+    Forks a small health check process, then replaces this process with
+    Streamlit so signals reach it directly and no wrapper interpreter lingers.
+    """
+    print("Starting AEG labsync Monitor deployment...")
+    
     env = os.environ.copy()
     env['STREAMLIT_SERVER_PORT'] = '5000'
     env['STREAMLIT_SERVER_ADDRESS'] = '0.0.0.0'
@@ -68,46 +77,18 @@ def start_streamlit():
         '--server.headless', 'true'
     ]
     
-    return subprocess.Popen(cmd, env=env)
-
-def main():
-    """Main deployment entry point"""
-    print("Starting AEG labsync Monitor deployment...")
-    
-    # Start Streamlit application
-    streamlit_process = start_streamlit()
-    
-    # Wait for Streamlit to be ready
-    if check_streamlit_ready():
-        print("Streamlit application is ready")
-    else:
-        print("Warning: Streamlit may not be fully ready")
-    
-    # Start health check server in a separate thread
-    health_thread = threading.Thread(
-        target=start_health_server, 
-        args=(8080,), 
-        daemon=True
-    )
-    health_thread.start()
+    # Flush before forking so the child does not inherit (and repeat) buffered output
+    sys.stdout.flush()
+    sys.stderr.flush()
     
-    # Set up signal handlers for graceful shutdown
-    def signal_handler(signum, frame):
-        print("Shutting down...")
-        streamlit_process.terminate()
-        sys.exit(0)
-    
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
+    streamlit_pid = os.getpid()
+    if os.fork() == 0:
+        try:
+            run_health_sidecar(streamlit_pid)
+        finally:
+            os._exit(0)
     
-    try:
-        # Keep the main process alive
-        streamlit_process.wait()
-    except KeyboardInterrupt:
-        print("Received interrupt signal")
-    finally:
-        streamlit_process.terminate()
-        streamlit_process.wait()
+    os.execvpe(cmd[0], cmd, env)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
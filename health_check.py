@@ -8,22 +8,112 @@ import socketserver
 import threading
 import time
 import os
+import socket
+from concurrent.futures import ThreadPoolExecutor
+
+# Complete health check responses, each sent with a single write
+OK_RESPONSE = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: text/plain\r\n"
+    b"Content-Length: 2\r\n"
+    b"Cache-Control: no-cache\r\n"
+    b"Connection: close\r\n"
+    b"\r\n"
+    b"OK"
+)
+
+SERVICE_UNAVAILABLE_RESPONSE = (
+    b"HTTP/1.1 503 Service Unavailable\r\n"
+    b"Content-Type: text/plain\r\n"
+    b"Content-Length: 8\r\n"
+    b"Cache-Control: no-cache\r\n"
+    b"Connection: close\r\n"
+    b"\r\n"
+    b"STARTING"
+)
+
+# Paths answered with the health status
+HEALTH_PATHS = frozenset(('/', '/health', '/healthz'))
+
+# Request lines answered without parsing the request headers
+FAST_PATH_PREFIXES = tuple(b'GET ' + path.encode() + b' ' for path in HEALTH_PATHS)
+
+class HealthCheckHandler(http.server.BaseHTTPRequestHandler):
+    # Seconds a client may stay silent before its worker thread is released
+    timeout = 2
+
+    def handle_one_request(self):
+        try:
+            # Fast path: plain probes skip header parsing entirely
+            if self.rfile.peek(16).startswith(FAST_PATH_PREFIXES):
+                while self.rfile.readline(65537) not in (b'\r\n', b'\n', b''):
+                    pass
+                self.send_health()
+                return
+        except TimeoutError:
+            self.close_connection = True
+            return
+        super().handle_one_request()
 
-class HealthCheckHandler(http.server.SimpleHTTPRequestHandler):
     def do_GET(self):
-        if self.path == '/health' or self.path == '/':
-            self.send_response(200)
-            self.send_header('Content-type', 'text/plain')
-            self.end_headers()
-            self.wfile.write(b'OK')
+        if self.path in HEALTH_PATHS:
+            self.send_health()
         else:
             self.send_response(404)
             self.end_headers()
 
-def start_health_check_server(port=8080):
-    """Start a simple health check server on a different port"""
+    def send_health(self):
+        # 503 until the server's ready_callback reports the app as serving
+        ready_callback = getattr(self.server, 'ready_callback', None)
+        ready = ready_callback is None or ready_callback()
+        self.request.sendall(OK_RESPONSE if ready else SERVICE_UNAVAILABLE_RESPONSE)
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        # Suppress health check logs
+        pass
+
+class ThreadedTCPServer(socketserver.TCPServer):
+    """TCP server that handles health probes on a bounded pool of threads"""
+    allow_reuse_address = True
+    ready_callback = None
+    max_workers = 16
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='health-check')
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._handle_request, request, client_address)
+
+    def _handle_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=False)
+
+    def server_bind(self):
+        # Disable Nagle so each response leaves in one packet without delay
+        super().server_bind()
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+def start_health_check_server(port=8080, ready_callback=None):
+    """Start a simple health check server on a different port
+
+    Args:
+        port: Port to listen on
+        ready_callback: Optional callable returning True once the app is
+            ready; health paths answer 503 while it returns False
+    """
     try:
-        with socketserver.TCPServer(("", port), HealthCheckHandler) as httpd:
+        with ThreadedTCPServer(("", port), HealthCheckHandler) as httpd:
+            httpd.ready_callback = ready_callback
             print(f"Health check server running on port {port}")
             httpd.serve_forever()
     except Exception as e:
@@ -37,4 +127,4 @@ def run_health_check_daemon():
 
 if __name__ == "__main__":
     # For standalone health check testing
-    start_health_check_server()
\ No newline at end of file
+    start_health_check_server()
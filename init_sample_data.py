@@ -1,6 +1,7 @@
 import sqlite3
 from datetime import datetime, timedelta
 import random
+import numpy as np
 
 # Initialize database with sample data for demonstration
 def init_sample_data():
@@ -10,6 +11,13 @@ def init_sample_data():
     conn = sqlite3.connect('gold_assay.db')
     cursor = conn.cursor()
     
+    # Tune SQLite for the bulk load: WAL avoids a full fsync per commit and
+    # temporary structures and page cache stay in memory
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-64000")
+    
     # Check if the database already has assayers
     cursor.execute("SELECT COUNT(*) FROM assayers WHERE is_active = 1")
     assayer_count = cursor.fetchone()[0]
@@ -27,6 +35,9 @@ def init_sample_data():
     cursor.execute("DELETE FROM assayers")
     conn.commit()
     
+    # Load all sample data in one explicit transaction
+    cursor.execute("BEGIN")
+    
     # Add sample assayers
     assayers = [
         ("John Smith", "JS001"),
@@ -58,56 +69,67 @@ def init_sample_data():
     # The benchmark assayer's values will be the reference
     today = datetime.now()
     
+    # Random values are generated in bulk for each assayer rather than one call per sample
+    rng = np.random.default_rng()
+    
     # For the benchmark assayer (John Smith)
     benchmark_id = assayer_ids["John Smith"]
-    benchmark_values = {}
     
-    for sample_id in sample_ids:
-        # Generate a random gold content between 800 and 999.9
-        gold_content = round(random.uniform(800, 999.9), 1)
-        benchmark_values[sample_id] = gold_content
-        
-        # Use a date within the last 30 days
-        days_ago = random.randint(0, 29)
-        test_date = (today - timedelta(days=days_ago)).strftime('%Y-%m-%d %H:%M:%S')
-        
-        cursor.execute(
-            "INSERT INTO assay_results (assayer_id, sample_id, gold_content, test_date, notes) VALUES (?, ?, ?, ?, ?)",
-            (benchmark_id, sample_id, gold_content, test_date, "Benchmark test")
+    # Generate random gold contents between 800 and 999.9, tested within the last 30 days
+    benchmark_contents = np.round(rng.uniform(800, 999.9, len(sample_ids)), 1)
+    benchmark_days_ago = rng.integers(0, 30, len(sample_ids))
+    
+    benchmark_rows = [
+        (benchmark_id, sample_id, gold_content,
+         (today - timedelta(days=days_ago)).strftime('%Y-%m-%d %H:%M:%S'), "Benchmark test")
+        for sample_id, gold_content, days_ago in zip(
+            sample_ids, benchmark_contents.tolist(), benchmark_days_ago.tolist()
         )
+    ]
     
-    # For other assayers
+    cursor.executemany(
+        "INSERT INTO assay_results (assayer_id, sample_id, gold_content, test_date, notes) VALUES (?, ?, ?, ?, ?)",
+        benchmark_rows
+    )
+    
+    # For other assayers, collect every result and insert them in one batch
+    assayer_rows = []
     for name, assayer_id in assayer_ids.items():
         if name == "John Smith":  # Skip the benchmark assayer
             continue
         
-        # Each assayer tests a random subset of samples
-        assayer_samples = random.sample(sample_ids, k=random.randint(15, len(sample_ids)))
+        # Each assayer tests a random subset of samples, picked by index so the
+        # matching benchmark values can be gathered from the array directly
+        indices = random.sample(range(len(sample_ids)), k=random.randint(15, len(sample_ids)))
+        assayer_samples = [sample_ids[i] for i in indices]
+        sample_count = len(indices)
+        
+        # Add a small random deviation from benchmark, tested within the last 30 days
+        deviations = np.round(rng.uniform(-5.0, 5.0, sample_count), 1)
+        gold_contents = np.clip(benchmark_contents[indices] + deviations, 0, 999.9)
+        days_ago = rng.integers(0, 30, sample_count)
+        
+        # Add a note based on the deviation
+        notes = np.select(
+            [np.abs(deviations) < 1.0, deviations > 0],
+            ["Close match to benchmark", "Higher than benchmark"],
+            default="Lower than benchmark"
+        )
         
-        for sample_id in assayer_samples:
-            benchmark_value = benchmark_values[sample_id]
-            
-            # Add a small random deviation from benchmark
-            deviation = round(random.uniform(-5.0, 5.0), 1)
-            gold_content = max(0, min(999.9, benchmark_value + deviation))
-            
-            # Use a date within the last 30 days
-            days_ago = random.randint(0, 29)
-            test_date = (today - timedelta(days=days_ago)).strftime('%Y-%m-%d %H:%M:%S')
-            
-            # Add a note based on the deviation
-            if abs(deviation) < 1.0:
-                note = "Close match to benchmark"
-            elif deviation > 0:
-                note = "Higher than benchmark"
-            else:
-                note = "Lower than benchmark"
-            
-            cursor.execute(
-                "INSERT INTO assay_results (assayer_id, sample_id, gold_content, test_date, notes) VALUES (?, ?, ?, ?, ?)",
-                (assayer_id, sample_id, gold_content, test_date, note)
+        assayer_rows.extend(
+            (assayer_id, sample_id, gold_content,
+             (today - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S'), note)
+            for sample_id, gold_content, days, note in zip(
+                assayer_samples, gold_contents.tolist(), days_ago.tolist(), notes.tolist()
             )
+        )
+    
+    cursor.executemany(
+        "INSERT INTO assay_results (assayer_id, sample_id, gold_content, test_date, notes) VALUES (?, ?, ?, ?, ?)",
+        assayer_rows
+    )
     
+    # All sample inserts above share one transaction, committed here
     conn.commit()
     conn.close()
     
@@ -4,93 +4,352 @@ Main deployment entry point for AEG labsync Monitor
 This file handles both the Streamlit application and health checks on the same port
 """
 
-import os
-import sys
-import subprocess
+import asyncio
+import functools
+import re
 import threading
 import time
-import signal
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from socketserver import ThreadingMixIn
-import urllib.request
-import urllib.parse
-
-class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
-    """Multi-threaded HTTP server"""
-    daemon_threads = True
-
-class HealthCheckHandler(BaseHTTPRequestHandler):
-    """HTTP handler that proxies to Streamlit and provides health checks"""
-    
-    def do_GET(self):
-        # Health check endpoints
-        if self.path in ['/health', '/healthz', '/ready']:
-            self.send_response(200)
-            self.send_header('Content-Type', 'text/plain')
-            self.send_header('Cache-Control', 'no-cache')
-            self.end_headers()
-            self.wfile.write(b'OK')
+import socket
+
+# Complete health check responses, each sent with a single write
+HEALTH_RESPONSE = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: text/plain\r\n"
+    b"Content-Length: 2\r\n"
+    b"Cache-Control: no-cache\r\n"
+    b"Connection: close\r\n"
+    b"\r\n"
+    b"OK"
+)
+
+OK_RESPONSE = (
+    b"HTTP/1.1 200 OK\r\n"
+    b"Content-Type: text/plain\r\n"
+    b"Content-Length: 2\r\n"
+    b"Connection: close\r\n"
+    b"\r\n"
+    b"OK"
+)
+
+SERVICE_UNAVAILABLE_RESPONSE = (
+    b"HTTP/1.1 503 Service Unavailable\r\n"
+    b"Content-Type: text/plain\r\n"
+    b"Content-Length: 11\r\n"
+    b"Cache-Control: no-cache\r\n"
+    b"Connection: close\r\n"
+    b"\r\n"
+    b"UNAVAILABLE"
+)
+
+BAD_GATEWAY_RESPONSE = (
+    b"HTTP/1.1 502 Bad Gateway\r\n"
+    b"Content-Type: text/plain\r\n"
+    b"Content-Length: 21\r\n"
+    b"Connection: close\r\n"
+    b"\r\n"
+    b"Streamlit unreachable"
+)
+
+# Returned by route_request for requests that are forwarded to Streamlit
+PROXY = None
+
+# The same responses for connections that stay open for further requests
+KEEP_ALIVE_RESPONSES = {
+    response: response.replace(b"Connection: close\r\n", b"")
+    for response in (HEALTH_RESPONSE, OK_RESPONSE)
+}
+
+# User-Agent substrings of common health check clients
+HEALTH_AGENT_TOKENS = frozenset(('health', 'check', 'monitor', 'probe', 'ping'))
+
+# The same tokens as bytes, for matching raw header values
+HEALTH_AGENT_TOKEN_BYTES = tuple(token.encode() for token in sorted(HEALTH_AGENT_TOKENS))
+
+# Pulls the raw User-Agent value out of a header block
+USER_AGENT_PATTERN = re.compile(rb'^user-agent:[ \t]*([^\r\n]*)', re.IGNORECASE | re.MULTILINE)
+
+# Accept queue length for the public socket, sized for bursts of probes
+LISTEN_BACKLOG = 1024
+
+# Streamlit listens privately on this port; everything reaches it through port 5000
+STREAMLIT_PORT = 5001
+
+# Seconds between Streamlit connectivity checks, and the age after which the
+# last successful check no longer counts
+STREAMLIT_CHECK_INTERVAL = 1
+STREAMLIT_STALE_AFTER = 5
+
+# monotonic() time Streamlit last accepted a connection, None until it first does
+streamlit_last_seen = None
+
+# Seconds a client gets to send its request headers, or stay idle between requests
+REQUEST_TIMEOUT = 5
+
+def wants_close(header_block):
+    """Return True if the request headers ask to close the connection"""
+    return b'\r\nconnection: close' in (b'\r\n' + header_block).lower()
+
+def streamlit_is_up():
+    """Return True if Streamlit accepted a connection within STREAMLIT_STALE_AFTER"""
+    last_seen = streamlit_last_seen
+    return last_seen is not None and time.monotonic() - last_seen < STREAMLIT_STALE_AFTER
+
+@functools.lru_cache(maxsize=128)
+def is_health_agent(user_agent):
+    """Return True if a raw User-Agent value belongs to a health check client
+    
+    Probes send a handful of fixed User-Agent strings, so nearly every call
+    is a cache hit and the lower-casing and token scan run once per agent.
+    """
+    user_agent = user_agent.lower()
+    return any(token in user_agent for token in HEALTH_AGENT_TOKEN_BYTES)
+
+def health_route(header_block):
+    # Liveness of this process only
+    return HEALTH_RESPONSE
+
+def streamlit_route(header_block):
+    return HEALTH_RESPONSE if streamlit_is_up() else SERVICE_UNAVAILABLE_RESPONSE
+
+def root_route(header_block):
+    # Health check clients are recognised by User-Agent; browsers get the app
+    match = USER_AGENT_PATTERN.search(header_block)
+    if match and is_health_agent(match.group(1)):
+        return OK_RESPONSE
+    return PROXY
+
+# Locally answered GET paths; everything else is proxied to Streamlit
+ROUTES = {
+    b'/health': health_route,
+    b'/healthz': streamlit_route,
+    b'/ready': streamlit_route,
+    b'/': root_route,
+}
+
+def route_request(method, path, header_block):
+    """Pick the local response for a request, or PROXY to forward it to Streamlit"""
+    route = ROUTES.get(path)
+    if route is None or method != b'GET':
+        return PROXY
+    return route(header_block)
+
+class UpstreamProtocol(asyncio.Protocol):
+    """Streamlit side of a proxied connection; relays bytes back to the client"""
+    
+    def __init__(self, client_transport):
+        self.client_transport = client_transport
+    
+    def connection_made(self, transport):
+        self.transport = transport
+    
+    def data_received(self, data):
+        self.client_transport.write(data)
+    
+    def connection_lost(self, exc):
+        self.client_transport.close()
+    
+    # Backpressure: stop reading from the client while Streamlit is behind
+    def pause_writing(self):
+        self.client_transport.pause_reading()
+    
+    def resume_writing(self):
+        self.client_transport.resume_reading()
+
+class GatewayProtocol(asyncio.Protocol):
+    """Public side of port 5000
+    
+    Health checks are answered directly from the event loop's read callbacks.
+    Any other request switches the connection to a byte-level relay to
+    Streamlit, which also carries its WebSocket traffic.
+    """
+    
+    def connection_made(self, transport):
+        self.transport = transport
+        self.buffer = b''
+        self.upstream = None
+        self.proxying = False
+        self.timeout = asyncio.get_running_loop().call_later(REQUEST_TIMEOUT, transport.close)
+    
+    def data_received(self, data):
+        if self.proxying:
+            if self.upstream is not None:
+                self.upstream.write(data)
+            else:
+                self.buffer += data
             return
         
-        # For root path, check if this is a health check request
-        if self.path == '/':
-            user_agent = self.headers.get('User-Agent', '').lower()
-            # Common health check user agents
-            health_check_agents = ['health', 'check', 'monitor', 'probe', 'ping']
+        self.buffer += data
+        
+        # Answer every complete request already received (pipelined probes
+        # included) and send all of the responses with a single write
+        responses = []
+        close = False
+        while not close:
+            end = self.buffer.find(b'\r\n\r\n')
+            if end < 0:
+                break
+            request_line, _, header_block = self.buffer[:end].partition(b'\r\n')
+            parts = request_line.split()
+            if len(parts) < 2:
+                close = True
+                break
             
-            if any(agent in user_agent for agent in health_check_agents):
-                self.send_response(200)
-                self.send_header('Content-Type', 'text/plain')
-                self.end_headers()
-                self.wfile.write(b'OK')
+            response = route_request(parts[0], parts[1], header_block)
+            if response is PROXY:
+                # Earlier pipelined responses go out first, then this request
+                # and everything after it is relayed to Streamlit unparsed
+                if responses:
+                    self.transport.writelines(responses)
+                self.start_proxy()
                 return
+            self.buffer = self.buffer[end + 4:]
+            close = (
+                response not in KEEP_ALIVE_RESPONSES
+                or parts[2:] != [b'HTTP/1.1']
+                or wants_close(header_block)
+            )
+            responses.append(response if close else KEEP_ALIVE_RESPONSES[response])
         
-        # For all other requests, return simple OK for health checks
-        self.send_response(200)
-        self.send_header('Content-Type', 'text/plain')
-        self.end_headers()
-        self.wfile.write(b'OK')
-    
-    def log_message(self, format, *args):
-        # Suppress HTTP logs
-        pass
+        if responses:
+            # Scatter/gather send of the prebuilt responses (sendmsg on 3.12+)
+            self.transport.writelines(responses)
+        if close:
+            self.transport.close()
+        elif responses:
+            # Restart the idle timer for the next request on this connection
+            self.timeout.cancel()
+            self.timeout = asyncio.get_running_loop().call_later(REQUEST_TIMEOUT, self.transport.close)
+        elif len(self.buffer) > 65536:
+            # Drop clients that never finish their headers
+            self.transport.close()
+    
+    def start_proxy(self):
+        self.proxying = True
+        self.timeout.cancel()
+        self.transport.pause_reading()
+        asyncio.get_running_loop().create_task(self.connect_upstream())
+    
+    async def connect_upstream(self):
+        loop = asyncio.get_running_loop()
+        try:
+            upstream, _ = await loop.create_connection(
+                lambda: UpstreamProtocol(self.transport), '127.0.0.1', STREAMLIT_PORT
+            )
+        except OSError:
+            self.transport.write(BAD_GATEWAY_RESPONSE)
+            self.transport.close()
+            return
+        if self.transport.is_closing():
+            upstream.close()
+            return
+        self.upstream = upstream
+        upstream.write(self.buffer)
+        self.buffer = b''
+        self.transport.resume_reading()
+    
+    def connection_lost(self, exc):
+        self.timeout.cancel()
+        if self.upstream is not None:
+            self.upstream.close()
+    
+    # Backpressure: stop reading from Streamlit while the client is behind
+    def pause_writing(self):
+        if self.upstream is not None:
+            self.upstream.pause_reading()
+    
+    def resume_writing(self):
+        if self.upstream is not None:
+            self.upstream.resume_reading()
 
 def start_streamlit():
-    """Start Streamlit on port 5001"""
-    env = os.environ.copy()
-    cmd = [
-        sys.executable, '-m', 'streamlit', 'run', 'app.py',
-        '--server.port', '5001',
-        '--server.address', '0.0.0.0',
-        '--server.headless', 'true',
-        '--server.enableCORS', 'false',
-        '--server.enableXsrfProtection', 'false'
-    ]
+    """Run Streamlit on port 5001 in this process until it shuts down
+    
+    Streamlit only listens on the loopback interface; clients reach it through
+    the gateway on port 5000. Streamlit installs its own signal handlers, so
+    this must be called from the main thread.
+    """
+    from streamlit.web import bootstrap
+    
+    flag_options = {
+        'server.port': STREAMLIT_PORT,
+        'server.address': '127.0.0.1',
+        'server.headless': True,
+        'server.enableCORS': False,
+        'server.enableXsrfProtection': False,
+    }
     
     print("Starting Streamlit on port 5001...")
-    return subprocess.Popen(cmd, env=env)
+    bootstrap.load_config_options(flag_options=flag_options)
+    bootstrap.run('app.py', False, [], flag_options)
+
+async def serve_health(port=5000):
+    """Serve health checks on port 5000 and proxy everything else to Streamlit
+    
+    The socket is bound straight away so liveness probes pass from the start,
+    while Streamlit connectivity is tracked concurrently as it boots.
+    """
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(
+        GatewayProtocol, '0.0.0.0', port,
+        backlog=LISTEN_BACKLOG,
+        reuse_port=hasattr(socket, 'SO_REUSEPORT'),
+    )
+    
+    # Have the kernel hold new connections until their request bytes arrive,
+    # so each probe wakes the event loop once instead of twice (Linux only)
+    if hasattr(socket, 'TCP_DEFER_ACCEPT'):
+        for sock in server.sockets:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_DEFER_ACCEPT, REQUEST_TIMEOUT)
+    print(f"Health check server started on port {port}")
+    
+    async with server:
+        await asyncio.gather(server.serve_forever(), monitor_streamlit())
+
+async def monitor_streamlit():
+    """Keep streamlit_last_seen current for the /healthz and /ready checks"""
+    global streamlit_last_seen
+    
+    # Boot: the backed-off wait runs on a worker thread
+    while not await asyncio.to_thread(wait_for_streamlit, STREAMLIT_PORT):
+        pass
+    streamlit_last_seen = time.monotonic()
+    
+    while True:
+        await asyncio.sleep(STREAMLIT_CHECK_INTERVAL)
+        try:
+            _, writer = await asyncio.wait_for(
+                asyncio.open_connection('127.0.0.1', STREAMLIT_PORT), 0.5
+            )
+        except (OSError, asyncio.TimeoutError):
+            continue
+        writer.close()
+        streamlit_last_seen = time.monotonic()
 
 def start_health_server():
-    """Start health check server on port 5000"""
+    """Start the health check and proxy server on port 5000"""
     try:
-        server = ThreadingHTTPServer(('0.0.0.0', 5000), HealthCheckHandler)
-        print("Health check server started on port 5000")
-        server.serve_forever()
+        asyncio.run(serve_health())
     except Exception as e:
         print(f"Health server error: {e}")
 
-def wait_for_streamlit(port=5001, timeout=60):
-    """Wait for Streamlit to become available"""
-    start_time = time.time()
-    while time.time() - start_time < timeout:
+def wait_for_streamlit(port=STREAMLIT_PORT, timeout=60):
+    """Wait for Streamlit to become available
+    
+    A TCP connect is enough to show the listener is up, so no page is fetched.
+    Attempts back off exponentially from 50 ms up to 0.5 s between tries.
+    """
+    address = ('127.0.0.1', port)
+    deadline = time.monotonic() + timeout
+    attempt = 0
+    while time.monotonic() < deadline:
         try:
-            response = urllib.request.urlopen(f'http://localhost:{port}', timeout=2)
-            if response.getcode() == 200:
+            with socket.create_connection(address, timeout=0.5):
                 print(f"Streamlit is ready on port {port}")
                 return True
-        except:
+        except OSError:
             pass
-        time.sleep(2)
+        time.sleep(min(0.05 * 2 ** attempt, 0.5))
+        attempt += 1
     print(f"Warning: Streamlit not ready on port {port} after {timeout}s")
     return False
 
@@ -98,33 +357,13 @@ def main():
     """Main entry point"""
     print("Starting AEG labsync Monitor deployment...")
     
-    # Start Streamlit on port 5001
-    streamlit_process = start_streamlit()
-    
-    # Wait a moment for Streamlit to start
-    time.sleep(3)
-    
-    # Check if Streamlit is ready
-    wait_for_streamlit()
-    
-    # Set up signal handlers
-    def signal_handler(signum, frame):
-        print("Shutting down...")
-        streamlit_process.terminate()
-        streamlit_process.wait()
-        sys.exit(0)
+    # Port 5000 is served from a background thread, since Streamlit needs
+    # the main thread
+    health_thread = threading.Thread(target=start_health_server, daemon=True)
+    health_thread.start()
     
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
-    
-    # Start health check server on port 5000 (this will block)
-    try:
-        start_health_server()
-    except KeyboardInterrupt:
-        pass
-    finally:
-        streamlit_process.terminate()
-        streamlit_process.wait()
+    # Run Streamlit on port 5001 (this will block until shutdown)
+    start_streamlit()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,37 +1,69 @@
-from dataclasses import dataclass
+import json
+import time
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from typing import List, Optional
 
-@dataclass
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Last (monotonic ns, datetime) pair handed out by now_cached
+_now_cache = (0, None)
+
+def now_cached():
+    """
+    Return the current time, reusing one datetime per millisecond
+    
+    Bulk construction of records then shares a handful of datetime objects
+    instead of allocating one per record. datetimes are immutable, so sharing
+    them is safe.
+    
+    Returns:
+        datetime: Local time accurate to within a millisecond
+    """
+    global _now_cache
+    now_ns = time.monotonic_ns()
+    last_ns, last_dt = _now_cache
+    if last_dt is None or now_ns - last_ns > 1_000_000:
+        last_dt = datetime.now()
+        _now_cache = (now_ns, last_dt)
+    return last_dt
+
+@dataclass(slots=True)
 class Assayer:
     """Class representing an assayer (lab technician)"""
     assayer_id: Optional[int] = None
     name: str = ""
     employee_id: str = ""
     is_active: bool = True
-    joining_date: datetime = datetime.now()
+    joining_date: datetime = field(default_factory=now_cached)
     profile_picture: str = ""  # Base64 encoded or file path to image
     work_experience: str = ""  # Text describing work experience
 
-@dataclass
+@dataclass(slots=True)
 class AssayResult:
     """Class representing a single assay result"""
     result_id: Optional[int] = None
     assayer_id: int = 0
     sample_id: str = ""
     gold_content: float = 0.0
-    test_date: datetime = datetime.now()
+    test_date: datetime = field(default_factory=now_cached)
     notes: str = ""
 
-@dataclass
+@dataclass(slots=True)
 class Benchmark:
     """Class representing a benchmark assayer"""
     id: Optional[int] = None
     assayer_id: int = 0
-    set_date: datetime = datetime.now()
+    set_date: datetime = field(default_factory=now_cached)
     is_active: bool = True
 
-@dataclass
+@dataclass(slots=True, eq=False)
 class Deviation:
     """Class representing a deviation calculation"""
     sample_id: str = ""
@@ -40,4 +72,94 @@ class Deviation:
     benchmark_value: float = 0.0
     absolute_deviation: float = 0.0
     percentage_deviation: float = 0.0
-    test_date: datetime = datetime.now()
+    test_date: datetime = field(default_factory=now_cached)
+
+@dataclass(slots=True, eq=False)
+class DeviationBatch:
+    """Column-oriented batch of deviation calculations
+    
+    Holds one array per field so deviations over many results are computed
+    with vectorized NumPy operations. Rows are converted to Deviation objects
+    only when they are displayed.
+    """
+    sample_ids: np.ndarray
+    assayer_names: np.ndarray
+    gold_content: np.ndarray
+    benchmark_value: np.ndarray
+    test_date: np.ndarray
+    absolute_deviation: np.ndarray = field(init=False)
+    percentage_deviation: np.ndarray = field(init=False)
+    
+    def __post_init__(self):
+        # Signed percentage, matching get_deviations_from_benchmark
+        difference = self.gold_content - self.benchmark_value
+        self.absolute_deviation = np.abs(difference)
+        self.percentage_deviation = difference / self.benchmark_value * 100
+    
+    def __len__(self):
+        return len(self.sample_ids)
+    
+    @classmethod
+    def from_frame(cls, deviations_df):
+        """
+        Build a batch from a deviations DataFrame
+        
+        Args:
+            deviations_df: DataFrame with sample_id, assayer_name, gold_content,
+                benchmark_value and test_date columns
+            
+        Returns:
+            DeviationBatch: Batch holding the frame's rows
+        """
+        return cls(
+            sample_ids=deviations_df['sample_id'].to_numpy(dtype=object),
+            assayer_names=deviations_df['assayer_name'].to_numpy(dtype=object),
+            gold_content=deviations_df['gold_content'].to_numpy(dtype=np.float64),
+            benchmark_value=deviations_df['benchmark_value'].to_numpy(dtype=np.float64),
+            test_date=pd.to_datetime(deviations_df['test_date']).to_numpy(dtype='datetime64[s]'),
+        )
+    
+    def to_deviations(self, indices=None):
+        """
+        Convert rows of the batch to Deviation records
+        
+        Args:
+            indices: Optional row positions to convert; all rows by default
+            
+        Returns:
+            list: Deviation objects for the selected rows
+        """
+        rows = slice(None) if indices is None else np.asarray(indices)
+        # Columns in Deviation's field order
+        columns = zip(
+            self.sample_ids[rows].tolist(),
+            self.assayer_names[rows].tolist(),
+            self.gold_content[rows].tolist(),
+            self.benchmark_value[rows].tolist(),
+            self.absolute_deviation[rows].tolist(),
+            self.percentage_deviation[rows].tolist(),
+            self.test_date[rows].tolist(),
+        )
+        return [Deviation(*row) for row in columns]
+
+def records_to_json(records):
+    """
+    Serialize model records to JSON
+    
+    Uses orjson when it is installed, which encodes the slotted dataclasses
+    directly instead of going through asdict, and falls back to the standard
+    library otherwise.
+    
+    Args:
+        records: A single model instance or a list of them
+        
+    Returns:
+        bytes: JSON representation, with datetimes in ISO 8601 format
+    """
+    if orjson is not None:
+        return orjson.dumps(records)
+    if isinstance(records, list):
+        payload = [asdict(record) for record in records]
+    else:
+        payload = asdict(records)
+    return json.dumps(payload, default=datetime.isoformat, separators=(',', ':')).encode()
@@ -1,20 +1,223 @@
+import asyncio
+import atexit
+import functools
+import hashlib
 import json
 import os
+import random
+import threading
+import time
+import httpx
+import numpy as np
 import pandas as pd
-from typing import Dict, List
+from pandas.api.types import is_datetime64_any_dtype
+from typing import Dict, List, TypedDict
 
 # The newest OpenAI model is "gpt-4o" which was released May 13, 2024.
 # Do not change this unless explicitly requested by the user
-from openai import OpenAI
+from openai import AsyncOpenAI, NOT_GIVEN, APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
 
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 openai_client = None
 
-# Only initialize if API key is available
-if OPENAI_API_KEY:
-    openai_client = OpenAI(api_key=OPENAI_API_KEY)
+# Upper bound on each API call attempt, so one slow request cannot stall the dashboard
+REQUEST_TIMEOUT = 30
+
+# gpt-4o context window, the share of it a prompt may use, and the share the
+# per-assayer table may take before it is cut down to the largest deviations
+MODEL_CONTEXT_TOKENS = 128000
+PROMPT_TOKEN_LIMIT = int(MODEL_CONTEXT_TOKENS * 0.9)
+ASSAYER_TABLE_TOKEN_LIMIT = PROMPT_TOKEN_LIMIT // 4
 
-def analyze_with_openai(prompt, system_prompt="", max_tokens=800):
+# Transient errors are retried with randomized exponential backoff
+RETRY_ATTEMPTS = 5
+RETRY_MIN_WAIT = 1
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+
+def _get_client():
+    """
+    Create the shared OpenAI client on first use
+    
+    Returns:
+        AsyncOpenAI: The client, or None when no API key is configured
+    """
+    global openai_client
+    if openai_client is None and OPENAI_API_KEY:
+        # Keep-alive connections are reused across analyses; HTTP/2 (when h2
+        # is installed) multiplexes the concurrent requests over one connection
+        http_client = httpx.AsyncClient(
+            http2=h2 is not None,
+            limits=httpx.Limits(max_connections=8, max_keepalive_connections=8, keepalive_expiry=120),
+            timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=5.0)
+        )
+        # Retries are handled by _create_completion so they are not stacked with the SDK's own
+        openai_client = AsyncOpenAI(api_key=OPENAI_API_KEY, http_client=http_client, max_retries=0)
+        atexit.register(_close_client)
+    return openai_client
+
+def _close_client():
+    """Close the pooled connections on the loop that opened them"""
+    if openai_client is not None and _loop is not None and _loop.is_running():
+        try:
+            asyncio.run_coroutine_threadsafe(openai_client.close(), _loop).result(timeout=5)
+        except Exception as e:
+            print(f"Error closing OpenAI client: {str(e)}")
+
+# Responses are cached on disk so unchanged dashboards skip the API round-trip
+CACHE_DIR = ".openai_cache"
+CACHE_TTL = 86400
+CACHE_MEMORY_SIZE = 256
+CACHE_DISK_SIZE = 2 << 30
+_memory_cache = {}
+
+def _cache_key(*parts):
+    """Hash the request parameters into a cache file name"""
+    return hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=16).hexdigest()
+
+def _remember(key, entry):
+    """Insert an entry as most recently used, dropping the least recently used past the limit"""
+    _memory_cache[key] = entry
+    while len(_memory_cache) > CACHE_MEMORY_SIZE:
+        del _memory_cache[next(iter(_memory_cache))]
+
+def _cache_get(key):
+    """Return the cached response for key, or None when missing or expired"""
+    entry = _memory_cache.pop(key, None)
+    path = os.path.join(CACHE_DIR, key)
+    if entry is None:
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = (os.path.getmtime(path) + CACHE_TTL, f.read())
+        except OSError:
+            return None
+    if entry[0] < time.time():
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+    # Re-insert so the dict stays ordered from least to most recently used
+    _remember(key, entry)
+    return entry[1]
+
+def _prune_disk_cache():
+    """Delete expired cache files, then the oldest ones while the total exceeds CACHE_DISK_SIZE"""
+    expiry = time.time() - CACHE_TTL
+    files = []
+    total = 0
+    with os.scandir(CACHE_DIR) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            info = entry.stat()
+            if info.st_mtime < expiry:
+                os.remove(entry.path)
+                continue
+            files.append((info.st_mtime, info.st_size, entry.path))
+            total += info.st_size
+    if total > CACHE_DISK_SIZE:
+        for _, size, path in sorted(files):
+            os.remove(path)
+            total -= size
+            if total <= CACHE_DISK_SIZE:
+                break
+
+def _cache_set(key, text):
+    """Store a response in memory and on disk"""
+    _remember(key, (time.time() + CACHE_TTL, text))
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        path = os.path.join(CACHE_DIR, key)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(path + ".tmp", path)
+        _prune_disk_cache()
+    except OSError as e:
+        print(f"Error writing OpenAI cache: {str(e)}")
+
+# Event loop that owns the client's pooled connections, started on first use
+_loop = None
+_loop_lock = threading.Lock()
+
+def _get_loop():
+    """Return the background event loop used by the synchronous shims"""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="openai-assistant", daemon=True).start()
+    return _loop
+
+@functools.lru_cache(maxsize=1)
+def _encoding():
+    """Load the gpt-4o tokenizer once, or return None when tiktoken is unavailable"""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model("gpt-4o")
+    except Exception as e:
+        print(f"Error loading tokenizer: {str(e)}")
+        return None
+
+def _count_tokens(text):
+    """Count the tokens in text, estimating four characters per token without tiktoken"""
+    encoding = _encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    return len(encoding.encode(text))
+
+async def _cached_chunks(text):
+    """Replay a cached response as a single streamed chunk"""
+    yield text
+
+async def _stream_chunks(response, key):
+    """Yield the text deltas of a streamed completion and cache the full text"""
+    parts = []
+    try:
+        async for chunk in response:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                yield delta
+    finally:
+        await response.close()
+    if parts:
+        _cache_set(key, "".join(parts))
+
+async def _create_completion(client, **kwargs):
+    """
+    Create a chat completion, retrying rate limits, connection errors and 5xx responses
+    
+    Each attempt is limited to REQUEST_TIMEOUT seconds.
+    
+    Args:
+        client: The AsyncOpenAI client
+        **kwargs: Arguments for chat.completions.create
+        
+    Returns:
+        The chat completion, or a stream of chunks when stream=True
+    """
+    for attempt in range(1, RETRY_ATTEMPTS + 1):
+        try:
+            return await asyncio.wait_for(client.chat.completions.create(**kwargs), timeout=REQUEST_TIMEOUT)
+        except RETRYABLE_ERRORS as e:
+            if attempt == RETRY_ATTEMPTS:
+                raise
+            wait = max(RETRY_MIN_WAIT, random.uniform(0, RETRY_MIN_WAIT * 2 ** attempt))
+            print(f"OpenAI request failed ({type(e).__name__}), retrying in {wait:.1f}s (attempt {attempt + 1} of {RETRY_ATTEMPTS})")
+            await asyncio.sleep(wait)
+
+async def analyze_with_openai(prompt, system_prompt="", max_tokens=800, json_mode=False, stream=False):
     """
     Use OpenAI to analyze data based on a prompt
     
@@ -22,153 +225,278 @@ def analyze_with_openai(prompt, system_prompt="", max_tokens=800):
         prompt: The user prompt to send to OpenAI
         system_prompt: Optional system prompt for context
         max_tokens: Maximum number of tokens in the response
+        json_mode: Whether to require a JSON object as the response
+        stream: Whether to return the response as it is generated
         
     Returns:
-        str: OpenAI's response
+        str: OpenAI's response, or an async iterator of text chunks when stream is True
     """
     try:
-        if not OPENAI_API_KEY or not openai_client:
+        client = _get_client()
+        if client is None:
             raise ValueError("OpenAI API key not configured")
             
+        key = _cache_key("gpt-4o", max_tokens, json_mode, system_prompt, prompt)
+        cached = _cache_get(key)
+        if cached is not None:
+            return _cached_chunks(cached) if stream else cached
+            
+        # The response budget is capped by what the context window leaves after the prompt
+        prompt_tokens = _count_tokens(system_prompt) + _count_tokens(prompt)
+        print(f"OpenAI prompt size: {prompt_tokens} tokens")
+        if prompt_tokens > PROMPT_TOKEN_LIMIT:
+            raise ValueError(f"Prompt of {prompt_tokens} tokens exceeds the {PROMPT_TOKEN_LIMIT} token limit")
+        max_tokens = min(max_tokens, MODEL_CONTEXT_TOKENS - prompt_tokens - 32)
+        
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
         messages.append({"role": "user", "content": prompt})
         
-        response = openai_client.chat.completions.create(
+        response = await _create_completion(
+            client,
             model="gpt-4o",
             messages=messages,
             max_tokens=max_tokens,
-            temperature=0.2
+            temperature=0.2,
+            response_format={"type": "json_object"} if json_mode else NOT_GIVEN,
+            stream=stream
         )
         
-        return response.choices[0].message.content
+        if stream:
+            return _stream_chunks(response, key)
+            
+        content = response.choices[0].message.content
+        if content:
+            _cache_set(key, content)
+        return content
     except Exception as e:
         print(f"Error with OpenAI API: {str(e)}")
         raise e
 
-def analyze_deviation_data(deviations_df, time_period="Last 30 days"):
+# Shared system prompt; each chart analysis appends a one-line focus
+BASE_SYSTEM = (
+    "You are a data analyst for a gold testing laboratory. "
+    "Interpret the data objectively and do not give recommendations. "
+    "Use simple, direct language and stay under 100 words."
+)
+
+RECOMMENDATION_SYSTEM = (
+    "You are a quality specialist for a gold testing laboratory. "
+    "Explain what the performance data shows and give practical, data-driven suggestions to improve testing."
+)
+
+class AnalysisResult(TypedDict):
+    """Result of a chart analyzer: the statistics behind it and the narrative text"""
+    stats: dict
+    narrative: str
+
+STATS_TEMPLATE = """- Samples: {total_samples} ({unique_samples} unique sample IDs)
+- Assayers: {assayer_count}
+- Date range: {start_date:%Y-%m-%d} to {end_date:%Y-%m-%d}
+- Average deviation: {mean:.4f}%
+- Median deviation: {median:.4f}%
+- Standard deviation: {std:.4f}%
+- Range: {min:.4f}% to {max:.4f}%"""
+
+def format_stats(stats):
     """
-    Analyze deviations data and provide AI-generated insights
+    Render the summary statistics of an analysis result as Markdown
+    
+    Args:
+        stats: The stats entry of an AnalysisResult
+        
+    Returns:
+        str: Markdown bullet list, empty when there were no statistics
+    """
+    if not stats:
+        return ""
+    return STATS_TEMPLATE.format_map(stats['summary'])
+
+def _smallest(values, k=3):
+    """
+    Positions of the k smallest values in ascending order
+    
+    Uses a partial partition instead of sorting the whole array; NaN values come last.
+    
+    Args:
+        values: Array-like of numbers
+        k: Number of positions to return
+        
+    Returns:
+        numpy.ndarray: Up to k positional indices
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) > k:
+        positions = np.argpartition(values, k - 1)[:k]
+    else:
+        positions = np.arange(len(values))
+    return positions[np.argsort(values[positions], kind='stable')]
+
+def _ensure_datetime(deviations_df):
+    """
+    Parse the test_date column in place unless it is already datetime typed
     
     Args:
         deviations_df: DataFrame containing deviation data
-        time_period: Time period for context in the analysis
+    """
+    if not is_datetime64_any_dtype(deviations_df['test_date']):
+        deviations_df['test_date'] = pd.to_datetime(deviations_df['test_date'], cache=True, format='ISO8601')
+
+# Statistics from _precompute keyed by frame contents. A plain LRU rather than
+# st.cache_data, which needs a script run context the event loop thread lacks
+PRECOMPUTE_CACHE_SIZE = 32
+_precompute_cache = {}
+_precompute_lock = threading.Lock()
+
+def _frame_key(df):
+    """Hash a frame's column names, dtypes, index and values into a cache key"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr(list(zip(df.columns, map(str, df.dtypes)))).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def _precompute(deviations_df):
+    """
+    Compute the statistics shared by every analyzer, reusing earlier results
+    
+    Results are cached by the frame's contents, so Streamlit reruns over
+    unchanged data skip the pandas work entirely. The returned statistics
+    are shared between callers and must not be modified.
+    
+    Args:
+        deviations_df: DataFrame containing deviation data, with test_date
+            already parsed by _ensure_datetime
         
     Returns:
-        str: AI-generated analysis of the data
+        dict: summary (overall statistics), per_assayer (one row per assayer),
+            per_date (daily mean, sorted by date) and heatmap (assayer x day
+            matrix of mean deviations, NaN where an assayer has no tests that day)
     """
-    try:
-        if deviations_df.empty:
-            return "No deviation data available for analysis."
-            
-        # Calculate summary statistics
-        summary_stats = {
-            "total_samples": len(deviations_df),
-            "unique_samples": deviations_df['sample_id'].nunique(),
-            "assayer_count": deviations_df['assayer_name'].nunique(),
-            "date_range": f"{deviations_df['test_date'].min().strftime('%Y-%m-%d')} to {deviations_df['test_date'].max().strftime('%Y-%m-%d')}",
-            "average_deviation": deviations_df['percentage_deviation'].mean(),
-            "median_deviation": deviations_df['percentage_deviation'].median(),
-            "std_deviation": deviations_df['percentage_deviation'].std(),
-            "max_deviation": deviations_df['percentage_deviation'].max(),
-            "min_deviation": deviations_df['percentage_deviation'].min()
-        }
-        
-        # Get per-assayer statistics
-        assayer_stats = deviations_df.groupby('assayer_name')['percentage_deviation'].agg(['mean', 'std', 'count']).reset_index()
-        assayer_stats.columns = ['assayer_name', 'avg_deviation', 'std_deviation', 'sample_count']
-        
-        # Format the assayer statistics for the prompt
-        assayer_data = ""
-        for _, row in assayer_stats.iterrows():
-            assayer_data += f"- {row['assayer_name']}: Average Deviation = {row['avg_deviation']:.4f}%, Standard Deviation = {row['std_deviation']:.4f}%, Samples = {row['sample_count']}\n"
-        
-        prompt = f"""
-Analyze this gold assay deviation data covering {time_period}.
+    key = _frame_key(deviations_df)
+    with _precompute_lock:
+        stats = _precompute_cache.pop(key, None)
+        if stats is None:
+            stats = _compute_stats(deviations_df)
+        _precompute_cache[key] = stats
+        while len(_precompute_cache) > PRECOMPUTE_CACHE_SIZE:
+            del _precompute_cache[next(iter(_precompute_cache))]
+    return stats
+
+def _compute_stats(deviations_df):
+    """Compute the summary, per-assayer, per-date and heatmap statistics in a single pass"""
+    # Compact copies of just the grouped columns: categorical assayer names group
+    # by small integer codes and float32 halves the bytes every reduction reads
+    assayers = deviations_df['assayer_name'].astype('category')
+    deviations = deviations_df['percentage_deviation'].astype('float32')
+    test_dates = deviations_df['test_date']
+    days = test_dates.dt.floor('D')
+    
+    # Filter NaN once, then reduce the raw array instead of making five pandas calls
+    values = deviations.to_numpy()
+    values = values[~np.isnan(values)]
+    
+    summary = {
+        "total_samples": len(deviations_df),
+        "unique_samples": deviations_df['sample_id'].nunique(),
+        "assayer_count": len(assayers.cat.categories),
+        "start_date": test_dates.min(),
+        "end_date": test_dates.max(),
+        "mean": values.mean(dtype=np.float64) if values.size else np.nan,
+        "median": np.median(values) if values.size else np.nan,
+        "std": values.std(dtype=np.float64, ddof=1) if values.size > 1 else np.nan,
+        "min": values.min() if values.size else np.nan,
+        "max": values.max() if values.size else np.nan
+    }
+    
+    per_assayer = deviations.groupby(assayers, sort=False, observed=True).agg(
+        ['mean', 'std', 'count', 'min', 'max', 'median']
+    ).reset_index()
+    
+    return {
+        "summary": summary,
+        "per_assayer": per_assayer,
+        "per_date": deviations.groupby(days).mean(),
+        "heatmap": deviations.groupby([assayers, days], observed=True).mean().unstack()
+    }
+
+DEVIATION_PROMPT_TEMPLATE = """Analyze this gold assay deviation data covering {time_period}.
 
 Summary Statistics:
-- Total samples: {summary_stats['total_samples']}
-- Unique sample IDs: {summary_stats['unique_samples']}
-- Number of assayers: {summary_stats['assayer_count']}
-- Date range: {summary_stats['date_range']}
-- Average deviation: {summary_stats['average_deviation']:.4f}%
-- Median deviation: {summary_stats['median_deviation']:.4f}%
-- Standard deviation: {summary_stats['std_deviation']:.4f}%
-- Maximum deviation: {summary_stats['max_deviation']:.4f}%
-- Minimum deviation: {summary_stats['min_deviation']:.4f}%
+- Total samples: {total_samples}
+- Unique sample IDs: {unique_samples}
+- Number of assayers: {assayer_count}
+- Date range: {start_date:%Y-%m-%d} to {end_date:%Y-%m-%d}
+- Average deviation: {mean:.4f}%
+- Median deviation: {median:.4f}%
+- Standard deviation: {std:.4f}%
+- Maximum deviation: {max:.4f}%
+- Minimum deviation: {min:.4f}%
 
 Per-assayer statistics:
 {assayer_data}
+Task: Interpret these deviations, including patterns and notable outliers."""
 
-Task: Provide a brief, data-focused analysis of these deviations in gold assay testing. 
-Focus on explaining what the data means, not recommendations. 
-Analyze patterns, notable outliers, and how to interpret these figures.
-Keep your explanation clear and concise (maximum 100 words).
-"""
+def _deviation_prompts(stats, time_period):
+    """Build the user and system prompts for the deviation analysis"""
+    summary_stats = stats['summary']
+    assayer_stats = stats['per_assayer']
+    
+    # Format the assayer statistics for the prompt
+    rows = [
+        f"- {name}: Average Deviation = {mean:.4f}%, Standard Deviation = {std:.4f}%, Samples = {count}\n"
+        for name, mean, std, count in assayer_stats[['assayer_name', 'mean', 'std', 'count']].itertuples(index=False, name=None)
+    ]
+    assayer_data = "".join(rows)
+    
+    # Keep very large tables within budget by listing only the largest average deviations
+    table_tokens = _count_tokens(assayer_data)
+    if table_tokens > ASSAYER_TABLE_TOKEN_LIMIT:
+        keep = max(1, len(rows) * ASSAYER_TABLE_TOKEN_LIMIT // table_tokens)
+        positions = np.sort(_smallest(-np.abs(assayer_stats['mean'].to_numpy()), keep))
+        assayer_data = "".join(rows[i] for i in positions)
+        assayer_data += f"(Showing the {keep} of {len(rows)} assayers with the largest average deviation)\n"
+    
+    prompt = DEVIATION_PROMPT_TEMPLATE.format_map({**summary_stats, 'assayer_data': assayer_data, 'time_period': time_period})
 
-        system_prompt = """
-You are a data analyst for a gold testing laboratory. 
-Your task is to provide objective analysis of deviation data, explaining what the numbers represent.
-Avoid making recommendations - only interpret what the data shows.
-Use simple, direct language focusing on facts.
-Highlight key insights that help lab managers understand testing accuracy.
-"""
+    system_prompt = BASE_SYSTEM + " Focus: what the deviation figures say about testing accuracy."
 
-        # Call OpenAI API
-        analysis = analyze_with_openai(prompt, system_prompt, max_tokens=300)
-        return analysis
-    
-    except Exception as e:
-        # Return a fallback statistical analysis
-        return generate_statistical_analysis(deviations_df)
+    return prompt, system_prompt
 
-def analyze_heatmap(deviations_df, time_period="Last 30 days"):
+async def analyze_deviation_data(deviations_df, time_period="Last 30 days", precomputed=None):
     """
-    Analyze the deviation heatmap and provide insights
+    Analyze deviations data and provide AI-generated insights
     
     Args:
         deviations_df: DataFrame containing deviation data
         time_period: Time period for context in the analysis
+        precomputed: Optional result of _precompute to reuse
         
     Returns:
-        str: AI-generated analysis of the heatmap
+        AnalysisResult: Statistics used and AI-generated analysis of the data
     """
+    stats = precomputed
     try:
         if deviations_df.empty:
-            return "No data available for heatmap analysis."
+            return AnalysisResult(stats={}, narrative="No deviation data available for analysis.")
             
-        # Create a summary of what the heatmap is showing
-        pivot_ready = deviations_df.copy()
-        pivot_ready['test_date'] = pd.to_datetime(pivot_ready['test_date']).dt.date
-        
-        # Group by assayer and date, calculating mean deviation
-        heatmap_data = pivot_ready.groupby(['assayer_name', 'test_date'])['percentage_deviation'].mean().reset_index()
-        
-        # Calculate overall statistics for different time periods
-        overall_avg = heatmap_data['percentage_deviation'].mean()
-        overall_max = heatmap_data['percentage_deviation'].max()
-        overall_min = heatmap_data['percentage_deviation'].min()
-        
-        # Identify assayers with highest and lowest average deviations
-        assayer_avg = heatmap_data.groupby('assayer_name')['percentage_deviation'].mean()
-        highest_assayer = assayer_avg.idxmax()
-        highest_avg = assayer_avg.max()
-        lowest_assayer = assayer_avg.idxmin()
-        lowest_avg = assayer_avg.min()
-        
-        # Find dates with highest deviation
-        date_avg = heatmap_data.groupby('test_date')['percentage_deviation'].mean()
-        if not date_avg.empty:
-            highest_date = date_avg.idxmax()
-            highest_date_avg = date_avg.max()
-        else:
-            highest_date = "No data"
-            highest_date_avg = 0
-            
-        # Create prompt for OpenAI
-        prompt = f"""
-Analyze this gold assay deviation heatmap data covering {time_period}.
+        _ensure_datetime(deviations_df)
+        if stats is None:
+            stats = _precompute(deviations_df)
+        if _get_client() is None:
+            # Skip building a prompt that could not be sent
+            raise ValueError("OpenAI API key not configured")
+        prompt, system_prompt = _deviation_prompts(stats, time_period)
+
+        # Call OpenAI API
+        analysis = await analyze_with_openai(prompt, system_prompt, max_tokens=300)
+        return AnalysisResult(stats=stats, narrative=analysis)
+    
+    except Exception as e:
+        # Return a fallback statistical analysis
+        return AnalysisResult(stats=stats or {}, narrative=generate_statistical_analysis(deviations_df, precomputed=stats))
+
+HEATMAP_PROMPT_TEMPLATE = """Analyze this gold assay deviation heatmap data covering {time_period}.
 
 The heatmap shows percentage deviations from benchmark assayer across different dates and assayers.
 
@@ -180,81 +508,95 @@ Key statistics:
 - Assayer with lowest average deviation: {lowest_assayer} ({lowest_avg:.4f}%)
 - Date with highest average deviation: {highest_date} ({highest_date_avg:.4f}%)
 
-Number of assayers: {len(deviations_df['assayer_name'].unique())}
-Date range: {deviations_df['test_date'].min().strftime('%Y-%m-%d')} to {deviations_df['test_date'].max().strftime('%Y-%m-%d')}
+Number of assayers: {assayer_count}
+Date range: {start_date:%Y-%m-%d} to {end_date:%Y-%m-%d}
 
-Task: Provide a brief, data-focused analysis of what the heatmap visualization shows. 
-Explain what the colors represent and how to interpret the patterns. 
-Focus only on explaining what the data means, not recommendations.
-Keep your explanation clear and concise (maximum 100 words).
-"""
-
-        system_prompt = """
-You are a data visualization expert for a gold testing laboratory. 
-Your task is to provide objective analysis of heatmap data, explaining what the visualization shows.
-Avoid making recommendations - only interpret what the data shows.
-Use simple, direct language focusing on facts.
-Explain what the colors and patterns in a heatmap mean in this context.
-"""
+Task: Explain what the heatmap colors represent and how to read its patterns."""
 
-        # Call OpenAI API
-        analysis = analyze_with_openai(prompt, system_prompt, max_tokens=300)
-        return analysis
+def _heatmap_prompts(stats, time_period):
+    """Build the user and system prompts for the heatmap analysis"""
+    summary_stats = stats['summary']
     
-    except Exception as e:
-        # Return a fallback analysis
-        return generate_heatmap_analysis(deviations_df)
-
-def analyze_trend_chart(deviations_df, ma_window=7, time_period="Last 90 days"):
+    # Mean deviation per assayer (rows) and date (columns), as shown in the heatmap cells
+    heatmap_matrix = stats['heatmap']
+    cells = heatmap_matrix.to_numpy()
+    
+    # Calculate overall statistics for different time periods
+    overall_avg = np.nanmean(cells)
+    overall_max = np.nanmax(cells)
+    overall_min = np.nanmin(cells)
+    
+    # Identify assayers with highest and lowest average deviations
+    assayer_avg = heatmap_matrix.mean(axis=1)
+    highest_assayer = assayer_avg.idxmax()
+    highest_avg = assayer_avg.max()
+    lowest_assayer = assayer_avg.idxmin()
+    lowest_avg = assayer_avg.min()
+    
+    # Find dates with highest deviation
+    date_avg = heatmap_matrix.mean(axis=0)
+    if not date_avg.empty:
+        highest_date = date_avg.idxmax().strftime('%Y-%m-%d')
+        highest_date_avg = date_avg.max()
+    else:
+        highest_date = "No data"
+        highest_date_avg = 0
+        
+    # Create prompt for OpenAI
+    prompt = HEATMAP_PROMPT_TEMPLATE.format_map({
+        'time_period': time_period,
+        'overall_avg': overall_avg,
+        'overall_max': overall_max,
+        'overall_min': overall_min,
+        'highest_assayer': highest_assayer,
+        'highest_avg': highest_avg,
+        'lowest_assayer': lowest_assayer,
+        'lowest_avg': lowest_avg,
+        'highest_date': highest_date,
+        'highest_date_avg': highest_date_avg,
+        'assayer_count': summary_stats['assayer_count'],
+        'start_date': summary_stats['start_date'],
+        'end_date': summary_stats['end_date'],
+    })
+
+    system_prompt = BASE_SYSTEM + " Focus: heatmap colors and patterns across assayers and dates."
+
+    return prompt, system_prompt
+
+async def analyze_heatmap(deviations_df, time_period="Last 30 days", precomputed=None):
     """
-    Analyze the moving average trend chart and provide insights
+    Analyze the deviation heatmap and provide insights
     
     Args:
         deviations_df: DataFrame containing deviation data
-        ma_window: Size of the moving average window
         time_period: Time period for context in the analysis
+        precomputed: Optional result of _precompute to reuse
         
     Returns:
-        str: AI-generated analysis of the trend chart
+        AnalysisResult: Statistics used and AI-generated analysis of the heatmap
     """
+    stats = precomputed
     try:
         if deviations_df.empty:
-            return "No data available for trend analysis."
-            
-        # Create a summary of the trend data
-        trend_data = deviations_df.copy()
-        trend_data['test_date'] = pd.to_datetime(trend_data['test_date'])
-        
-        # Sort by date for proper trend analysis
-        trend_data = trend_data.sort_values('test_date')
-        
-        # Calculate overall trend statistics
-        start_date = trend_data['test_date'].min().strftime('%Y-%m-%d')
-        end_date = trend_data['test_date'].max().strftime('%Y-%m-%d')
-        
-        # Calculate moving average for overall data
-        overall_daily = trend_data.groupby(trend_data['test_date'].dt.date)['percentage_deviation'].mean()
-        
-        # Check if we have enough data for moving average
-        if len(overall_daily) >= ma_window:
-            overall_ma = overall_daily.rolling(window=ma_window).mean()
-            
-            # Calculate trend direction
-            first_valid_ma = overall_ma.dropna().iloc[0] if not overall_ma.dropna().empty else 0
-            last_ma = overall_ma.iloc[-1] if not overall_ma.empty else 0
-            trend_direction = "improving" if last_ma < first_valid_ma else "worsening" if last_ma > first_valid_ma else "stable"
-            trend_change = abs(last_ma - first_valid_ma)
-            
-            # Calculate volatility
-            volatility = overall_daily.std()
-            
-            # Detect any pattern changes
-            ma_diff = overall_ma.diff()
-            sign_changes = ((ma_diff > 0) != (ma_diff.shift(1) > 0)).sum()
-            has_pattern_changes = sign_changes > 2
+            return AnalysisResult(stats={}, narrative="No data available for heatmap analysis.")
             
-            prompt = f"""
-Analyze this gold assay moving average trend chart data covering {time_period}.
+        _ensure_datetime(deviations_df)
+        if stats is None:
+            stats = _precompute(deviations_df)
+        if _get_client() is None:
+            # Skip building a prompt that could not be sent
+            raise ValueError("OpenAI API key not configured")
+        prompt, system_prompt = _heatmap_prompts(stats, time_period)
+
+        # Call OpenAI API
+        analysis = await analyze_with_openai(prompt, system_prompt, max_tokens=300)
+        return AnalysisResult(stats=stats, narrative=analysis)
+    
+    except Exception as e:
+        # Return a fallback analysis
+        return AnalysisResult(stats=stats or {}, narrative=generate_heatmap_analysis(deviations_df, precomputed=stats))
+
+TREND_PROMPT_TEMPLATE = """Analyze this gold assay moving average trend chart data covering {time_period}.
 
 The chart shows a {ma_window}-day moving average of percentage deviations from the benchmark assayer.
 
@@ -264,104 +606,106 @@ Trend statistics:
 - Change magnitude: {trend_change:.4f}%
 - Volatility (standard deviation): {volatility:.4f}%
 - Number of trend direction changes: {sign_changes}
-- Pattern stability: {"Multiple changes detected" if has_pattern_changes else "Relatively stable"}
+- Pattern stability: {pattern_stability}
 
-Task: Provide a brief, data-focused analysis of what the moving average trend chart shows. 
-Explain what the line represents and how to interpret its movement over time.
-Focus only on explaining what the data means, not recommendations.
-Keep your explanation clear and concise (maximum 100 words).
-"""
-        else:
-            prompt = f"""
-Analyze this gold assay data covering {time_period}.
+Task: Explain what the trend line represents and how to read its movement over time."""
 
-Not enough data points ({len(overall_daily)}) for a {ma_window}-day moving average trend chart.
-Date range: {start_date} to {end_date}
+# Used when there are fewer days than the moving average window
+TREND_SHORT_PROMPT_TEMPLATE = """Analyze this gold assay data covering {time_period}.
 
-Task: Provide a brief, data-focused explanation about what a moving average trend chart would show
-if there were sufficient data, and how it would be useful for monitoring gold assay deviations.
-Focus only on explaining what the data would mean, not recommendations.
-Keep your explanation clear and concise (maximum 100 words).
-"""
+Not enough data points ({day_count}) for a {ma_window}-day moving average trend chart.
+Date range: {start_date} to {end_date}
 
-        system_prompt = """
-You are a time-series data analyst for a gold testing laboratory. 
-Your task is to provide objective analysis of trend chart data, explaining what the visualization shows.
-Avoid making recommendations - only interpret what the data shows.
-Use simple, direct language focusing on facts.
-Explain what the movement in a trend line means in this context.
-"""
+Task: Explain what this trend chart would show with enough data and why it helps monitor deviations."""
 
-        # Call OpenAI API
-        analysis = analyze_with_openai(prompt, system_prompt, max_tokens=300)
-        return analysis
+def _trend_prompts(stats, ma_window, time_period):
+    """Build the user and system prompts for the trend chart analysis"""
+    # Calculate overall trend statistics
+    start_date = stats['summary']['start_date'].strftime('%Y-%m-%d')
+    end_date = stats['summary']['end_date'].strftime('%Y-%m-%d')
     
-    except Exception as e:
-        # Return a fallback analysis
-        return generate_trend_analysis(deviations_df, ma_window)
-
-def analyze_distribution_chart(deviations_df, time_period="Last 90 days"):
+    # Daily mean deviation in date order, the input to the moving average
+    overall_daily = stats['per_date']
+    
+    # Check if we have enough data for moving average
+    if len(overall_daily) >= ma_window:
+        # Full windows only, like rolling(window=ma_window).mean() without its leading NaNs
+        overall_ma = np.convolve(overall_daily.to_numpy(np.float64), np.full(ma_window, 1.0 / ma_window), mode='valid')
+        
+        # Calculate trend direction
+        valid_ma = overall_ma[~np.isnan(overall_ma)]
+        first_valid_ma = valid_ma[0] if valid_ma.size else 0
+        last_ma = overall_ma[-1]
+        trend_direction = "improving" if last_ma < first_valid_ma else "worsening" if last_ma > first_valid_ma else "stable"
+        trend_change = abs(last_ma - first_valid_ma)
+        
+        # Calculate volatility
+        volatility = overall_daily.std()
+        
+        # Detect any pattern changes: flips between rising and not rising
+        rising = np.diff(overall_ma) > 0
+        sign_changes = np.count_nonzero(np.diff(rising, prepend=False))
+        has_pattern_changes = sign_changes > 2
+        
+        prompt = TREND_PROMPT_TEMPLATE.format_map({
+            'time_period': time_period,
+            'ma_window': ma_window,
+            'start_date': start_date,
+            'end_date': end_date,
+            'trend_direction': trend_direction,
+            'trend_change': trend_change,
+            'volatility': volatility,
+            'sign_changes': sign_changes,
+            'pattern_stability': "Multiple changes detected" if has_pattern_changes else "Relatively stable",
+        })
+    else:
+        prompt = TREND_SHORT_PROMPT_TEMPLATE.format_map({
+            'time_period': time_period,
+            'ma_window': ma_window,
+            'day_count': len(overall_daily),
+            'start_date': start_date,
+            'end_date': end_date,
+        })
+
+    system_prompt = BASE_SYSTEM + " Focus: movement of a moving-average trend line."
+
+    return prompt, system_prompt
+
+async def analyze_trend_chart(deviations_df, ma_window=7, time_period="Last 90 days", precomputed=None):
     """
-    Analyze the deviation distribution chart and provide insights
+    Analyze the moving average trend chart and provide insights
     
     Args:
         deviations_df: DataFrame containing deviation data
+        ma_window: Size of the moving average window
         time_period: Time period for context in the analysis
+        precomputed: Optional result of _precompute to reuse
         
     Returns:
-        str: AI-generated analysis of the distribution chart
+        AnalysisResult: Statistics used and AI-generated analysis of the trend chart
     """
+    stats = precomputed
     try:
         if deviations_df.empty:
-            return "No data available for distribution analysis."
-            
-        # Create a summary of the distribution data
-        distribution_data = deviations_df.copy()
-        
-        # Calculate overall statistics
-        overall_mean = distribution_data['percentage_deviation'].mean()
-        overall_median = distribution_data['percentage_deviation'].median()
-        overall_std = distribution_data['percentage_deviation'].std()
-        overall_min = distribution_data['percentage_deviation'].min()
-        overall_max = distribution_data['percentage_deviation'].max()
-        
-        # Calculate per-assayer statistics
-        assayer_stats = distribution_data.groupby('assayer_name')['percentage_deviation'].agg(['mean', 'median', 'std', 'min', 'max']).reset_index()
-        
-        # Find assayers with highest and lowest standard deviations
-        if not assayer_stats.empty:
-            most_consistent_idx = assayer_stats['std'].idxmin()
-            most_consistent = assayer_stats.iloc[most_consistent_idx]
+            return AnalysisResult(stats={}, narrative="No data available for trend analysis.")
             
-            least_consistent_idx = assayer_stats['std'].idxmax()
-            least_consistent = assayer_stats.iloc[least_consistent_idx]
-            
-            # Get number of assayers with high/low standard deviations
-            high_std_count = (assayer_stats['std'] > overall_std).sum()
-            low_std_count = (assayer_stats['std'] <= overall_std).sum()
-            
-            # Create assayer details for the prompt
-            assayer_details = f"""
-Most consistent assayer: {most_consistent['assayer_name']}
-- Mean: {most_consistent['mean']:.4f}%
-- Median: {most_consistent['median']:.4f}%
-- Standard Deviation: {most_consistent['std']:.4f}%
-- Range: {most_consistent['min']:.4f}% to {most_consistent['max']:.4f}%
-
-Least consistent assayer: {least_consistent['assayer_name']}
-- Mean: {least_consistent['mean']:.4f}%
-- Median: {least_consistent['median']:.4f}%
-- Standard Deviation: {least_consistent['std']:.4f}%
-- Range: {least_consistent['min']:.4f}% to {least_consistent['max']:.4f}%
+        _ensure_datetime(deviations_df)
+        if stats is None:
+            stats = _precompute(deviations_df)
+        if _get_client() is None:
+            # Skip building a prompt that could not be sent
+            raise ValueError("OpenAI API key not configured")
+        prompt, system_prompt = _trend_prompts(stats, ma_window, time_period)
 
-- Number of assayers with above-average spread: {high_std_count}
-- Number of assayers with below-average spread: {low_std_count}
-"""
-        else:
-            assayer_details = "Insufficient data for per-assayer statistics."
-            
-        prompt = f"""
-Analyze this gold assay deviation distribution chart data covering {time_period}.
+        # Call OpenAI API
+        analysis = await analyze_with_openai(prompt, system_prompt, max_tokens=300)
+        return AnalysisResult(stats=stats, narrative=analysis)
+    
+    except Exception as e:
+        # Return a fallback analysis
+        return AnalysisResult(stats=stats or {}, narrative=generate_trend_analysis(deviations_df, ma_window, precomputed=stats))
+
+DISTRIBUTION_PROMPT_TEMPLATE = """Analyze this gold assay deviation distribution chart data covering {time_period}.
 
 The chart shows the distribution of deviations from the benchmark assayer.
 
@@ -374,142 +718,510 @@ Overall statistics:
 Assayer-specific insights:
 {assayer_details}
 
-Task: Provide a brief, data-focused analysis of what the distribution chart shows.
-Explain what the box plots represent and how to interpret the spread and central tendencies.
-Focus only on explaining what the data means, not recommendations.
-Keep your explanation clear and concise (maximum 100 words).
-"""
+Task: Explain what the box plots show about each assayer's spread and central tendency."""
+
+# Per-assayer rows ('most' and 'least') are looked up by column name
+DISTRIBUTION_DETAILS_TEMPLATE = """
+Most consistent assayer: {most[assayer_name]}
+- Mean: {most[mean]:.4f}%
+- Median: {most[median]:.4f}%
+- Standard Deviation: {most[std]:.4f}%
+- Range: {most[min]:.4f}% to {most[max]:.4f}%
+
+Least consistent assayer: {least[assayer_name]}
+- Mean: {least[mean]:.4f}%
+- Median: {least[median]:.4f}%
+- Standard Deviation: {least[std]:.4f}%
+- Range: {least[min]:.4f}% to {least[max]:.4f}%
 
-        system_prompt = """
-You are a statistical analyst for a gold testing laboratory. 
-Your task is to provide objective analysis of distribution data, explaining what the visualization shows.
-Avoid making recommendations - only interpret what the data shows.
-Use simple, direct language focusing on facts.
-Explain what box plots tell us about data distributions in this context.
+- Number of assayers with above-average spread: {high_std_count}
+- Number of assayers with below-average spread: {low_std_count}
 """
 
-        # Call OpenAI API
-        analysis = analyze_with_openai(prompt, system_prompt, max_tokens=300)
-        return analysis
+def _distribution_prompts(stats, time_period):
+    """Build the user and system prompts for the distribution chart analysis"""
+    # Overall statistics
+    overall_mean = stats['summary']['mean']
+    overall_median = stats['summary']['median']
+    overall_std = stats['summary']['std']
+    overall_min = stats['summary']['min']
+    overall_max = stats['summary']['max']
     
-    except Exception as e:
-        # Return a fallback analysis
-        return generate_distribution_analysis(deviations_df)
+    assayer_stats = stats['per_assayer']
+    
+    # Find assayers with highest and lowest standard deviations
+    if not assayer_stats.empty:
+        std_values = assayer_stats['std'].to_numpy()
+        most_consistent = assayer_stats.iloc[np.nanargmin(std_values)]
+        least_consistent = assayer_stats.iloc[np.nanargmax(std_values)]
+        
+        # Get number of assayers with high/low standard deviations
+        high_std_count = (assayer_stats['std'] > overall_std).sum()
+        low_std_count = (assayer_stats['std'] <= overall_std).sum()
+        
+        # Create assayer details for the prompt
+        assayer_details = DISTRIBUTION_DETAILS_TEMPLATE.format_map({
+            'most': most_consistent,
+            'least': least_consistent,
+            'high_std_count': high_std_count,
+            'low_std_count': low_std_count,
+        })
+    else:
+        assayer_details = "Insufficient data for per-assayer statistics."
+        
+    prompt = DISTRIBUTION_PROMPT_TEMPLATE.format_map({
+        'time_period': time_period,
+        'overall_mean': overall_mean,
+        'overall_median': overall_median,
+        'overall_std': overall_std,
+        'overall_min': overall_min,
+        'overall_max': overall_max,
+        'assayer_details': assayer_details.strip(),
+    })
+
+    system_prompt = BASE_SYSTEM + " Focus: what box plots reveal about the distributions."
+
+    return prompt, system_prompt
 
-def generate_performance_recommendations(deviations_df, time_period="Last 90 days"):
+async def analyze_distribution_chart(deviations_df, time_period="Last 90 days", precomputed=None):
     """
-    Generate specific recommendations for improving assayer performance
+    Analyze the deviation distribution chart and provide insights
     
     Args:
         deviations_df: DataFrame containing deviation data
         time_period: Time period for context in the analysis
+        precomputed: Optional result of _precompute to reuse
         
     Returns:
-        str: AI-generated recommendations
+        AnalysisResult: Statistics used and AI-generated analysis of the distribution chart
     """
+    stats = precomputed
     try:
         if deviations_df.empty:
-            return "No data available for performance analysis."
-            
-        # Calculate per-assayer statistics
-        assayer_stats = deviations_df.groupby('assayer_name')['percentage_deviation'].agg(['mean', 'std', 'count', 'min', 'max']).reset_index()
-        
-        # Calculate overall statistics
-        overall_stats = {
-            'mean': deviations_df['percentage_deviation'].mean(),
-            'std': deviations_df['percentage_deviation'].std(),
-            'count': len(deviations_df),
-            'min': deviations_df['percentage_deviation'].min(),
-            'max': deviations_df['percentage_deviation'].max(),
-        }
-        
-        # Identify assayers with various performance characteristics
-        if not assayer_stats.empty:
-            high_bias = assayer_stats[assayer_stats['mean'].abs() > overall_stats['mean'] * 1.5]
-            high_variance = assayer_stats[assayer_stats['std'] > overall_stats['std'] * 1.5]
-            low_sample_count = assayer_stats[assayer_stats['count'] < assayer_stats['count'].median() / 2]
+            return AnalysisResult(stats={}, narrative="No data available for distribution analysis.")
             
-            # Create statistics summaries for the prompt
-            assayer_details = f"""
+        _ensure_datetime(deviations_df)
+        if stats is None:
+            stats = _precompute(deviations_df)
+        if _get_client() is None:
+            # Skip building a prompt that could not be sent
+            raise ValueError("OpenAI API key not configured")
+        prompt, system_prompt = _distribution_prompts(stats, time_period)
+
+        # Call OpenAI API
+        analysis = await analyze_with_openai(prompt, system_prompt, max_tokens=300)
+        return AnalysisResult(stats=stats, narrative=analysis)
+    
+    except Exception as e:
+        # Return a fallback analysis
+        return AnalysisResult(stats=stats or {}, narrative=generate_distribution_analysis(deviations_df, precomputed=stats))
+
+RECOMMENDATION_PROMPT_TEMPLATE = """Analyze gold assay performance data covering {time_period}.
+
+{assayer_details}
+
+Task: In 200-250 words, suggest (1) steps to improve accuracy, (2) ways to improve consistency among assayers and (3) training needs these patterns point to."""
+
+RECOMMENDATION_DETAILS_TEMPLATE = """
 Overall Statistics:
-- Average deviation: {overall_stats['mean']:.4f}%
-- Overall standard deviation: {overall_stats['std']:.4f}%
-- Range: {overall_stats['min']:.4f}% to {overall_stats['max']:.4f}%
-- Total samples: {overall_stats['count']}
+- Average deviation: {mean:.4f}%
+- Overall standard deviation: {std:.4f}%
+- Range: {min:.4f}% to {max:.4f}%
+- Total samples: {count}
 
 Performance Categories:
-- Assayers with high bias: {len(high_bias)} assayers
-- Assayers with high variance: {len(high_variance)} assayers
-- Assayers with low sample counts: {len(low_sample_count)} assayers
+- Assayers with high bias: {high_bias_count} assayers
+- Assayers with high variance: {high_variance_count} assayers
+- Assayers with low sample counts: {low_sample_count} assayers
 """
-            
-            # Add specific assayer details
-            assayer_details += "\nTop 3 assayers by performance metrics:\n"
-            
-            # Sort by absolute mean (lowest bias)
-            best_accuracy = assayer_stats.iloc[assayer_stats['mean'].abs().argsort()[:3]]
-            for _, row in best_accuracy.iterrows():
-                assayer_details += f"- {row['assayer_name']}: mean dev = {row['mean']:.4f}%, std dev = {row['std']:.4f}%, samples = {row['count']}\n"
-                
-            # Sort by std (lowest first - most consistent)
-            best_consistency = assayer_stats.iloc[assayer_stats['std'].argsort()[:3]]
-            assayer_details += "\nMost consistent assayers:\n"
-            for _, row in best_consistency.iterrows():
-                assayer_details += f"- {row['assayer_name']}: std dev = {row['std']:.4f}%, mean dev = {row['mean']:.4f}%, samples = {row['count']}\n"
-        else:
-            assayer_details = "Insufficient data for per-assayer statistics."
-            
-        prompt = f"""
-Analyze gold assay performance data covering {time_period}.
 
-{assayer_details}
+def _recommendation_prompts(stats, time_period):
+    """Build the user and system prompts for the performance recommendations"""
+    assayer_stats = stats['per_assayer']
+    
+    # Overall statistics
+    summary_stats = stats['summary']
+    overall_stats = {
+        'mean': summary_stats['mean'],
+        'std': summary_stats['std'],
+        'count': summary_stats['total_samples'],
+        'min': summary_stats['min'],
+        'max': summary_stats['max'],
+    }
+    
+    # Identify assayers with various performance characteristics
+    if not assayer_stats.empty:
+        high_bias = assayer_stats[assayer_stats['mean'].abs() > overall_stats['mean'] * 1.5]
+        high_variance = assayer_stats[assayer_stats['std'] > overall_stats['std'] * 1.5]
+        low_sample_count = assayer_stats[assayer_stats['count'] < assayer_stats['count'].median() / 2]
+        
+        # Create statistics summaries for the prompt
+        assayer_details = RECOMMENDATION_DETAILS_TEMPLATE.format_map({
+            **overall_stats,
+            'high_bias_count': len(high_bias),
+            'high_variance_count': len(high_variance),
+            'low_sample_count': len(low_sample_count),
+        })
+        
+        # Add specific assayer details
+        assayer_details += "\nTop 3 assayers by performance metrics:\n"
+        
+        # Sort by absolute mean (lowest bias)
+        best_accuracy = assayer_stats.iloc[_smallest(np.abs(assayer_stats['mean'].to_numpy()))]
+        assayer_details += "".join(
+            f"- {name}: mean dev = {mean:.4f}%, std dev = {std:.4f}%, samples = {count}\n"
+            for name, mean, std, count in best_accuracy[['assayer_name', 'mean', 'std', 'count']].itertuples(index=False, name=None)
+        )
+            
+        # Sort by std (lowest first - most consistent)
+        best_consistency = assayer_stats.iloc[_smallest(assayer_stats['std'].to_numpy())]
+        assayer_details += "\nMost consistent assayers:\n"
+        assayer_details += "".join(
+            f"- {name}: std dev = {std:.4f}%, mean dev = {mean:.4f}%, samples = {count}\n"
+            for name, mean, std, count in best_consistency[['assayer_name', 'mean', 'std', 'count']].itertuples(index=False, name=None)
+        )
+    else:
+        assayer_details = "Insufficient data for per-assayer statistics."
+        
+    prompt = RECOMMENDATION_PROMPT_TEMPLATE.format_map({'time_period': time_period, 'assayer_details': assayer_details.strip()})
 
-Task: Analyze this performance data and provide specific suggestions for:
-1. Practical steps to improve overall assayer accuracy
-2. Techniques to improve consistency among assayers
-3. Potential training needs based on the observed patterns
+    system_prompt = RECOMMENDATION_SYSTEM
 
-Focus on clear explanations of what the data means for the laboratory's operations.
-Provide concise, actionable insights based on data patterns (200-250 words).
-"""
+    return prompt, system_prompt
 
-        system_prompt = """
-You are a gold testing laboratory quality specialist.
-Your task is to provide data-centric analysis and practical suggestions for improvement.
-Use direct language focusing on clear explanations of what the data shows.
-Offer practical ideas that would help lab managers improve testing processes.
-Balance between explanation and actionable insights.
-"""
+async def generate_performance_recommendations(deviations_df, time_period="Last 90 days", precomputed=None):
+    """
+    Generate specific recommendations for improving assayer performance
+    
+    Args:
+        deviations_df: DataFrame containing deviation data
+        time_period: Time period for context in the analysis
+        precomputed: Optional result of _precompute to reuse
+        
+    Returns:
+        AnalysisResult: Statistics used and AI-generated recommendations
+    """
+    stats = precomputed
+    try:
+        if deviations_df.empty:
+            return AnalysisResult(stats={}, narrative="No data available for performance analysis.")
+            
+        _ensure_datetime(deviations_df)
+        if stats is None:
+            stats = _precompute(deviations_df)
+        if _get_client() is None:
+            # Skip building a prompt that could not be sent
+            raise ValueError("OpenAI API key not configured")
+        prompt, system_prompt = _recommendation_prompts(stats, time_period)
 
         # Call OpenAI API
-        recommendations = analyze_with_openai(prompt, system_prompt, max_tokens=500)
-        return recommendations
+        recommendations = await analyze_with_openai(prompt, system_prompt, max_tokens=500)
+        return AnalysisResult(stats=stats, narrative=recommendations)
     
     except Exception as e:
         # Return a fallback analysis
-        return generate_recommendation_fallback(deviations_df)
+        return AnalysisResult(stats=stats or {}, narrative=generate_recommendation_fallback(deviations_df, precomputed=stats))
+
+# Keys of the combined dashboard analysis, in the order the sub-tasks are listed
+DASHBOARD_KEYS = ("deviation", "heatmap", "trend", "distribution", "recommendations")
+
+DASHBOARD_SYSTEM_PROMPT = (
+    "You will receive five numbered analysis tasks, each with its own data. "
+    "Tasks 1-4 follow these rules: " + BASE_SYSTEM + " "
+    "Task 5 follows its own instructions. "
+    'Respond with a single JSON object with the string keys "deviation" (task 1), "heatmap" (task 2), '
+    '"trend" (task 3), "distribution" (task 4) and "recommendations" (task 5), each holding Markdown text.'
+)
+
+# Response budget of each section when it is requested on its own
+SECTION_MAX_TOKENS = {"deviation": 300, "heatmap": 300, "trend": 300, "distribution": 300, "recommendations": 500}
+
+# Seconds between status checks while a batch job is running
+BATCH_POLL_INTERVAL = 60
+
+def _section_prompts(stats, time_period, ma_window):
+    """Build the (prompt, system_prompt) pair of every section, in DASHBOARD_KEYS order"""
+    return (
+        _deviation_prompts(stats, time_period),
+        _heatmap_prompts(stats, time_period),
+        _trend_prompts(stats, ma_window, time_period),
+        _distribution_prompts(stats, time_period),
+        _recommendation_prompts(stats, time_period),
+    )
+
+def _section_fallbacks(deviations_df, ma_window, precomputed=None):
+    """Map each section key to a callable producing its local fallback analysis"""
+    return {
+        "deviation": lambda: generate_statistical_analysis(deviations_df, precomputed=precomputed),
+        "heatmap": lambda: generate_heatmap_analysis(deviations_df, precomputed=precomputed),
+        "trend": lambda: generate_trend_analysis(deviations_df, ma_window, precomputed=precomputed),
+        "distribution": lambda: generate_distribution_analysis(deviations_df, precomputed=precomputed),
+        "recommendations": lambda: generate_recommendation_fallback(deviations_df, precomputed=precomputed),
+    }
+
+async def analyze_dashboard(deviations_df, time_period="Last 90 days", ma_window=7):
+    """
+    Analyze every dashboard chart with a single OpenAI request
+    
+    Args:
+        deviations_df: DataFrame containing deviation data
+        time_period: Time period for context in the analysis
+        ma_window: Size of the moving average window
+        
+    Returns:
+        dict: Analysis text keyed by deviation, heatmap, trend, distribution and recommendations
+    """
+    if deviations_df.empty:
+        return {key: "No data available for analysis." for key in DASHBOARD_KEYS}
+        
+    if _get_client() is None:
+        fallbacks = _section_fallbacks(deviations_df, ma_window)
+        return {key: fallbacks[key]() for key in DASHBOARD_KEYS}
+        
+    stats = None
+    try:
+        _ensure_datetime(deviations_df)
+        stats = _precompute(deviations_df)
+        sections = _section_prompts(stats, time_period, ma_window)
+        prompt = "\n\n".join(
+            f"Task {number} ({key}):\nInstructions: {system_prompt.removeprefix(BASE_SYSTEM).strip()}\n{task_prompt.strip()}"
+            for number, (key, (task_prompt, system_prompt)) in enumerate(zip(DASHBOARD_KEYS, sections), 1)
+        )
+        
+        # Call OpenAI API
+        response = await analyze_with_openai(prompt, DASHBOARD_SYSTEM_PROMPT, max_tokens=1400, json_mode=True)
+        analyses = json.loads(response)
+    except Exception as e:
+        print(f"Error analyzing dashboard: {str(e)}")
+        analyses = {}
+        
+    # Any section the model left out falls back to the local analysis
+    fallbacks = _section_fallbacks(deviations_df, ma_window, stats)
+    return {
+        key: analyses[key] if isinstance(analyses.get(key), str) else fallbacks[key]()
+        for key in DASHBOARD_KEYS
+    }
+
+async def submit_batch_analyses(deviation_frames, time_period="Last 90 days", ma_window=7):
+    """
+    Analyze many DataFrames through the OpenAI Batch API
+    
+    Batch jobs cost half as much and use a separate rate limit, but may take
+    up to 24 hours, so this is meant for scheduled reports rather than pages.
+    
+    Args:
+        deviation_frames: List of DataFrames containing deviation data
+        time_period: Time period for context in the analysis
+        ma_window: Size of the moving average window
+        
+    Returns:
+        list: One dict per DataFrame, keyed like analyze_dashboard
+    """
+    analyses = [{} for _ in deviation_frames]
+    frame_stats = [None for _ in deviation_frames]
+    
+    try:
+        client = _get_client()
+        if client is None:
+            raise ValueError("OpenAI API key not configured")
+            
+        # One chat completion request per (DataFrame, section)
+        lines = []
+        for df_id, deviations_df in enumerate(deviation_frames):
+            if deviations_df.empty:
+                continue
+            _ensure_datetime(deviations_df)
+            frame_stats[df_id] = _precompute(deviations_df)
+            for key, (prompt, system_prompt) in zip(DASHBOARD_KEYS, _section_prompts(frame_stats[df_id], time_period, ma_window)):
+                lines.append(json.dumps({
+                    "custom_id": f"{df_id}:{key}",
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": {
+                        "model": "gpt-4o",
+                        "messages": [
+                            {"role": "system", "content": system_prompt},
+                            {"role": "user", "content": prompt}
+                        ],
+                        "max_tokens": SECTION_MAX_TOKENS[key],
+                        "temperature": 0.2
+                    }
+                }))
+                
+        if lines:
+            batch_file = await client.files.create(
+                file=("dashboard_batch.jsonl", "\n".join(lines).encode()),
+                purpose="batch"
+            )
+            batch = await client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            print(f"Submitted OpenAI batch {batch.id} with {len(lines)} requests")
+            
+            while batch.status not in ("completed", "failed", "expired", "cancelled"):
+                await asyncio.sleep(BATCH_POLL_INTERVAL)
+                batch = await client.batches.retrieve(batch.id)
+                
+            if batch.status != "completed" or not batch.output_file_id:
+                raise RuntimeError(f"OpenAI batch {batch.id} ended with status {batch.status}")
+                
+            # Demultiplex the results back to their DataFrame and section
+            output = await client.files.content(batch.output_file_id)
+            for line in output.text.splitlines():
+                if not line:
+                    continue
+                result = json.loads(line)
+                response = result.get("response") or {}
+                if response.get("status_code") != 200:
+                    continue
+                df_id, key = result["custom_id"].split(":", 1)
+                analyses[int(df_id)][key] = response["body"]["choices"][0]["message"]["content"]
+    except Exception as e:
+        print(f"Error with OpenAI batch: {str(e)}")
+        
+    results = []
+    for deviations_df, analysis, stats in zip(deviation_frames, analyses, frame_stats):
+        if deviations_df.empty:
+            results.append({key: "No data available for analysis." for key in DASHBOARD_KEYS})
+            continue
+        fallbacks = _section_fallbacks(deviations_df, ma_window, stats)
+        results.append({
+            key: analysis[key] if isinstance(analysis.get(key), str) else fallbacks[key]()
+            for key in DASHBOARD_KEYS
+        })
+    return results
+
+async def analyze_all(deviations_df, time_period="Last 90 days", ma_window=7, mode="sync"):
+    """
+    Run every chart analysis concurrently
+    
+    Args:
+        deviations_df: DataFrame containing deviation data
+        time_period: Time period for context in the analysis
+        ma_window: Size of the moving average window
+        mode: "sync" for immediate requests, "batch" to go through the Batch API
+        
+    Returns:
+        dict: AnalysisResult keyed by deviation, heatmap, trend, distribution and recommendations
+    """
+    if mode not in ("sync", "batch"):
+        raise ValueError(f"Unknown analysis mode: {mode}")
+        
+    # Share one set of statistics; on failure each analyzer falls back on its own
+    try:
+        precomputed = None
+        if not deviations_df.empty:
+            _ensure_datetime(deviations_df)
+            precomputed = _precompute(deviations_df)
+    except Exception as e:
+        print(f"Error computing deviation statistics: {str(e)}")
+        precomputed = None
+        
+    if mode == "batch":
+        narratives = (await submit_batch_analyses([deviations_df], time_period, ma_window))[0]
+        return {key: AnalysisResult(stats=precomputed or {}, narrative=narratives[key]) for key in DASHBOARD_KEYS}
+        
+    results = await asyncio.gather(
+        analyze_deviation_data(deviations_df, time_period, precomputed),
+        analyze_heatmap(deviations_df, time_period, precomputed),
+        analyze_trend_chart(deviations_df, ma_window, time_period, precomputed),
+        analyze_distribution_chart(deviations_df, time_period, precomputed),
+        generate_performance_recommendations(deviations_df, time_period, precomputed)
+    )
+    return dict(zip(DASHBOARD_KEYS, results))
+
+async def _await(awaitable):
+    return await awaitable
+
+def _run(awaitable):
+    """Run an awaitable on the background event loop and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(_await(awaitable), _get_loop()).result()
+
+def run_stream(prompt, system_prompt="", max_tokens=800):
+    """
+    Stream an OpenAI response synchronously, e.g. into st.write_stream
+    
+    Closing the generator early (the user navigates away) cancels the request.
+    
+    Args:
+        prompt: The user prompt to send to OpenAI
+        system_prompt: Optional system prompt for context
+        max_tokens: Maximum number of tokens in the response
+        
+    Yields:
+        str: Text chunks as they arrive
+    """
+    chunks = _run(analyze_with_openai(prompt, system_prompt, max_tokens, stream=True))
+    try:
+        while True:
+            try:
+                yield _run(chunks.__anext__())
+            except StopAsyncIteration:
+                return
+    finally:
+        _run(chunks.aclose())
+
+def run_all(deviations_df, time_period="Last 90 days", ma_window=7, mode="sync"):
+    """
+    Synchronous wrapper around analyze_all for Streamlit pages
+    
+    Args:
+        deviations_df: DataFrame containing deviation data
+        time_period: Time period for context in the analysis
+        ma_window: Size of the moving average window
+        mode: "sync" for immediate requests, "batch" to go through the Batch API
+        
+    Returns:
+        dict: AnalysisResult keyed by deviation, heatmap, trend, distribution and recommendations
+    """
+    return _run(analyze_all(deviations_df, time_period, ma_window, mode))
+
+def run_dashboard(deviations_df, time_period="Last 90 days", ma_window=7):
+    """
+    Synchronous wrapper around analyze_dashboard for Streamlit pages
+    
+    Args:
+        deviations_df: DataFrame containing deviation data
+        time_period: Time period for context in the analysis
+        ma_window: Size of the moving average window
+        
+    Returns:
+        dict: Analysis text keyed by deviation, heatmap, trend, distribution and recommendations
+    """
+    return _run(analyze_dashboard(deviations_df, time_period, ma_window))
 
 # Fallback analysis functions for when API is unavailable
 
-def generate_statistical_analysis(data):
+def generate_statistical_analysis(data, *, precomputed=None):
     """Generate a basic statistical analysis focused on data interpretation, no recommendations"""
     try:
         if data.empty:
             return "No data available for analysis."
             
-        # Basic statistics
-        mean_dev = data['percentage_deviation'].mean()
-        median_dev = data['percentage_deviation'].median()
-        std_dev = data['percentage_deviation'].std()
-        max_dev = data['percentage_deviation'].max()
-        min_dev = data['percentage_deviation'].min()
-        sample_count = len(data)
-        assayer_count = data['assayer_name'].nunique()
-        
-        # Calculate per assayer stats
-        assayer_stats = data.groupby('assayer_name')['percentage_deviation'].agg(['mean', 'std']).reset_index()
-        best_assayer = assayer_stats.iloc[assayer_stats['mean'].abs().idxmin()]['assayer_name']
-        worst_assayer = assayer_stats.iloc[assayer_stats['mean'].abs().idxmax()]['assayer_name']
+        if precomputed is not None:
+            # Reuse the statistics the analyzer already computed
+            summary = precomputed['summary']
+            mean_dev, median_dev, std_dev = summary['mean'], summary['median'], summary['std']
+            max_dev, min_dev = summary['max'], summary['min']
+            sample_count, assayer_count = summary['total_samples'], summary['assayer_count']
+            assayer_stats = precomputed['per_assayer']
+        else:
+            # Basic statistics
+            mean_dev = data['percentage_deviation'].mean()
+            median_dev = data['percentage_deviation'].median()
+            std_dev = data['percentage_deviation'].std()
+            max_dev = data['percentage_deviation'].max()
+            min_dev = data['percentage_deviation'].min()
+            sample_count = len(data)
+            assayer_count = data['assayer_name'].nunique()
+            
+            # Calculate per assayer stats
+            assayer_stats = data.groupby('assayer_name')['percentage_deviation'].agg(['mean', 'std']).reset_index()
+        abs_mean = np.abs(assayer_stats['mean'].to_numpy())
+        best_assayer = assayer_stats['assayer_name'].iat[np.nanargmin(abs_mean)]
+        worst_assayer = assayer_stats['assayer_name'].iat[np.nanargmax(abs_mean)]
         
         return f"""
 ## Statistical Analysis of Gold Testing Deviations
@@ -531,22 +1243,30 @@ This data provides a snapshot of testing accuracy across the laboratory. The dev
     except Exception as e:
         return f"Unable to generate analysis due to an error: {str(e)}"
 
-def generate_heatmap_analysis(data):
+def generate_heatmap_analysis(data, *, precomputed=None):
     """Generate a basic heatmap analysis focused on data interpretation, no recommendations"""
     try:
         if data.empty:
             return "No data available for heatmap analysis."
             
-        # Calculate basic statistics for the heatmap
-        assayer_count = data['assayer_name'].nunique()
-        date_min = data['test_date'].min()
-        date_max = data['test_date'].max()
+        if precomputed is not None:
+            # Reuse the statistics the analyzer already computed
+            summary = precomputed['summary']
+            assayer_count = summary['assayer_count']
+            date_min, date_max = summary['start_date'], summary['end_date']
+            assayer_stats = precomputed['per_assayer']
+        else:
+            # Calculate basic statistics for the heatmap
+            assayer_count = data['assayer_name'].nunique()
+            date_min = data['test_date'].min()
+            date_max = data['test_date'].max()
+            
+            # Assayer with highest and lowest average deviation
+            assayer_stats = data.groupby('assayer_name')['percentage_deviation'].agg(['mean']).reset_index()
         date_range = pd.to_datetime(date_max) - pd.to_datetime(date_min)
-        
-        # Assayer with highest and lowest average deviation
-        assayer_stats = data.groupby('assayer_name')['percentage_deviation'].mean().reset_index()
-        best_assayer = assayer_stats.iloc[assayer_stats['percentage_deviation'].abs().idxmin()]['assayer_name']
-        worst_assayer = assayer_stats.iloc[assayer_stats['percentage_deviation'].abs().idxmax()]['assayer_name']
+        abs_mean = np.abs(assayer_stats['mean'].to_numpy())
+        best_assayer = assayer_stats['assayer_name'].iat[np.nanargmin(abs_mean)]
+        worst_assayer = assayer_stats['assayer_name'].iat[np.nanargmax(abs_mean)]
         
         # Check for patterns across time
         has_date_range = date_range.days > 7 if hasattr(date_range, 'days') else False
@@ -572,18 +1292,23 @@ This visualization helps identify patterns of deviation across both assayers and
     except Exception as e:
         return f"Unable to generate heatmap analysis due to an error: {str(e)}"
 
-def generate_trend_analysis(data, window=7):
+def generate_trend_analysis(data, window=7, *, precomputed=None):
     """Generate a basic trend analysis focused on data interpretation, no recommendations"""
     try:
         if data.empty:
             return "No data available for trend analysis."
             
-        # Calculate basic statistics for the trend
-        date_min = data['test_date'].min()
-        date_max = data['test_date'].max()
-        
-        # Calculate overall average
-        mean_dev = data['percentage_deviation'].mean()
+        if precomputed is not None:
+            # Reuse the statistics the analyzer already computed
+            summary = precomputed['summary']
+            date_min, date_max, mean_dev = summary['start_date'], summary['end_date'], summary['mean']
+        else:
+            # Calculate basic statistics for the trend
+            date_min = data['test_date'].min()
+            date_max = data['test_date'].max()
+            
+            # Calculate overall average
+            mean_dev = data['percentage_deviation'].mean()
         
         # Determine if we have enough data for meaningful trend
         date_range = pd.to_datetime(date_max) - pd.to_datetime(date_min)
@@ -626,19 +1351,25 @@ With more continuous data collection, this visualization would help identify whe
     except Exception as e:
         return f"Unable to generate trend analysis due to an error: {str(e)}"
 
-def generate_distribution_analysis(data):
+def generate_distribution_analysis(data, *, precomputed=None):
     """Generate a basic distribution analysis focused on data interpretation, no recommendations"""
     try:
         if data.empty:
             return "No data available for distribution analysis."
             
-        # Calculate basic statistics
-        assayer_count = data['assayer_name'].nunique()
-        
-        # Per-assayer stats
-        assayer_stats = data.groupby('assayer_name')['percentage_deviation'].agg(['mean', 'std']).reset_index()
-        most_consistent = assayer_stats.iloc[assayer_stats['std'].idxmin()]['assayer_name']
-        least_consistent = assayer_stats.iloc[assayer_stats['std'].idxmax()]['assayer_name']
+        if precomputed is not None:
+            # Reuse the statistics the analyzer already computed
+            assayer_count = precomputed['summary']['assayer_count']
+            assayer_stats = precomputed['per_assayer']
+        else:
+            # Calculate basic statistics
+            assayer_count = data['assayer_name'].nunique()
+            
+            # Per-assayer stats
+            assayer_stats = data.groupby('assayer_name')['percentage_deviation'].agg(['mean', 'std']).reset_index()
+        std_values = assayer_stats['std'].to_numpy()
+        most_consistent = assayer_stats['assayer_name'].iat[np.nanargmin(std_values)]
+        least_consistent = assayer_stats['assayer_name'].iat[np.nanargmax(std_values)]
         
         return f"""
 ## Distribution Analysis of Gold Testing Deviations
@@ -663,18 +1394,23 @@ This visualization helps identify both accuracy (how centered around zero) and p
     except Exception as e:
         return f"Unable to generate distribution analysis due to an error: {str(e)}"
 
-def generate_recommendation_fallback(data):
+def generate_recommendation_fallback(data, *, precomputed=None):
     """Generate performance data interpretation instead of recommendations"""
     try:
         if data.empty:
             return "No data available for performance analysis."
             
-        # Calculate basic statistics
-        mean_dev = data['percentage_deviation'].mean()
-        std_dev = data['percentage_deviation'].std()
-        
-        # Per-assayer stats
-        assayer_stats = data.groupby('assayer_name')['percentage_deviation'].agg(['mean', 'std', 'count']).reset_index()
+        if precomputed is not None:
+            # Reuse the statistics the analyzer already computed
+            mean_dev, std_dev = precomputed['summary']['mean'], precomputed['summary']['std']
+            assayer_stats = precomputed['per_assayer']
+        else:
+            # Calculate basic statistics
+            mean_dev = data['percentage_deviation'].mean()
+            std_dev = data['percentage_deviation'].std()
+            
+            # Per-assayer stats
+            assayer_stats = data.groupby('assayer_name')['percentage_deviation'].agg(['mean', 'std', 'count']).reset_index()
         
         # Find assayers with various characteristics
         above_avg_dev = assayer_stats[assayer_stats['mean'].abs() > abs(mean_dev)]
@@ -1,5 +1,7 @@
 import streamlit as st
+import streamlit.components.v1 as components
 import pandas as pd
+import numpy as np
 import sqlite3
 from datetime import datetime
 import sys
@@ -7,8 +9,8 @@ import os
 
 # Add parent directory to path to import modules
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from database import add_assayer, add_assay_result, get_assayers, update_assayer, delete_assayer
-from database import get_assay_result, update_assay_result, delete_assay_result
+from database import init_db, open_connection, add_assayer, add_assay_result, add_assay_results_bulk, get_assayers, update_assayer, delete_assayer
+from database import get_assay_result, update_assay_result, delete_assay_result, search_assay_results
 from database_interlab import init_interlab_db, add_external_lab, get_external_labs
 from database_interlab import update_external_lab, delete_external_lab, add_interlab_result
 from database_interlab import get_interlab_results
@@ -16,9 +18,616 @@ from database_trainee import init_trainee_db, add_trainee, get_trainees, add_ref
 from database_trainee import get_reference_materials, add_trainee_evaluation, get_trainee_evaluations
 from auth import require_permission, display_access_denied, check_page_access
 
-# Initialize the database tables
-init_interlab_db()
-init_trainee_db()
+# Initialize the database tables once per server process rather than on every rerun
+@st.cache_resource(show_spinner=False)
+def init_databases():
+    init_db()
+    init_interlab_db()
+    init_trainee_db()
+    return True
+
+init_databases()
+
+# Cached reads of the lookup tables; every rerun would otherwise query SQLite again.
+# The forms on this page clear the matching cache after a successful write.
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_get_assayers():
+    return get_assayers()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_get_external_labs():
+    return get_external_labs()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_get_trainees():
+    return get_trainees()
+
+@st.cache_data(ttl=60, show_spinner=False)
+def cached_get_reference_materials():
+    return get_reference_materials()
+
+@st.cache_data(show_spinner=False)
+def build_assayer_options(assayers_df):
+    """Map "Name (employee ID)" dropdown labels to assayer IDs, memoized on the frame's contents"""
+    labels = assayers_df['name'].astype(str) + ' (' + assayers_df['employee_id'].astype(str) + ')'
+    return dict(zip(labels.tolist(), assayers_df['assayer_id'].tolist()))
+
+@st.cache_data(show_spinner=False)
+def build_assayer_names(assayers_df):
+    """Map assayer IDs back to assayer names, memoized on the frame's contents"""
+    return dict(zip(assayers_df['assayer_id'].tolist(), assayers_df['name'].tolist()))
+
+@st.cache_data(show_spinner=False)
+def build_lab_options(labs_df):
+    """Map "Lab name (accreditation)" labels to lab IDs for the edit and delete lab tabs"""
+    if 'accreditation' in labs_df.columns:
+        accreditation = labs_df['accreditation'].where(labs_df['accreditation'].notna() & (labs_df['accreditation'] != ''), 'No Accreditation')
+    else:
+        accreditation = pd.Series('No Accreditation', index=labs_df.index)
+    labels = labs_df['lab_name'].astype(str) + ' (' + accreditation.astype(str) + ')'
+    return dict(zip(labels.tolist(), labs_df['lab_id'].tolist()))
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def index_by_id(df, id_column):
+    """Return the frame indexed by its ID column for .loc lookups, shared read-only across reruns"""
+    return df.set_index(id_column, drop=False)
+
+@st.cache_resource(show_spinner=False)
+def load_asset(filename):
+    """Read a static file from the assets directory"""
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets', filename)
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+def highlight_gold(col):
+    """Color a column of gold content values by purity band, for Styler.apply"""
+    values = pd.to_numeric(col, errors='coerce').to_numpy()
+    return np.select(
+        [values >= 995.0, values >= 916.0, values >= 750.0],
+        [
+            'background-color: rgba(212, 175, 55, 0.3); color: #000;',
+            'background-color: rgba(212, 175, 55, 0.2); color: #000;',
+            'background-color: rgba(212, 175, 55, 0.1); color: #000;'
+        ],
+        default=''
+    )
+
+def store_search_results(results):
+    """Keep search results in session state along with their selectbox labels"""
+    labels = (
+        'Sample: ' + results['sample_id'].astype(str)
+        + ' | Assayer: ' + results['assayer_name'].astype(str)
+        + ' | Gold: ' + results['gold_content'].astype(str) + ' ppt'
+    )
+    st.session_state.search_results = results
+    st.session_state.result_options = dict(zip(labels.tolist(), results['result_id'].tolist()))
+
+def update_stored_result(result_id, **changes):
+    """Apply a saved edit to the stored search results instead of searching again"""
+    results = st.session_state.search_results.copy()
+    matches = results['result_id'] == result_id
+    for column, value in changes.items():
+        if isinstance(results[column].dtype, pd.CategoricalDtype) and value not in results[column].cat.categories:
+            results[column] = results[column].cat.add_categories([value])
+        results.loc[matches, column] = value
+    store_search_results(results)
+
+def drop_stored_result(result_id):
+    """Remove a deleted result from the stored search results"""
+    results = st.session_state.search_results
+    store_search_results(results[results['result_id'] != result_id].reset_index(drop=True))
+
+def get_conn():
+    """Return this session's SQLite connection, opening it on first use"""
+    if 'db_conn' not in st.session_state:
+        st.session_state.db_conn = open_connection()
+    return st.session_state.db_conn
+
+# Widget callbacks for the assayer and laboratory delete panels
+def toggle_assayer_delete_confirmation():
+    """Flip the assayer delete confirmation when its checkbox changes"""
+    st.session_state.delete_assayer_confirmed = not st.session_state.delete_assayer_confirmed
+
+def reset_assayer_delete_confirmation():
+    """Require a fresh confirmation after a different assayer is selected"""
+    st.session_state.delete_assayer_confirmed = False
+
+def delete_selected_assayer(assayer_options):
+    """Deactivate the assayer chosen in the delete selectbox and record the outcome"""
+    assayer_id = assayer_options[st.session_state.delete_assayer_selection]
+    success, message = delete_assayer(assayer_id, conn=get_conn())
+    if success:
+        cached_get_assayers.clear()
+    st.session_state.delete_assayer_status = success
+    st.session_state.delete_assayer_message = message
+
+def toggle_lab_delete_confirmation():
+    """Flip the laboratory delete confirmation when its checkbox changes"""
+    st.session_state.delete_lab_confirmed = not st.session_state.delete_lab_confirmed
+
+def reset_lab_delete_confirmation():
+    """Require a fresh confirmation after a different laboratory is selected"""
+    st.session_state.delete_lab_confirmed = False
+
+def delete_selected_lab(lab_options):
+    """Deactivate the laboratory chosen in the delete selectbox and record the outcome"""
+    lab_id = lab_options[st.session_state.delete_lab_selection]
+    success, message = delete_external_lab(lab_id)
+    if success:
+        cached_get_external_labs.clear()
+    st.session_state.delete_lab_status = success
+    st.session_state.delete_lab_message = message
+
+# Fragments: widget interactions inside these rerun only the fragment, not the
+# whole page. Changes that other sections depend on still call st.rerun().
+@st.fragment
+def edit_assayer_fragment(assayers):
+    """Select an assayer and edit their details"""
+    # Create a dictionary mapping display names to assayer IDs
+    assayer_options = build_assayer_options(assayers)
+    
+    if assayer_options:
+        selected_assayer_label = st.selectbox(
+            "Select Assayer to Edit",
+            options=list(assayer_options.keys())
+        )
+        
+        # Get the assayer_id from the selection
+        assayer_id = assayer_options[selected_assayer_label]
+        
+        # Extract information for the selected assayer
+        selected_assayer = index_by_id(assayers, 'assayer_id').loc[assayer_id]
+        
+        with st.form("edit_assayer_form"):
+            edit_name = st.text_input("Assayer Name", value=selected_assayer['name'])
+            edit_employee_id = st.text_input("Employee ID", value=selected_assayer['employee_id'])
+            
+            # Parse the joining date string to a datetime object
+            joining_date_val = pd.to_datetime(selected_assayer['joining_date']).date() if pd.notna(selected_assayer['joining_date']) else datetime.now().date()
+            edit_joining_date = st.date_input("Joining Date", value=joining_date_val)
+            
+            # Optional fields
+            st.markdown("##### Additional Information (Optional)")
+            edit_profile_picture = st.text_input(
+                "Profile Picture URL", 
+                value=selected_assayer['profile_picture'] if 'profile_picture' in selected_assayer and pd.notna(selected_assayer['profile_picture']) else ""
+            )
+            edit_work_experience = st.text_area(
+                "Work Experience & Qualifications", 
+                value=selected_assayer['work_experience'] if 'work_experience' in selected_assayer and pd.notna(selected_assayer['work_experience']) else ""
+            )
+            
+            update_submitted = st.form_submit_button("Update Assayer")
+            
+            if update_submitted:
+                if edit_name and edit_employee_id:
+                    # Convert joining_date to string in YYYY-MM-DD format
+                    edit_joining_date_str = edit_joining_date.strftime('%Y-%m-%d')
+                    
+                    # Update the assayer in the database
+                    success = update_assayer(
+                        assayer_id=assayer_id,
+                        name=edit_name,
+                        employee_id=edit_employee_id,
+                        joining_date=edit_joining_date_str,
+                        profile_picture=edit_profile_picture,
+                        work_experience=edit_work_experience,
+                        conn=get_conn()
+                    )
+                    
+                    if success:
+                        cached_get_assayers.clear()
+                        st.success(f"✅ Successfully updated assayer: {edit_name}")
+                        # Force reloading the page to see the updated data
+                        st.rerun()
+                    else:
+                        st.error(f"❌ Failed to update assayer. Employee ID may already exist.")
+                else:
+                    st.warning("⚠️ Please enter both Assayer Name and Employee ID.")
+    else:
+        st.info("No assayers available to edit.")
+
+@st.fragment
+def delete_assayer_fragment(assayers):
+    """Select and deactivate an assayer, with a confirmation checkbox"""
+    st.warning("⚠️ This action will deactivate the selected assayer but preserve their historical data.")
+    
+    # Create a dictionary mapping display names to assayer IDs for deletion
+    assayer_options = build_assayer_options(assayers)
+    
+    if assayer_options:
+        # Initialize session state variables if they don't exist
+        if 'delete_assayer_confirmed' not in st.session_state:
+            st.session_state.delete_assayer_confirmed = False
+        if 'delete_assayer_status' not in st.session_state:
+            st.session_state.delete_assayer_status = None
+        if 'delete_assayer_message' not in st.session_state:
+            st.session_state.delete_assayer_message = ""
+        
+        # Store the selected assayer in session state
+        selected_assayer_label = st.selectbox(
+            "Select Assayer to Delete",
+            options=list(assayer_options.keys()),
+            key="delete_assayer_selection",
+            on_change=reset_assayer_delete_confirmation
+        )
+        
+        # Add a confirmation checkbox with callback
+        confirm_delete = st.checkbox(
+            "I understand this action cannot be undone", 
+            value=st.session_state.delete_assayer_confirmed,
+            key="confirm_delete_assayer",
+            on_change=toggle_assayer_delete_confirmation
+        )
+        
+        # Display delete button
+        if st.button("Delete Assayer", 
+                    disabled=not st.session_state.delete_assayer_confirmed,
+                    on_click=delete_selected_assayer,
+                    args=(assayer_options,)):
+            pass  # The actual deletion happens in the on_click callback
+        
+        # Display status messages
+        if st.session_state.delete_assayer_status is not None:
+            if st.session_state.delete_assayer_status:
+                st.success(f"✅ Successfully removed assayer: {selected_assayer_label.split(' (')[0]}")
+                # Reset status after displaying
+                st.session_state.delete_assayer_status = None
+                st.session_state.delete_assayer_message = ""
+                # Force page refresh to update the data
+                st.rerun()
+            else:
+                st.error(f"❌ Failed to remove assayer: {st.session_state.delete_assayer_message}")
+                # Keep the status to show the error
+    else:
+        st.info("No assayers available to delete.")
+
+@st.fragment
+def search_results_fragment():
+    """Show the stored search results with edit and delete actions for a selected result"""
+    try:
+        results = st.session_state.search_results
+        
+        # Apply styling
+        styled_results = results.style.apply(highlight_gold, subset=['gold_content'])
+        
+        # Display the table with results
+        st.subheader("Search Results")
+        st.dataframe(styled_results, use_container_width=True)
+        
+        # Create a selection mechanism for the results (labels are built when the results are stored)
+        result_options = st.session_state.result_options
+        
+        selected_result = st.selectbox(
+            "Select a result to manage:",
+            options=list(result_options.keys()),
+            key="result_selector"
+        )
+        
+        selected_result_id = result_options[selected_result]
+        st.session_state.selected_result_id = selected_result_id
+        
+        # Action buttons row
+        col1, col2, spacer = st.columns([1, 1, 4])
+        
+        with col1:
+            if st.button("✏️ Edit", key="edit_button", use_container_width=True, 
+                        help="Edit this result"):
+                st.session_state.edit_mode = True
+                st.session_state.delete_mode = False
+                
+        with col2:
+            if st.button("🗑️ Delete", key="delete_button", use_container_width=True,
+                        help="Delete this result"):
+                st.session_state.delete_mode = True
+                st.session_state.edit_mode = False
+        
+        # EDIT MODE
+        if st.session_state.edit_mode and st.session_state.selected_result_id is not None:
+            st.markdown("---")
+            st.subheader("✏️ Edit Result")
+            
+            # Get the full result data
+            result_data = get_assay_result(st.session_state.selected_result_id, conn=get_conn())
+            
+            if result_data is not None:
+                with st.form("edit_result_form"):
+                    # Display sample ID and assayer (not editable)
+                    st.text_input("Sample ID", value=result_data['sample_id'], disabled=True)
+                    st.text_input("Assayer", value=result_data['assayer_name'], disabled=True)
+                    st.text_input("Test Date", value=pd.to_datetime(result_data['test_date']).strftime('%Y-%m-%d'), disabled=True)
+                    
+                    # Editable fields
+                    edit_gold_content = st.number_input(
+                        "Gold Purity (ppt)", 
+                        min_value=0.0, 
+                        max_value=999.9, 
+                        value=float(result_data['gold_content']),
+                        step=0.1,
+                        format="%.1f"
+                    )
+                    
+                    # Get existing bar weight or set to default
+                    current_bar_weight = result_data.get('bar_weight_grams', 1000.0)
+                    if current_bar_weight is None or pd.isna(current_bar_weight) or current_bar_weight == 0:
+                        current_bar_weight = 1000.0
+                        
+                    edit_bar_weight_grams = st.number_input(
+                        "Bar Weight (grams)",
+                        min_value=0.0,
+                        max_value=100000.0,
+                        value=float(current_bar_weight),
+                        step=100.0,
+                        format="%.1f",
+                        help="Enter the physical weight of the gold bar/sample in grams (used for mass impact analysis)"
+                    )
+                    
+                    # Check if gold_type exists in the data, use default if not
+                    current_gold_type = result_data.get('gold_type', 'Unknown')
+                    if current_gold_type is None or pd.isna(current_gold_type):
+                        current_gold_type = 'Unknown'
+                    
+                    # Gold type selection (show the current value if available)
+                    gold_types = ["Mine Gold", "Jewelry", "Fine Gold", "Recycled Gold"]
+                    default_index = gold_types.index(current_gold_type) if current_gold_type in gold_types else 0
+                    
+                    edit_gold_type = st.selectbox(
+                        "Gold Type",
+                        options=gold_types,
+                        index=default_index,
+                        help="Select the type of gold being tested"
+                    )
+                    
+                    edit_notes = st.text_area(
+                        "Notes", 
+                        value=result_data['notes'] if result_data['notes'] else ""
+                    )
+                    
+                    col1, col2 = st.columns([1, 3])
+                    
+                    with col1:
+                        cancel = st.form_submit_button("Cancel")
+                        if cancel:
+                            st.session_state.edit_mode = False
+                            st.rerun()
+                            
+                    with col2:
+                        save = st.form_submit_button("Save Changes")
+                        if save:
+                            # Update the result
+                            success, message = update_assay_result(
+                                result_id=st.session_state.selected_result_id,
+                                gold_content=edit_gold_content,
+                                notes=edit_notes,
+                                gold_type=edit_gold_type,
+                                bar_weight_grams=edit_bar_weight_grams,
+                                conn=get_conn()
+                            )
+                            
+                            if success:
+                                st.success(f"✅ Successfully updated result for sample {result_data['sample_id']}")
+                                # Clear edit mode and show the new values in the stored results
+                                st.session_state.edit_mode = False
+                                update_stored_result(
+                                    st.session_state.selected_result_id,
+                                    gold_content=edit_gold_content,
+                                    notes=edit_notes,
+                                    gold_type=edit_gold_type,
+                                    bar_weight_grams=edit_bar_weight_grams
+                                )
+                                
+                                # Force page refresh
+                                st.rerun()
+                            else:
+                                st.error(f"❌ Failed to update result: {message}")
+        
+        # DELETE MODE
+        if st.session_state.delete_mode and st.session_state.selected_result_id is not None:
+            st.markdown("---")
+            st.subheader("🗑️ Delete Result")
+            
+            # Get the full result data
+            result_data = get_assay_result(st.session_state.selected_result_id, conn=get_conn())
+            
+            if result_data is not None:
+                # Show result details in a clean format
+                # Get bar weight if available, otherwise display "Not specified"
+                bar_weight = result_data.get('bar_weight_grams', 'Not specified')
+                if bar_weight == 0 or pd.isna(bar_weight):
+                    bar_weight = 'Not specified'
+                    
+                st.markdown(f"""
+                <div style='background-color: #f8f9fa; padding: 15px; border-radius: 5px; margin-bottom: 15px;'>
+                    <p><strong>Sample ID:</strong> {result_data['sample_id']}</p>
+                    <p><strong>Assayer:</strong> {result_data['assayer_name']}</p>
+                    <p><strong>Test Date:</strong> {pd.to_datetime(result_data['test_date']).strftime('%Y-%m-%d')}</p>
+                    <p><strong>Gold Content:</strong> {result_data['gold_content']} ppt</p>
+                    <p><strong>Gold Type:</strong> {result_data.get('gold_type', 'Unknown')}</p>
+                    <p><strong>Bar Weight:</strong> {bar_weight if isinstance(bar_weight, str) else f"{bar_weight:.1f} g"}</p>
+                </div>
+                """, unsafe_allow_html=True)
+                
+                st.warning("⚠️ Are you sure you want to delete this result? This action cannot be undone.")
+                
+                # Confirmation and action buttons
+                col1, col2 = st.columns([1, 1])
+                
+                with col1:
+                    if st.button("Cancel", use_container_width=True):
+                        st.session_state.delete_mode = False
+                        st.rerun()
+                        
+                with col2:
+                    confirm_delete = st.checkbox("I confirm deletion")
+                    if st.button("Delete Result", disabled=not confirm_delete, use_container_width=True):
+                        # Delete the result
+                        success, message = delete_assay_result(st.session_state.selected_result_id, conn=get_conn())
+                        
+                        if success:
+                            st.success("✅ Result deleted successfully")
+                            
+                            # Clear delete mode and drop the row from the stored results
+                            st.session_state.delete_mode = False
+                            drop_stored_result(st.session_state.selected_result_id)
+                            
+                            # Rerun to update UI
+                            st.rerun()
+                        else:
+                            st.error(f"❌ Failed to delete result: {message}")
+    except Exception as e:
+        st.error(f"❌ Error searching for results: {e}")
+
+@st.fragment
+def batch_grid_fragment(assayer_options, assayer_names, batch_test_date, benchmark_assayer_label):
+    """Batch entry grid and save button; submitting reruns only this section"""
+    with st.form("batch_entry_form"):
+        # Display current batch info
+        st.info(f"Benchmark Assayer: {benchmark_assayer_label} | Test Date: {batch_test_date}")
+        
+        # One editable grid instead of a row of widgets per sample
+        num_samples = 20
+        gold_type_options = ["Mine Gold", "Jewelry", "Fine Gold", "Recycled Gold", "Unknown"]
+        batch_template = pd.DataFrame({
+            'assayer': pd.Series([None] * num_samples, dtype=object),
+            'sample_id': pd.Series([None] * num_samples, dtype=object),
+            'bar_weight_grams': pd.Series([None] * num_samples, dtype=float),
+            'gold_type': pd.Series([None] * num_samples, dtype=object),
+            'gold_content': pd.Series([None] * num_samples, dtype=float),
+            'benchmark_value': pd.Series([None] * num_samples, dtype=float),
+            'notes': pd.Series([None] * num_samples, dtype=object)
+        })
+        
+        edited_batch = st.data_editor(
+            batch_template,
+            column_config={
+                'assayer': st.column_config.SelectboxColumn(
+                    "Assayer", options=list(assayer_options.keys()), width="medium"
+                ),
+                'sample_id': st.column_config.TextColumn("Sample ID"),
+                'bar_weight_grams': st.column_config.NumberColumn(
+                    "Bar Weight (g)", min_value=0.0, max_value=100000.0, step=100.0, format="%.1f"
+                ),
+                'gold_type': st.column_config.SelectboxColumn("Gold Type", options=gold_type_options),
+                'gold_content': st.column_config.NumberColumn(
+                    "Assayer Result", min_value=0.0, max_value=999.9, step=0.1, format="%.1f"
+                ),
+                'benchmark_value': st.column_config.NumberColumn(
+                    "Benchmark Result", min_value=0.0, max_value=999.9, step=0.1, format="%.1f"
+                ),
+                'notes': st.column_config.TextColumn("Notes")
+            },
+            num_rows="dynamic",
+            hide_index=True,
+            use_container_width=True,
+            key="batch_editor"
+        )
+        
+        # Keep the rows that have the required fields filled in
+        sample_ids = edited_batch['sample_id'].fillna('').astype(str).str.strip()
+        sample_assayer_ids = edited_batch['assayer'].map(assayer_options)
+        complete = (
+            sample_ids.ne('')
+            & sample_assayer_ids.notna()
+            & edited_batch['gold_type'].fillna('').ne('')
+            & edited_batch['gold_content'].gt(0)
+        )
+        batch_df = edited_batch.loc[complete].assign(
+            assayer_id=sample_assayer_ids[complete].astype(int),
+            sample_id=sample_ids[complete],
+            notes=edited_batch.loc[complete, 'notes'].fillna('').astype(str)
+        )
+        batch_df['bar_weight_grams'] = batch_df['bar_weight_grams'].where(batch_df['bar_weight_grams'].gt(0), 1000.0)
+        batch_df['benchmark_value'] = batch_df['benchmark_value'].where(batch_df['benchmark_value'].gt(0))
+        batch_df = batch_df[['assayer_id', 'sample_id', 'bar_weight_grams', 'gold_type', 'gold_content', 'benchmark_value', 'notes']]
+        batch_data = batch_df.to_dict('records')
+        
+        # Submit button
+        st.markdown("---")
+        col1, col2, col3 = st.columns([2, 1, 2])
+        with col2:
+            submit_batch = st.form_submit_button("💾 Save Batch", use_container_width=True)
+        
+        if submit_batch:
+            if batch_data:
+                success_count = 0
+                error_count = 0
+                errors = []
+                
+                # Save the assayer and benchmark results in one transaction
+                batch_test_date_str = batch_test_date.strftime('%Y-%m-%d %H:%M:%S')
+                rows = []
+                row_labels = []
+                for sample in batch_data:
+                    rows.append((
+                        sample['assayer_id'],
+                        sample['sample_id'],
+                        sample['gold_content'],
+                        batch_test_date_str,
+                        sample['notes'],
+                        sample['gold_type'],
+                        sample['bar_weight_grams']
+                    ))
+                    row_labels.append((sample['sample_id'], False))
+                    
+                    # Add benchmark result if provided
+                    if pd.notna(sample['benchmark_value']):
+                        rows.append((
+                            st.session_state.batch_benchmark_assayer,
+                            sample['sample_id'],
+                            sample['benchmark_value'],
+                            batch_test_date_str,
+                            f"Benchmark for {sample['sample_id']}",
+                            sample['gold_type'],
+                            sample['bar_weight_grams']
+                        ))
+                        row_labels.append((sample['sample_id'], True))
+                
+                statuses = add_assay_results_bulk(rows, conn=get_conn())
+                
+                # A sample counts as saved when its assayer result was saved
+                for (sample_id, is_benchmark), (saved, message) in zip(row_labels, statuses):
+                    if not is_benchmark:
+                        if saved:
+                            success_count += 1
+                        else:
+                            error_count += 1
+                    if not saved:
+                        label = f"Sample {sample_id} (benchmark)" if is_benchmark else f"Sample {sample_id}"
+                        errors.append(f"{label}: {message}")
+                
+                # Display results
+                if success_count > 0:
+                    st.success(f"✅ Successfully saved {success_count} samples")
+                
+                if error_count > 0:
+                    st.error(f"❌ Failed to save {error_count} samples")
+                    for error in errors:
+                        st.warning(f"• {error}")
+                
+                # Clear the form by clearing session state and rerunning; keep it
+                # (and the messages above) when some rows need correcting
+                if success_count > 0 and not errors:
+                    # Clear the grid by dropping its edits from session state
+                    if 'batch_editor' in st.session_state:
+                        del st.session_state['batch_editor']
+                    
+                    st.info("✅ Batch saved successfully! Form cleared for next batch...")
+                    st.rerun(scope="app")
+            else:
+                st.warning("⚠️ Please fill in at least one complete sample row (Assayer, Sample ID, Gold Type, and Assayer Result are required)")
+        
+        # Show current batch summary
+        if batch_data:
+            st.markdown("---")
+            st.markdown("### 📊 Current Batch Summary")
+            st.info(f"Ready to save: {len(batch_data)} samples")
+            
+            # Show preview table
+            if st.checkbox("Show preview", key="show_batch_preview"):
+                preview_df = batch_df.copy()
+                preview_df['assayer_name'] = preview_df['assayer_id'].map(assayer_names)
+                preview_cols = ['sample_id', 'assayer_name', 'gold_content', 'benchmark_value', 'gold_type', 'bar_weight_grams']
+                st.dataframe(preview_df[preview_cols], use_container_width=True)
 
 st.set_page_config(page_title="Data Entry", page_icon="📋", layout="wide")
 
@@ -27,139 +636,11 @@ if not check_page_access("Data_Entry"):
     display_access_denied()
     st.stop()
 
-# Custom CSS for better UI
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 2.3rem;
-        color: #D4AF37;
-        margin-bottom: 20px;
-        text-align: center;
-        text-shadow: 1px 1px 2px rgba(0,0,0,0.1);
-        padding-bottom: 10px;
-        border-bottom: 1px solid rgba(212, 175, 55, 0.4);
-    }
-    
-    .sub-header {
-        font-size: 1.6rem;
-        color: #D4AF37;
-        margin-bottom: 20px;
-        text-align: center;
-        text-shadow: 1px 1px 1px rgba(0,0,0,0.1);
-    }
-    
-    .form-container {
-        background-color: rgba(255, 255, 255, 0.05);
-        padding: 20px;
-        border-radius: 10px;
-        margin-bottom: 20px;
-        border: 1px solid rgba(212, 175, 55, 0.2);
-    }
-    
-    .entry-header {
-        font-size: 1.2rem;
-        color: #D4AF37;
-        margin-bottom: 20px;
-        font-weight: 500;
-    }
-    
-    .small-input {
-        max-width: 100px;
-    }
-    
-    /* Custom styling for tabs */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 8px;
-    }
-    
-    .stTabs [data-baseweb="tab"] {
-        height: 40px;
-        border-radius: 4px 4px 0 0;
-        padding: 10px 16px;
-        background-color: rgba(212, 175, 55, 0.1);
-        border-bottom: 1px solid rgba(212, 175, 55, 0.2);
-    }
-    
-    .stTabs [aria-selected="true"] {
-        background-color: rgba(212, 175, 55, 0.2);
-        border-bottom: 2px solid #D4AF37;
-    }
-    
-    /* Remove number input spinners/arrows completely */
-    .stNumberInput > div > div > input::-webkit-outer-spin-button,
-    .stNumberInput > div > div > input::-webkit-inner-spin-button {
-        -webkit-appearance: none;
-        margin: 0;
-        display: none;
-    }
-    
-    .stNumberInput > div > div > input[type=number] {
-        -moz-appearance: textfield;
-    }
-    
-    /* Hide the step buttons in number inputs */
-    .stNumberInput button {
-        display: none !important;
-    }
-    
-    /* Ensure no spinner controls are visible */
-    input[type="number"] {
-        -webkit-appearance: textfield;
-        -moz-appearance: textfield;
-        appearance: textfield;
-    }
-    
-    input[type="number"]::-webkit-inner-spin-button,
-    input[type="number"]::-webkit-outer-spin-button {
-        -webkit-appearance: none;
-        margin: 0;
-        display: none;
-    }
-    
-    /* Enable tab navigation through inputs */
-    .stTextInput > div > div > input,
-    .stNumberInput > div > div > input,
-    .stSelectbox > div > div > div {
-        tab-index: auto;
-    }
-</style>
-<script>
-document.addEventListener('DOMContentLoaded', function() {
-    // Add Enter key navigation for batch entry form
-    function addEnterKeyNavigation() {
-        const inputs = document.querySelectorAll('input[type="text"], input[type="number"], select');
-        inputs.forEach((input, index) => {
-            input.addEventListener('keydown', function(e) {
-                if (e.key === 'Enter') {
-                    e.preventDefault();
-                    const nextIndex = index + 1;
-                    if (nextIndex < inputs.length) {
-                        inputs[nextIndex].focus();
-                    }
-                }
-            });
-        });
-    }
-    
-    // Run navigation setup after a small delay to ensure elements are loaded
-    setTimeout(addEnterKeyNavigation, 1000);
-    
-    // Re-run when new content is added (for dynamic forms)
-    const observer = new MutationObserver(function(mutations) {
-        mutations.forEach(function(mutation) {
-            if (mutation.addedNodes.length > 0) {
-                setTimeout(addEnterKeyNavigation, 500);
-            }
-        });
-    });
-    
-    observer.observe(document.body, {
-        childList: true,
-        subtree: true
-    });
-});
-</script>
-""", unsafe_allow_html=True)
+# Custom CSS for better UI, plus Enter-key navigation for the entry forms.
+# Streamlit clears elements that a rerun does not emit, so both are sent on
+# every run; only reading the files is cached.
+st.markdown(f"<style>{load_asset('data_entry.css')}</style>", unsafe_allow_html=True)
+components.html(f"<script>{load_asset('data_entry.js')}</script>", height=0)
 
 # Main header
 st.markdown("<h1 class='main-header'>Data Entry & Management</h1>", unsafe_allow_html=True)
@@ -167,6 +648,9 @@ st.markdown("<h1 class='main-header'>Data Entry & Management</h1>", unsafe_allow
 # Create tabs for the different sections
 tab1, tab2, tab3, tab4 = st.tabs(["Assayer Management", "Assay Results", "Inter-Lab Data Entry", "Trainee Evaluation"])
 
+# Active assayers, shared by every tab below
+assayers_df = cached_get_assayers()
+
 # Assayer Management Tab
 with tab1:
     st.markdown("<h2 class='sub-header'>Assayer Management</h2>", unsafe_allow_html=True)
@@ -202,10 +686,14 @@ with tab1:
                         employee_id=employee_id,
                         joining_date=joining_date_str,
                         profile_picture=profile_picture,
-                        work_experience=work_experience
+                        work_experience=work_experience,
+                        conn=get_conn()
                     )
                     
                     if success:
+                        cached_get_assayers.clear()
+                        # Reload so the list and dropdowns below include the new assayer
+                        assayers_df = cached_get_assayers()
                         st.success(f"✅ Successfully added assayer: {assayer_name}")
                     else:
                         st.error(f"❌ Failed to add assayer. Employee ID may already exist.")
@@ -220,7 +708,7 @@ with tab1:
         st.markdown("<p class='entry-header'>👥 Existing Assayers</p>", unsafe_allow_html=True)
         
         # Get all assayers from the database
-        assayers = get_assayers()
+        assayers = assayers_df
         
         if not assayers.empty:
             # Display assayers data in a table
@@ -231,131 +719,11 @@ with tab1:
             
             # Edit tab - Individual assayer editing
             with edit_tab:
-                # Create a dictionary mapping display names to assayer IDs
-                assayer_options = {f"{row['name']} ({row['employee_id']})": row['assayer_id'] for _, row in assayers.iterrows()}
-                
-                if assayer_options:
-                    selected_assayer_label = st.selectbox(
-                        "Select Assayer to Edit",
-                        options=list(assayer_options.keys())
-                    )
-                    
-                    # Get the assayer_id from the selection
-                    assayer_id = assayer_options[selected_assayer_label]
-                    
-                    # Extract information for the selected assayer
-                    selected_assayer = assayers[assayers['assayer_id'] == assayer_id].iloc[0]
-                    
-                    with st.form("edit_assayer_form"):
-                        edit_name = st.text_input("Assayer Name", value=selected_assayer['name'])
-                        edit_employee_id = st.text_input("Employee ID", value=selected_assayer['employee_id'])
-                        
-                        # Parse the joining date string to a datetime object
-                        joining_date_val = pd.to_datetime(selected_assayer['joining_date']).date() if pd.notna(selected_assayer['joining_date']) else datetime.now().date()
-                        edit_joining_date = st.date_input("Joining Date", value=joining_date_val)
-                        
-                        # Optional fields
-                        st.markdown("##### Additional Information (Optional)")
-                        edit_profile_picture = st.text_input(
-                            "Profile Picture URL", 
-                            value=selected_assayer['profile_picture'] if 'profile_picture' in selected_assayer and pd.notna(selected_assayer['profile_picture']) else ""
-                        )
-                        edit_work_experience = st.text_area(
-                            "Work Experience & Qualifications", 
-                            value=selected_assayer['work_experience'] if 'work_experience' in selected_assayer and pd.notna(selected_assayer['work_experience']) else ""
-                        )
-                        
-                        update_submitted = st.form_submit_button("Update Assayer")
-                        
-                        if update_submitted:
-                            if edit_name and edit_employee_id:
-                                # Convert joining_date to string in YYYY-MM-DD format
-                                edit_joining_date_str = edit_joining_date.strftime('%Y-%m-%d')
-                                
-                                # Update the assayer in the database
-                                success = update_assayer(
-                                    assayer_id=assayer_id,
-                                    name=edit_name,
-                                    employee_id=edit_employee_id,
-                                    joining_date=edit_joining_date_str,
-                                    profile_picture=edit_profile_picture,
-                                    work_experience=edit_work_experience
-                                )
-                                
-                                if success:
-                                    st.success(f"✅ Successfully updated assayer: {edit_name}")
-                                    # Force reloading the page to see the updated data
-                                    st.rerun()
-                                else:
-                                    st.error(f"❌ Failed to update assayer. Employee ID may already exist.")
-                            else:
-                                st.warning("⚠️ Please enter both Assayer Name and Employee ID.")
-                else:
-                    st.info("No assayers available to edit.")
+                edit_assayer_fragment(assayers)
             
             # Delete tab
             with delete_tab:
-                st.warning("⚠️ This action will deactivate the selected assayer but preserve their historical data.")
-                
-                # Create a dictionary mapping display names to assayer IDs for deletion
-                assayer_options = {f"{row['name']} ({row['employee_id']})": row['assayer_id'] for _, row in assayers.iterrows()}
-                
-                if assayer_options:
-                    # Initialize session state variables if they don't exist
-                    if 'delete_assayer_confirmed' not in st.session_state:
-                        st.session_state.delete_assayer_confirmed = False
-                    if 'delete_assayer_status' not in st.session_state:
-                        st.session_state.delete_assayer_status = None
-                    if 'delete_assayer_message' not in st.session_state:
-                        st.session_state.delete_assayer_message = ""
-                    
-                    # Function to handle delete confirmation
-                    def toggle_assayer_delete_confirmation():
-                        st.session_state.delete_assayer_confirmed = not st.session_state.delete_assayer_confirmed
-                    
-                    # Function to handle delete operation
-                    def delete_selected_assayer():
-                        assayer_id = assayer_options[st.session_state.delete_assayer_selection]
-                        success, message = delete_assayer(assayer_id)
-                        st.session_state.delete_assayer_status = success
-                        st.session_state.delete_assayer_message = message
-                    
-                    # Store the selected assayer in session state
-                    selected_assayer_label = st.selectbox(
-                        "Select Assayer to Delete",
-                        options=list(assayer_options.keys()),
-                        key="delete_assayer_selection",
-                        on_change=lambda: setattr(st.session_state, 'delete_assayer_confirmed', False)
-                    )
-                    
-                    # Add a confirmation checkbox with callback
-                    confirm_delete = st.checkbox(
-                        "I understand this action cannot be undone", 
-                        value=st.session_state.delete_assayer_confirmed,
-                        key="confirm_delete_assayer",
-                        on_change=toggle_assayer_delete_confirmation
-                    )
-                    
-                    # Display delete button
-                    if st.button("Delete Assayer", 
-                                disabled=not st.session_state.delete_assayer_confirmed,
-                                on_click=delete_selected_assayer):
-                        pass  # The actual deletion happens in the on_click callback
-                    
-                    # Display status messages
-                    if st.session_state.delete_assayer_status is not None:
-                        if st.session_state.delete_assayer_status:
-                            st.success(f"✅ Successfully removed assayer: {selected_assayer_label.split(' (')[0]}")
-                            # Reset status after displaying
-                            st.session_state.delete_assayer_status = None
-                            st.session_state.delete_assayer_message = ""
-                            # Force page refresh to update the data
-                            st.rerun()
-                        else:
-                            st.error(f"❌ Failed to remove assayer: {st.session_state.delete_assayer_message}")
-                            # Keep the status to show the error
-                else:
-                    st.info("No assayers available to delete.")
+                delete_assayer_fragment(assayers)
         else:
             st.info("📌 No assayers in the database. Add some using the form on the left.")
         
@@ -379,12 +747,12 @@ with tab2:
             st.markdown("<p class='entry-header'>🔬 Add Single Assay Result</p>", unsafe_allow_html=True)
         
         # Get assayers for dropdown
-        assayers = get_assayers()
+        assayers = assayers_df
         
         if not assayers.empty:
             with st.form("add_result_form"):
                 # Create a dictionary mapping display names to assayer IDs
-                assayer_options = {f"{row['name']} ({row['employee_id']})": row['assayer_id'] for _, row in assayers.iterrows()}
+                assayer_options = build_assayer_options(assayers)
                 
                 # Create the dropdown with display names
                 selected_assayer_label = st.selectbox(
@@ -444,7 +812,8 @@ with tab2:
                             test_date=test_date.strftime('%Y-%m-%d %H:%M:%S'),
                             notes=notes,
                             gold_type=gold_type,
-                            bar_weight_grams=bar_weight_grams
+                            bar_weight_grams=bar_weight_grams,
+                            conn=get_conn()
                         )
                         
                         if success:
@@ -495,12 +864,12 @@ with tab2:
                 )
             
             # Get assayers for dropdown
-            assayers = get_assayers()
+            assayers = assayers_df
             
             if not assayers.empty:
                 # Add "All Assayers" option
                 assayer_options = {"All Assayers": None}
-                assayer_options.update({f"{row['name']} ({row['employee_id']})": row['assayer_id'] for _, row in assayers.iterrows()})
+                assayer_options.update(build_assayer_options(assayers))
                 
                 selected_assayer_label = st.selectbox(
                     "Filter by Assayer",
@@ -515,28 +884,24 @@ with tab2:
             
             search_submitted = st.form_submit_button("Search Results")
         
-        # Import search function
-        from database import search_assay_results
+        # Search filters from the form
+        search_params = {
+            'search_term': search_term if search_term else None,
+            'assayer_id': selected_assayer_id,
+            'date_from': date_from.strftime('%Y-%m-%d'),
+            'date_to': date_to.strftime('%Y-%m-%d'),
+            'limit': 100
+        }
         
         # Handle search
         try:
             # If search was just submitted, perform search and store results in session state
             if search_submitted:
-                # Convert dates to string format
-                date_from_str = date_from.strftime('%Y-%m-%d')
-                date_to_str = date_to.strftime('%Y-%m-%d')
-                
                 # Search for results
-                results = search_assay_results(
-                    search_term=search_term if search_term else None,
-                    assayer_id=selected_assayer_id,
-                    date_from=date_from_str,
-                    date_to=date_to_str,
-                    limit=100
-                )
+                results = search_assay_results(**search_params, conn=get_conn())
                 
                 # Store in session state
-                st.session_state.search_results = results
+                store_search_results(results)
                 # Reset any edit/delete state
                 st.session_state.edit_mode = False
                 st.session_state.delete_mode = False
@@ -544,236 +909,7 @@ with tab2:
                 
             # Display results if we have any (either from this search or a previous one)
             if st.session_state.search_results is not None and not st.session_state.search_results.empty:
-                results = st.session_state.search_results
-                
-                # Define highlight function
-                def highlight_gold(val):
-                    """Custom function to color gold content values"""
-                    if isinstance(val, (int, float)):
-                        if val >= 995.0:
-                            return 'background-color: rgba(212, 175, 55, 0.3); color: #000;'
-                        elif val >= 916.0:
-                            return 'background-color: rgba(212, 175, 55, 0.2); color: #000;'
-                        elif val >= 750.0:
-                            return 'background-color: rgba(212, 175, 55, 0.1); color: #000;'
-                    return ''
-                
-                # Format the date column
-                results['test_date'] = pd.to_datetime(results['test_date']).dt.strftime('%Y-%m-%d')
-                
-                # Ensure gold_type exists in results, set default if missing
-                if 'gold_type' not in results.columns:
-                    results['gold_type'] = 'Unknown'
-                
-                # Fill empty values with 'Unknown'
-                results['gold_type'] = results['gold_type'].fillna('Unknown')
-                
-                # Apply styling
-                styled_results = results.style.applymap(highlight_gold, subset=['gold_content'])
-                
-                # Display the table with results
-                st.subheader("Search Results")
-                st.dataframe(styled_results, use_container_width=True)
-                
-                # Create a selection mechanism for the results
-                result_options = {f"Sample: {row['sample_id']} | Assayer: {row['assayer_name']} | Gold: {row['gold_content']} ppt": row['result_id'] 
-                                 for _, row in results.iterrows()}
-                
-                selected_result = st.selectbox(
-                    "Select a result to manage:",
-                    options=list(result_options.keys()),
-                    key="result_selector"
-                )
-                
-                selected_result_id = result_options[selected_result]
-                st.session_state.selected_result_id = selected_result_id
-                
-                # Action buttons row
-                col1, col2, spacer = st.columns([1, 1, 4])
-                
-                with col1:
-                    if st.button("✏️ Edit", key="edit_button", use_container_width=True, 
-                                help="Edit this result"):
-                        st.session_state.edit_mode = True
-                        st.session_state.delete_mode = False
-                        st.rerun()
-                        
-                with col2:
-                    if st.button("🗑️ Delete", key="delete_button", use_container_width=True,
-                                help="Delete this result"):
-                        st.session_state.delete_mode = True
-                        st.session_state.edit_mode = False
-                        st.rerun()
-                
-                # EDIT MODE
-                if st.session_state.edit_mode and st.session_state.selected_result_id is not None:
-                    st.markdown("---")
-                    st.subheader("✏️ Edit Result")
-                    
-                    # Get the full result data
-                    result_data = get_assay_result(st.session_state.selected_result_id)
-                    
-                    if result_data is not None:
-                        with st.form("edit_result_form"):
-                            # Display sample ID and assayer (not editable)
-                            st.text_input("Sample ID", value=result_data['sample_id'], disabled=True)
-                            st.text_input("Assayer", value=result_data['assayer_name'], disabled=True)
-                            st.text_input("Test Date", value=pd.to_datetime(result_data['test_date']).strftime('%Y-%m-%d'), disabled=True)
-                            
-                            # Editable fields
-                            edit_gold_content = st.number_input(
-                                "Gold Purity (ppt)", 
-                                min_value=0.0, 
-                                max_value=999.9, 
-                                value=float(result_data['gold_content']),
-                                step=0.1,
-                                format="%.1f"
-                            )
-                            
-                            # Get existing bar weight or set to default
-                            current_bar_weight = result_data.get('bar_weight_grams', 1000.0)
-                            if current_bar_weight is None or pd.isna(current_bar_weight) or current_bar_weight == 0:
-                                current_bar_weight = 1000.0
-                                
-                            edit_bar_weight_grams = st.number_input(
-                                "Bar Weight (grams)",
-                                min_value=0.0,
-                                max_value=100000.0,
-                                value=float(current_bar_weight),
-                                step=100.0,
-                                format="%.1f",
-                                help="Enter the physical weight of the gold bar/sample in grams (used for mass impact analysis)"
-                            )
-                            
-                            # Check if gold_type exists in the data, use default if not
-                            current_gold_type = result_data.get('gold_type', 'Unknown')
-                            if current_gold_type is None or pd.isna(current_gold_type):
-                                current_gold_type = 'Unknown'
-                            
-                            # Gold type selection (show the current value if available)
-                            gold_types = ["Mine Gold", "Jewelry", "Fine Gold", "Recycled Gold"]
-                            default_index = gold_types.index(current_gold_type) if current_gold_type in gold_types else 0
-                            
-                            edit_gold_type = st.selectbox(
-                                "Gold Type",
-                                options=gold_types,
-                                index=default_index,
-                                help="Select the type of gold being tested"
-                            )
-                            
-                            edit_notes = st.text_area(
-                                "Notes", 
-                                value=result_data['notes'] if result_data['notes'] else ""
-                            )
-                            
-                            col1, col2 = st.columns([1, 3])
-                            
-                            with col1:
-                                cancel = st.form_submit_button("Cancel")
-                                if cancel:
-                                    st.session_state.edit_mode = False
-                                    st.rerun()
-                                    
-                            with col2:
-                                save = st.form_submit_button("Save Changes")
-                                if save:
-                                    # Update the result
-                                    success, message = update_assay_result(
-                                        result_id=st.session_state.selected_result_id,
-                                        gold_content=edit_gold_content,
-                                        notes=edit_notes,
-                                        gold_type=edit_gold_type,
-                                        bar_weight_grams=edit_bar_weight_grams
-                                    )
-                                    
-                                    if success:
-                                        st.success(f"✅ Successfully updated result for sample {result_data['sample_id']}")
-                                        # Clear edit mode and refresh the search results
-                                        st.session_state.edit_mode = False
-                                        
-                                        # Re-fetch the search results to show the updated data
-                                        date_from_str = date_from.strftime('%Y-%m-%d')
-                                        date_to_str = date_to.strftime('%Y-%m-%d')
-                                        
-                                        updated_results = search_assay_results(
-                                            search_term=search_term if search_term else None,
-                                            assayer_id=selected_assayer_id,
-                                            date_from=date_from_str,
-                                            date_to=date_to_str,
-                                            limit=100
-                                        )
-                                        st.session_state.search_results = updated_results
-                                        
-                                        # Force page refresh
-                                        st.rerun()
-                                    else:
-                                        st.error(f"❌ Failed to update result: {message}")
-                
-                # DELETE MODE
-                if st.session_state.delete_mode and st.session_state.selected_result_id is not None:
-                    st.markdown("---")
-                    st.subheader("🗑️ Delete Result")
-                    
-                    # Get the full result data
-                    result_data = get_assay_result(st.session_state.selected_result_id)
-                    
-                    if result_data is not None:
-                        # Show result details in a clean format
-                        # Get bar weight if available, otherwise display "Not specified"
-                        bar_weight = result_data.get('bar_weight_grams', 'Not specified')
-                        if bar_weight == 0 or pd.isna(bar_weight):
-                            bar_weight = 'Not specified'
-                            
-                        st.markdown(f"""
-                        <div style='background-color: #f8f9fa; padding: 15px; border-radius: 5px; margin-bottom: 15px;'>
-                            <p><strong>Sample ID:</strong> {result_data['sample_id']}</p>
-                            <p><strong>Assayer:</strong> {result_data['assayer_name']}</p>
-                            <p><strong>Test Date:</strong> {pd.to_datetime(result_data['test_date']).strftime('%Y-%m-%d')}</p>
-                            <p><strong>Gold Content:</strong> {result_data['gold_content']} ppt</p>
-                            <p><strong>Gold Type:</strong> {result_data.get('gold_type', 'Unknown')}</p>
-                            <p><strong>Bar Weight:</strong> {bar_weight if isinstance(bar_weight, str) else f"{bar_weight:.1f} g"}</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                        
-                        st.warning("⚠️ Are you sure you want to delete this result? This action cannot be undone.")
-                        
-                        # Confirmation and action buttons
-                        col1, col2 = st.columns([1, 1])
-                        
-                        with col1:
-                            if st.button("Cancel", use_container_width=True):
-                                st.session_state.delete_mode = False
-                                st.rerun()
-                                
-                        with col2:
-                            confirm_delete = st.checkbox("I confirm deletion")
-                            if st.button("Delete Result", disabled=not confirm_delete, use_container_width=True):
-                                # Delete the result
-                                success, message = delete_assay_result(st.session_state.selected_result_id)
-                                
-                                if success:
-                                    st.success("✅ Result deleted successfully")
-                                    
-                                    # Clear delete mode and update search results
-                                    st.session_state.delete_mode = False
-                                    
-                                    # Re-fetch the search results to show the updated data
-                                    date_from_str = date_from.strftime('%Y-%m-%d')
-                                    date_to_str = date_to.strftime('%Y-%m-%d')
-                                    
-                                    updated_results = search_assay_results(
-                                        search_term=search_term if search_term else None,
-                                        assayer_id=selected_assayer_id,
-                                        date_from=date_from_str,
-                                        date_to=date_to_str,
-                                        limit=100
-                                    )
-                                    st.session_state.search_results = updated_results
-                                    
-                                    # Rerun to update UI
-                                    st.rerun()
-                                else:
-                                    st.error(f"❌ Failed to delete result: {message}")
+                search_results_fragment()
             elif search_submitted:
                 st.info("📌 No results found matching your search criteria.")
                 
@@ -788,7 +924,7 @@ with tab2:
         st.markdown("<p class='entry-header'>📊 Batch Assay Results Entry</p>", unsafe_allow_html=True)
         
         # Get assayers for dropdown
-        assayers = get_assayers()
+        assayers = assayers_df
         
         if not assayers.empty:
             # Initialize session state for batch entry
@@ -805,7 +941,7 @@ with tab2:
             
             with col1:
                 # Create a dictionary mapping display names to assayer IDs
-                assayer_options = {f"{row['name']} ({row['employee_id']})": row['assayer_id'] for _, row in assayers.iterrows()}
+                assayer_options = build_assayer_options(assayers)
                 
                 # Benchmark assayer selection
                 benchmark_assayer_label = st.selectbox(
@@ -830,203 +966,8 @@ with tab2:
             # Step 2: Batch sample entry interface
             st.markdown("### 📝 Sample Entry (Excel-style)")
             
-            # Create a form for batch entry
-            with st.form("batch_entry_form"):
-                # Display current batch info
-                st.info(f"Benchmark Assayer: {benchmark_assayer_label} | Test Date: {batch_test_date}")
-                
-                # Create 20 sample input rows
-                num_samples = 20
-                batch_data = []
-                
-                # Header row
-                col1, col2, col3, col4, col5, col6, col7 = st.columns([2, 2, 1.5, 1.5, 1.5, 1.5, 1.5])
-                col1.markdown("**Assayer**")
-                col2.markdown("**Sample ID**")
-                col3.markdown("**Bar Weight (g)**")
-                col4.markdown("**Gold Type**")
-                col5.markdown("**Assayer Result**")
-                col6.markdown("**Benchmark Result**")
-                col7.markdown("**Notes**")
-                
-                # Create input rows
-                for i in range(num_samples):
-                    col1, col2, col3, col4, col5, col6, col7 = st.columns([2, 2, 1.5, 1.5, 1.5, 1.5, 1.5])
-                    
-                    with col1:
-                        # Assayer selection for this sample
-                        sample_assayer_label = st.selectbox(
-                            "",
-                            options=[""] + list(assayer_options.keys()),
-                            key=f"sample_assayer_{i}",
-                            label_visibility="collapsed"
-                        )
-                        sample_assayer_id = assayer_options.get(sample_assayer_label, None) if sample_assayer_label else None
-                    
-                    with col2:
-                        # Sample ID
-                        sample_id = st.text_input(
-                            "",
-                            key=f"sample_id_{i}",
-                            placeholder=f"Sample {i+1}",
-                            label_visibility="collapsed"
-                        )
-                    
-                    with col3:
-                        # Bar weight
-                        bar_weight = st.number_input(
-                            "",
-                            min_value=0.0,
-                            max_value=100000.0,
-                            value=None,
-                            step=100.0,
-                            format="%.1f",
-                            key=f"bar_weight_{i}",
-                            label_visibility="collapsed"
-                        )
-                    
-                    with col4:
-                        # Gold type
-                        gold_type = st.selectbox(
-                            "",
-                            options=["", "Mine Gold", "Jewelry", "Fine Gold", "Recycled Gold", "Unknown"],
-                            key=f"gold_type_{i}",
-                            label_visibility="collapsed"
-                        )
-                    
-                    with col5:
-                        # Assayer result
-                        assayer_result = st.number_input(
-                            "",
-                            min_value=0.0,
-                            max_value=999.9,
-                            value=None,
-                            step=0.1,
-                            format="%.1f",
-                            key=f"assayer_result_{i}",
-                            label_visibility="collapsed"
-                        )
-                    
-                    with col6:
-                        # Benchmark result
-                        benchmark_result = st.number_input(
-                            "",
-                            min_value=0.0,
-                            max_value=999.9,
-                            value=None,
-                            step=0.1,
-                            format="%.1f",
-                            key=f"benchmark_result_{i}",
-                            label_visibility="collapsed"
-                        )
-                    
-                    with col7:
-                        # Notes
-                        notes = st.text_input(
-                            "",
-                            key=f"notes_{i}",
-                            placeholder="Optional",
-                            label_visibility="collapsed"
-                        )
-                    
-                    # Collect data if fields are filled
-                    if sample_id and sample_assayer_id and gold_type and assayer_result is not None and assayer_result > 0:
-                        batch_data.append({
-                            'assayer_id': sample_assayer_id,
-                            'sample_id': sample_id,
-                            'bar_weight_grams': bar_weight if bar_weight is not None and bar_weight > 0 else 1000.0,
-                            'gold_type': gold_type,
-                            'gold_content': assayer_result,
-                            'benchmark_value': benchmark_result if benchmark_result is not None and benchmark_result > 0 else None,
-                            'notes': notes
-                        })
-                
-                # Submit button
-                st.markdown("---")
-                col1, col2, col3 = st.columns([2, 1, 2])
-                with col2:
-                    submit_batch = st.form_submit_button("💾 Save Batch", use_container_width=True)
-                
-                if submit_batch:
-                    if batch_data:
-                        success_count = 0
-                        error_count = 0
-                        errors = []
-                        
-                        # Process each sample in the batch
-                        for sample in batch_data:
-                            try:
-                                # Add assayer result
-                                success = add_assay_result(
-                                    assayer_id=sample['assayer_id'],
-                                    sample_id=sample['sample_id'],
-                                    gold_content=sample['gold_content'],
-                                    test_date=batch_test_date.strftime('%Y-%m-%d %H:%M:%S'),
-                                    notes=sample['notes'],
-                                    gold_type=sample['gold_type'],
-                                    bar_weight_grams=sample['bar_weight_grams']
-                                )
-                                
-                                if success:
-                                    # Add benchmark result if provided
-                                    if sample['benchmark_value'] is not None:
-                                        benchmark_success = add_assay_result(
-                                            assayer_id=st.session_state.batch_benchmark_assayer,
-                                            sample_id=sample['sample_id'],
-                                            gold_content=sample['benchmark_value'],
-                                            test_date=batch_test_date.strftime('%Y-%m-%d %H:%M:%S'),
-                                            notes=f"Benchmark for {sample['sample_id']}",
-                                            gold_type=sample['gold_type'],
-                                            bar_weight_grams=sample['bar_weight_grams']
-                                        )
-                                    success_count += 1
-                                else:
-                                    error_count += 1
-                                    errors.append(f"Sample {sample['sample_id']}: Already exists")
-                            except Exception as e:
-                                error_count += 1
-                                errors.append(f"Sample {sample['sample_id']}: {str(e)}")
-                        
-                        # Display results
-                        if success_count > 0:
-                            st.success(f"✅ Successfully saved {success_count} samples")
-                        
-                        if error_count > 0:
-                            st.error(f"❌ Failed to save {error_count} samples")
-                            for error in errors:
-                                st.warning(f"• {error}")
-                        
-                        # Clear the form by clearing session state and rerunning
-                        if success_count > 0:
-                            # Clear all form inputs by removing them from session state
-                            keys_to_remove = []
-                            for key in list(st.session_state.keys()):
-                                if str(key).startswith(('sample_assayer_', 'sample_id_', 'bar_weight_', 
-                                                  'gold_type_', 'assayer_result_', 'benchmark_result_', 'notes_')):
-                                    keys_to_remove.append(key)
-                            
-                            for key in keys_to_remove:
-                                del st.session_state[key]
-                            
-                            st.info("✅ Batch saved successfully! Form cleared for next batch...")
-                            st.rerun()
-                    else:
-                        st.warning("⚠️ Please fill in at least one complete sample row (Assayer, Sample ID, Gold Type, and Assayer Result are required)")
-                
-                # Show current batch summary
-                if batch_data:
-                    st.markdown("---")
-                    st.markdown("### 📊 Current Batch Summary")
-                    st.info(f"Ready to save: {len(batch_data)} samples")
-                    
-                    # Show preview table
-                    if st.checkbox("Show preview", key="show_batch_preview"):
-                        preview_df = pd.DataFrame(batch_data)
-                        preview_df['assayer_name'] = preview_df['assayer_id'].map(
-                            {v: k.split(' (')[0] for k, v in assayer_options.items()}
-                        )
-                        preview_cols = ['sample_id', 'assayer_name', 'gold_content', 'benchmark_value', 'gold_type', 'bar_weight_grams']
-                        st.dataframe(preview_df[preview_cols], use_container_width=True)
+            # Grid and save button run as a fragment
+            batch_grid_fragment(assayer_options, build_assayer_names(assayers), batch_test_date, benchmark_assayer_label)
         else:
             st.warning("⚠️ No assayers available. Please add assayers first.")
         
@@ -1068,6 +1009,7 @@ with tab3:
                     )
                     
                     if success:
+                        cached_get_external_labs.clear()
                         st.success(f"✅ Successfully added external laboratory: {lab_name}")
                     else:
                         st.error(f"❌ Failed to add external laboratory.")
@@ -1081,7 +1023,7 @@ with tab3:
         st.markdown("<p class='entry-header'>🏢 Existing External Laboratories</p>", unsafe_allow_html=True)
         
         try:
-            labs_df = get_external_labs()
+            labs_df = cached_get_external_labs()
             if not labs_df.empty:
                 # Display labs data
                 st.dataframe(labs_df, use_container_width=True)
@@ -1089,14 +1031,15 @@ with tab3:
                 # Edit and Delete UI
                 st.markdown("<p style='font-weight: 500; margin-top: 15px;'>Edit or Delete External Laboratories</p>", unsafe_allow_html=True)
                 
+                # Both tabs below select from the same labels
+                lab_options = build_lab_options(labs_df)
+                
                 # Create two tabs for Edit and Delete
                 edit_lab_tab, delete_lab_tab = st.tabs(["Edit Laboratory", "Delete Laboratory"])
                 
                 # Edit tab - Individual lab editing
                 with edit_lab_tab:
                     # Select lab to edit
-                    lab_options = {f"{row['lab_name']} ({row['accreditation'] if 'accreditation' in row and pd.notna(row['accreditation']) and row['accreditation'] != '' else 'No Accreditation'})": row['lab_id'] for _, row in labs_df.iterrows()}
-                    
                     if lab_options:
                         selected_lab_id_label = st.selectbox(
                             "Select Laboratory to Edit",
@@ -1108,7 +1051,7 @@ with tab3:
                         lab_id = lab_options[selected_lab_id_label]
                         
                         # Extract information for the selected lab
-                        selected_lab = labs_df[labs_df['lab_id'] == lab_id].iloc[0]
+                        selected_lab = index_by_id(labs_df, 'lab_id').loc[lab_id]
                         
                         with st.form("edit_lab_form"):
                             col1, col2 = st.columns(2)
@@ -1135,6 +1078,7 @@ with tab3:
                                     )
                                     
                                     if success:
+                                        cached_get_external_labs.clear()
                                         st.success(f"✅ Successfully updated laboratory: {edit_lab_name}")
                                         # Force reloading the page to see the updated data
                                         st.rerun()
@@ -1150,8 +1094,6 @@ with tab3:
                     st.warning("⚠️ This action will deactivate the selected laboratory and cannot be undone.")
                     
                     # Select lab to delete
-                    lab_options = {f"{row['lab_name']} ({row['accreditation'] if 'accreditation' in row and pd.notna(row['accreditation']) and row['accreditation'] != '' else 'No Accreditation'})": row['lab_id'] for _, row in labs_df.iterrows()}
-                    
                     if lab_options:
                         # Initialize session state variables if they don't exist
                         if 'delete_lab_confirmed' not in st.session_state:
@@ -1161,23 +1103,12 @@ with tab3:
                         if 'delete_lab_message' not in st.session_state:
                             st.session_state.delete_lab_message = ""
                         
-                        # Function to handle delete confirmation
-                        def toggle_lab_delete_confirmation():
-                            st.session_state.delete_lab_confirmed = not st.session_state.delete_lab_confirmed
-                        
-                        # Function to handle delete operation
-                        def delete_selected_lab():
-                            lab_id = lab_options[st.session_state.delete_lab_selection]
-                            success, message = delete_external_lab(lab_id)
-                            st.session_state.delete_lab_status = success
-                            st.session_state.delete_lab_message = message
-                        
                         # Store the selected lab in session state
                         selected_lab_id_label = st.selectbox(
                             "Select Laboratory to Delete",
                             options=list(lab_options.keys()),
                             key="delete_lab_selection",
-                            on_change=lambda: setattr(st.session_state, 'delete_lab_confirmed', False)
+                            on_change=reset_lab_delete_confirmation
                         )
                         
                         # Add a confirmation checkbox with callback
@@ -1191,7 +1122,8 @@ with tab3:
                         # Display delete button
                         if st.button("Delete Laboratory", 
                                     disabled=not st.session_state.delete_lab_confirmed,
-                                    on_click=delete_selected_lab):
+                                    on_click=delete_selected_lab,
+                                    args=(lab_options,)):
                             pass  # The actual deletion happens in the on_click callback
                         
                         # Display status messages
@@ -1222,7 +1154,7 @@ with tab3:
         
         # Get list of external labs for the dropdown
         try:
-            labs_df = get_external_labs()
+            labs_df = cached_get_external_labs()
             lab_options = {}
             
             if not labs_df.empty:
@@ -1237,12 +1169,10 @@ with tab3:
             
         # Get list of internal assayers
         try:
-            assayers_df = get_assayers()
             assayer_options = {}
             
             if not assayers_df.empty:
-                for _, row in assayers_df.iterrows():
-                    assayer_options[row['name']] = row['assayer_id']
+                assayer_options = dict(zip(assayers_df['name'].tolist(), assayers_df['assayer_id'].tolist()))
             else:
                 st.warning("⚠️ No internal assayers available. Please add assayers in the Assayer Management tab.")
         except Exception as e:
@@ -1401,17 +1331,6 @@ with tab3:
                     }, inplace=True)
                 
                 # Display in a table with formatting
-                def highlight_gold(val):
-                    """Custom function to color gold content values"""
-                    if isinstance(val, (int, float)):
-                        if val >= 995.0:
-                            return 'background-color: rgba(212, 175, 55, 0.3); color: #000;'
-                        elif val >= 916.0:
-                            return 'background-color: rgba(212, 175, 55, 0.2); color: #000;'
-                        elif val >= 750.0:
-                            return 'background-color: rgba(212, 175, 55, 0.1); color: #000;'
-                    return ''
-                
                 def highlight_deviation(val):
                     """Custom function to color deviation values"""
                     if isinstance(val, (int, float)):
@@ -1425,10 +1344,10 @@ with tab3:
                 
                 # Apply styling
                 if 'External Result (ppt)' in results.columns and 'Deviation (ppt)' in results.columns:
-                    styled_results = results.style.applymap(highlight_gold, subset=['External Result (ppt)'])
+                    styled_results = results.style.apply(highlight_gold, subset=['External Result (ppt)'])
                     styled_results = styled_results.applymap(highlight_deviation, subset=['Deviation (ppt)'])
                 else:
-                    styled_results = results.style.applymap(highlight_gold, subset=['gold_content'])
+                    styled_results = results.style.apply(highlight_gold, subset=['gold_content'])
                 
                 # Select columns for display
                 display_columns = [
@@ -1469,12 +1388,12 @@ with tab4:
             st.markdown("<p class='entry-header'>🧪 Register New Trainee</p>", unsafe_allow_html=True)
             
             # Get assayers for dropdown
-            assayers = get_assayers()
+            assayers = assayers_df
             
             if not assayers.empty:
                 with st.form("add_trainee_form"):
                     # Create a dictionary mapping display names to assayer IDs
-                    assayer_options = {f"{row['name']} ({row['employee_id']})": row['assayer_id'] for _, row in assayers.iterrows()}
+                    assayer_options = build_assayer_options(assayers)
                     
                     # Create the dropdown with display names
                     selected_assayer_label = st.selectbox(
@@ -1515,6 +1434,7 @@ with tab4:
                             )
                             
                             if trainee_id:
+                                cached_get_trainees.clear()
                                 st.success(f"✅ Successfully registered trainee: {selected_assayer_label.split(' (')[0]}")
                             else:
                                 st.error(f"❌ Failed to register trainee.")
@@ -1531,7 +1451,7 @@ with tab4:
             st.markdown("<p class='entry-header'>👥 Existing Trainees</p>", unsafe_allow_html=True)
             
             # Get trainees from the database
-            trainees_df = get_trainees()
+            trainees_df = cached_get_trainees()
             
             if not trainees_df.empty:
                 # Display trainee information
@@ -1612,6 +1532,7 @@ with tab4:
                             )
                             
                             if ref_id:
+                                cached_get_reference_materials.clear()
                                 st.success(f"✅ Successfully added reference material: {name}")
                             else:
                                 st.error(f"❌ Failed to add reference material.")
@@ -1628,7 +1549,7 @@ with tab4:
             st.markdown("<p class='entry-header'>📋 Existing Reference Materials</p>", unsafe_allow_html=True)
             
             # Get reference materials from the database
-            materials_df = get_reference_materials()
+            materials_df = cached_get_reference_materials()
             
             if not materials_df.empty:
                 # Format the dataframe for display
@@ -1660,9 +1581,8 @@ with tab4:
         st.markdown("<p class='entry-header'>🔍 Record Trainee Evaluation</p>", unsafe_allow_html=True)
         
         # Get trainees, assayers, and reference materials
-        trainees_df = get_trainees()
-        assayers_df = get_assayers()
-        materials_df = get_reference_materials()
+        trainees_df = cached_get_trainees()
+        materials_df = cached_get_reference_materials()
         
         if not trainees_df.empty:
             # Create a multi-step workflow
@@ -1711,7 +1631,7 @@ with tab4:
                             sample_id = st.text_input("Sample ID", help="Enter the unique identifier for this sample")
                             
                             # Certified Assayer selection
-                            assayer_options = {f"{row['name']} ({row['employee_id']})": row['assayer_id'] for _, row in assayers_df.iterrows()}
+                            assayer_options = build_assayer_options(assayers_df)
                             
                             selected_assayer_label = st.selectbox(
                                 "Select Certified Assayer",
@@ -1733,7 +1653,7 @@ with tab4:
                             )
                             
                             # Trainee selection
-                            trainee_options = {f"{row['assayer_name']} ({row['employee_id']})": row['trainee_id'] for _, row in trainees_df.iterrows()}
+                            trainee_options = dict(zip((trainees_df['assayer_name'].astype(str) + ' (' + trainees_df['employee_id'].astype(str) + ')').tolist(), trainees_df['trainee_id'].tolist()))
                             
                             selected_trainee_label = st.selectbox(
                                 "Select Trainee",
@@ -1788,6 +1708,7 @@ with tab4:
                                             source=f"Certified Assayer: {selected_assayer_label}",
                                             notes=f"Sample ID: {sample_id}, Created for accuracy evaluation"
                                         )
+                                        cached_get_reference_materials.clear()
                                     
                                     # Now record the evaluation
                                     test_date_str = test_date.strftime('%Y-%m-%d')
@@ -1830,7 +1751,7 @@ with tab4:
                         )
                         
                         # Trainee selection
-                        trainee_options = {f"{row['assayer_name']} ({row['employee_id']})": row['trainee_id'] for _, row in trainees_df.iterrows()}
+                        trainee_options = dict(zip((trainees_df['assayer_name'].astype(str) + ' (' + trainees_df['employee_id'].astype(str) + ')').tolist(), trainees_df['trainee_id'].tolist()))
                         
                         selected_trainee_label = st.selectbox(
                             "Select Trainee",
@@ -1885,6 +1806,7 @@ with tab4:
                                         source="Internal QC",
                                         notes=f"QC Sample ID: {qc_sample_id}, Created for consistency evaluation"
                                     )
+                                    cached_get_reference_materials.clear()
                                 
                                 # Now record the evaluation
                                 test_date_str = test_date.strftime('%Y-%m-%d')
@@ -11,13 +11,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database import get_deviations_from_benchmark, get_current_benchmark, get_assayer_performance
 from utils import create_moving_average_chart, create_deviation_distribution_chart
-from deepseek_assistant import (
-    analyze_deviation_data, 
-    analyze_heatmap, 
-    analyze_trend_chart, 
-    analyze_distribution_chart, 
-    generate_performance_recommendations
-)
+from deepseek_assistant import run_all
 from auth import require_permission, display_access_denied, check_page_access
 
 st.set_page_config(page_title="AI Assistant", page_icon="🤖", layout="wide")
@@ -71,6 +65,10 @@ if deviations_df is None or deviations_df.empty:
     st.info(f"No deviation data available for the selected time period.")
     st.stop()
 
+# Run all analyses concurrently on the same data
+with st.spinner("AI is analyzing your data..."):
+    analyses = run_all(deviations_df, time_period=time_period, ma_window=ma_window)
+
 # Create tabs for different AI analyses
 tab1, tab2, tab3, tab4, tab5 = st.tabs([
     "Overall Analysis", 
@@ -83,8 +81,7 @@ tab1, tab2, tab3, tab4, tab5 = st.tabs([
 with tab1:
     st.header("Overall Performance Analysis")
     
-    with st.spinner("AI is analyzing your data..."):
-        analysis = analyze_deviation_data(deviations_df, time_period)
+    analysis = analyses["deviation"]
     
     # Use expander to make the analysis toggleable
     with st.expander("View AI Insights", expanded=False):
@@ -120,8 +117,7 @@ with tab2:
     else:
         st.info("Not enough data to create heatmap visualization.")
     
-    with st.spinner("AI is analyzing the heatmap..."):
-        heatmap_analysis = analyze_heatmap(deviations_df, time_period)
+    heatmap_analysis = analyses["heatmap"]
     
     # Use expander to make the analysis toggleable
     with st.expander("View Heatmap Interpretation", expanded=False):
@@ -140,8 +136,7 @@ with tab3:
     else:
         st.info(f"Not enough data to calculate {ma_window}-day moving average.")
         
-    with st.spinner("AI is analyzing trends..."):
-        trend_analysis = analyze_trend_chart(deviations_df, ma_window, time_period)
+    trend_analysis = analyses["trend"]
     
     # Use expander to make the analysis toggleable
     with st.expander("View Trend Analysis Interpretation", expanded=False):
@@ -160,8 +155,7 @@ with tab4:
     else:
         st.info("Not enough data to create distribution visualization.")
     
-    with st.spinner("AI is analyzing distributions..."):
-        distribution_analysis = analyze_distribution_chart(deviations_df, time_period)
+    distribution_analysis = analyses["distribution"]
     
     # Use expander to make the analysis toggleable
     with st.expander("View Distribution Analysis Interpretation", expanded=False):
@@ -170,8 +164,7 @@ with tab4:
 with tab5:
     st.header("AI Recommendations")
     
-    with st.spinner("AI is generating recommendations..."):
-        recommendations = generate_performance_recommendations(deviations_df, time_period)
+    recommendations = analyses["recommendations"]
     
     # Use expander to make the recommendations toggleable
     with st.expander("View Performance Analysis and Recommendations", expanded=False):
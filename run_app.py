@@ -92,7 +92,8 @@ def main():
         '--server.enableXsrfProtection', 'false'
     ]
     
-    streamlit_process = subprocess.Popen(cmd, env=env)
+    # close_fds=False allows the faster posix_spawn launch path
+    streamlit_process = subprocess.Popen(cmd, env=env, close_fds=False)
     
     # Wait for Streamlit to be ready
     if wait_for_streamlit():
@@ -30,7 +30,8 @@ def start_streamlit():
         "--server.enableXsrfProtection", "false"
     ]
     
-    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    # close_fds=False allows the faster posix_spawn launch path
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, close_fds=False)
     return process
 
 if __name__ == "__main__":